@@ -1,2 +1,7 @@
-from .tracker import norfairDev
-from .utils import utils
\ No newline at end of file
+from .utils import utils
+
+def __getattr__(name):
+    if name == 'norfairDev': # the tracker stack (norfair) is imported on first use
+        from .tracker import norfairDev
+        return norfairDev
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
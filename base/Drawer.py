@@ -1,19 +1,45 @@
+import time
 import numpy as np
 import cv2
 from norfair.drawing.drawer import Drawer
 from norfair.drawing.color import Palette
 from typing import TYPE_CHECKING
+from .Regions import CompiledRegions
 
 if TYPE_CHECKING:
     from .Results import BaseResultsTracker
 
 class BaseDrawer:
+    _COLOR_CACHE_SIZE = 4096
+    _LABEL_CACHE_SIZE = 256
+
     def __init__(self, results:"BaseResultsTracker"=None):
+        self._roi_layer = None
+        self._roi_layer_key = None
         self.color_mapping_keys = {
             'roi':(0,255,0),
             'roni':(0,0,255)
         }
         self.Results:"BaseResultsTracker" = results
+        self._color_cache = {}
+        self._label_luts = {} # ROI label lookup tables, see `_label_lut`
+        self.metrics = None # MetricsSink, set through the tracker's set_metrics
+
+    @property
+    def color_mapping_keys(self):
+        return self._color_mapping_keys
+
+    @color_mapping_keys.setter
+    def color_mapping_keys(self, value):
+        self._color_mapping_keys = value
+        self.invalidate_roi_cache()
+
+    def invalidate_roi_cache(self):
+        '''
+        Drop the cached ROI overlay; it is rebuilt on the next `_draw_roi`.
+        '''
+        self._roi_layer = None
+        self._roi_layer_key = None
 
     @staticmethod
     def _thickness_cal(frame):
@@ -31,42 +57,87 @@ class BaseDrawer:
                 return self.color_mapping_keys[k]
         return None
 
+    def _get_color(self, idx):
+        color = self._color_cache.get(idx)
+        if color is None:
+            if len(self._color_cache) >= self._COLOR_CACHE_SIZE:
+                self._color_cache.clear()
+            color = Palette.choose_color(idx)
+            self._color_cache[idx] = color
+        return color
+
+    def _frame_style(self, frame):
+        '''
+        Thickness, font scale and point radius for a frame, computed once per render pass.
+        '''
+        return self._thickness_cal(frame), self._font_scale_cal(frame), int(frame.shape[0] / 100 * 0.3)
+
+    @staticmethod
+    def _render_buffer(frame, out=None, inplace=False):
+        '''
+        Buffer a render pass draws into: `frame` itself when `inplace`,
+        the caller-provided `out` buffer, or a single copy of `frame`.
+        '''
+        if inplace:
+            return frame
+        if out is not None:
+            if out.shape != frame.shape or out.dtype != frame.dtype:
+                raise ValueError(f"out buffer must match frame ({frame.shape}, {frame.dtype}), got ({out.shape}, {out.dtype})")
+            np.copyto(out, frame)
+            return out
+        return frame.copy()
+
     def draw_tracker_results(self,
                   frame,
                   tracker_results:"BaseResultsTracker" = None,
                   draw_roi=True,
                   draw_id=True,
                   draw_points=True,
-                  draw_bounding_box=True,):
-        im = frame.copy()
+                  draw_bounding_box=True,
+                  out=None,
+                  inplace=False):
+        '''
+        Draw tracker results. The frame is copied at most once (into `out` if
+        given, not at all if `inplace`) and every primitive draws into that buffer.
+        '''
+        metrics = self.metrics
+        if metrics is not None:
+            t0 = time.perf_counter()
+            if not inplace:
+                metrics.count('frame_copies')
+        im = self._render_buffer(frame, out, inplace)
         
         if tracker_results: # update
             self.Results = tracker_results
 
         if draw_roi:
-            im = self._draw_roi(im, self.Results.roi)
+            im = self._draw_roi(im, self.Results.roi, inplace=True)
 
         if self.Results.ids:
+            thickness, font_scale, radius = self._frame_style(im)
             for i, indx in enumerate(self.Results.ids):
                 point = self.Results.last_det_points[i]
                 if draw_points:
-                    im = self._draw_point(im, point, indx)
+                    im = self._draw_point(im, point, indx, radius, thickness, inplace=True)
                 if draw_bounding_box:
                     box = self.Results.last_det_bounding_boxes[i]
-                    im = self._draw_box(im, box, indx)
+                    im = self._draw_box(im, box, indx, thickness, inplace=True)
                 if draw_id:
-                    im = self._draw_id(im, indx, point)
+                    im = self._draw_id(im, indx, point, font_scale, thickness, inplace=True)
+
+        if metrics is not None:
+            metrics.observe('draw', time.perf_counter() - t0)
         return im
 
-    def _draw_id(self, frame, idx, position, size=None, thickness=None):
+    def _draw_id(self, frame, idx, position, size=None, thickness=None, inplace=False):
         if thickness is None:
             thickness = self._thickness_cal(frame)
 
         if size is None:
             size = max(max(frame.shape) / 2000, 0.5)
 
-        draw_id = frame.copy()
-        color = Palette.choose_color(idx)
+        draw_id = frame if inplace else frame.copy()
+        color = self._get_color(idx)
         position = np.array(position, dtype=np.int32).reshape(-1)
         if len(position) == 4: # get center
             p1, p2 = position.reshape(2,2)
@@ -74,16 +145,16 @@ class BaseDrawer:
         draw_id = Drawer.text(draw_id, f'{idx}', position, size=size, color=color, thickness=thickness)
         return draw_id
     
-    def _draw_box(self, frame, box, idx, thickness=None):
+    def _draw_box(self, frame, box, idx, thickness=None, inplace=False):
         if thickness is None:
             thickness = self._thickness_cal(frame)
-        draw_box = frame.copy()
+        draw_box = frame if inplace else frame.copy()
         box = np.array(box, dtype=np.int32).reshape(2,2)
-        color = Palette.choose_color(idx)
+        color = self._get_color(idx)
         draw_box = Drawer.rectangle(draw_box, box, color, thickness)
         return draw_box
 
-    def _draw_point(self, frame, point, idx, radius=None, thickness=None):
+    def _draw_point(self, frame, point, idx, radius=None, thickness=None, inplace=False):
         if thickness is None:
             thickness = self._thickness_cal(frame)
 
@@ -91,10 +162,10 @@ class BaseDrawer:
             frame_scale = frame.shape[0] / 100
             radius = int(frame_scale * 0.3)
         
-        draw_point = frame.copy()
+        draw_point = frame if inplace else frame.copy()
         point = np.array(point, dtype=np.int32).reshape(-1)
 
-        color = Palette.choose_color(idx)
+        color = self._get_color(idx)
 
         if len(point) == 2:
             draw_point = Drawer.circle(draw_point, point, radius, thickness, color)
@@ -107,32 +178,233 @@ class BaseDrawer:
                  roi_dict,
                  font_size=1, 
                  font_thickness=2,
-                 font_color=(255,255,255)):
+                 font_color=(255,255,255),
+                 inplace=False):
+        '''
+        Blend the ROI overlay (fill, outline, labels) onto the frame.
+
+        The overlay is built once per resolution and ROI config and cached,
+        so each frame only touches the pixels the overlay covers. The output
+        is bitwise identical to `_draw_roi_full`, which renders the overlay on
+        the whole frame: fill and outline pixels are constant or unchanged,
+        antialiased label pixels go through a 256-entry lookup table, and
+        every covered pixel is blended with the same `cv2.addWeighted` call.
+
+        The cache is keyed on the content of the roi dict and of
+        `color_mapping_keys`, so editing either in place also rebuilds it.
+        Label lookup tables are kept across rebuilds (see `_label_lut`), so
+        moving or recoloring ROIs does not re-render the labels.
+        '''
+        draw_roi = frame if inplace else frame.copy()
+        if not roi_dict:
+            return draw_roi
+
+        key = (draw_roi.shape, font_size, font_thickness, tuple(font_color),
+               CompiledRegions.signature(roi_dict),
+               tuple((k, tuple(v)) for k, v in self.color_mapping_keys.items()))
+        if self._roi_layer_key != key:
+            self._roi_layer = self._build_roi_layer(draw_roi.shape, roi_dict, font_size, font_thickness, font_color)
+            self._roi_layer_key = key
+
+        if self._roi_layer is None:
+            return draw_roi
+
+        (y0, y1, x0, x1), fill, fill_mask, alpha_fill, edges = self._roi_layer
+        crop = draw_roi[y0:y1, x0:x1]
+        if fill is not None: # plain fill pixels: blend with the constant fill layer
+            cv2.copyTo(cv2.addWeighted(fill, alpha_fill, crop, 1 - alpha_fill, 0), fill_mask, crop)
+        if edges is not None: # outline and label pixels
+            pixels, overlay_const, overlay_value, drawn_const, drawn_value, aa_rows, aa_lut = edges
+            values = crop[pixels]
+            overlay = np.where(overlay_const, overlay_value, values)
+            drawn = np.where(drawn_const, drawn_value, values)
+            if aa_rows is not None:
+                drawn[aa_rows] = aa_lut[np.arange(len(aa_rows))[:, None], np.arange(values.shape[1])[None, :], values[aa_rows]]
+            crop[pixels] = cv2.addWeighted(overlay, alpha_fill, drawn, 1 - alpha_fill, 0)
+        return draw_roi
+
+    def _draw_roi_full(self,
+                       frame,
+                       roi_dict,
+                       font_size=1,
+                       font_thickness=2,
+                       font_color=(255,255,255)):
+        '''
+        Uncached reference for `_draw_roi`: draws the overlay on a copy of the
+        whole frame and blends it. Much slower, kept to check the cache against.
+        '''
         draw_roi = frame.copy()
-        overlay = frame.copy()
+        if not roi_dict:
+            return draw_roi
         h, w = draw_roi.shape[:2]
+        overlay = draw_roi.copy()
+        for key, pts, color in self._roi_items(roi_dict, w, h):
+            cv2.fillPoly(overlay, [pts], color=color)
+            cv2.polylines(draw_roi, [pts], isClosed=True, color=color, thickness=2)
+            Drawer.text(draw_roi, key, self._roi_label_position(pts), font_size, font_color, font_thickness)
+        cv2.addWeighted(overlay, 0.3, draw_roi, 0.7, 0, draw_roi)
+        return draw_roi
+
+    def _roi_items(self, roi_dict, w, h):
+        '''
+        (key, int32 points, color) of every ROI that has a color, in drawing order.
+        '''
+        regions = CompiledRegions(roi_dict)
+        items = []
+        for key, poly in zip(regions.keys, regions.scaled(w, h)):
+            color = self._get_color_roi(key)
+            if color is not None:
+                items.append((key, poly.astype(np.int32), color))
+        return items
+
+    @staticmethod
+    def _roi_label_position(pts):
+        M = cv2.moments(pts)
+        if M["m00"] != 0:
+            return int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"])
+        return tuple(pts[0])
+
+    def _build_roi_layer(self, shape, roi_dict, font_size, font_thickness, font_color):
+        h, w = shape[:2]
+        channels = shape[2] if len(shape) > 2 else 1
+        alpha_fill = 0.3
+        items = self._roi_items(roi_dict, w, h)
+        if not items:
+            return None
+
+        # fills and outlines are solid: a pixel takes the color of the last
+        # ROI drawn over it, so one index mask each is enough
+        colors = np.zeros((len(items) + 1, channels), dtype=np.uint8)
+        fill = np.zeros(shape, dtype=np.uint8)
+        fill_idx = np.zeros((h, w), dtype=np.uint8)
+        line_idx = np.zeros((h, w), dtype=np.uint16)
+        for k, (key, pts, color) in enumerate(items, 1):
+            colors[k] = (tuple(color) + (0,) * channels)[:channels]
+            cv2.fillPoly(fill, [pts], color=color)
+            cv2.fillPoly(fill_idx, [pts], color=1)
+            cv2.polylines(line_idx, [pts], isClosed=True, color=k, thickness=2)
+
+        # label pixels: replay outlines and labels in drawing order as
+        # per-pixel (channels, 256) tables, starting from the identity
+        labels = [self._label_lut(shape, key, self._roi_label_position(pts), font_size, font_thickness, font_color)
+                  for key, pts, color in items]
+        flat = np.unique(np.concatenate([ys * w + xs for ys, xs, lut in labels]))
+        tables = np.broadcast_to(np.arange(256, dtype=np.uint8), (len(flat), channels, 256)).copy()
+        if len(flat):
+            ly, lx = np.divmod(flat, w)
+            outline = np.zeros((h, w), dtype=np.uint8)
+            for k, ((key, pts, color), (ys, xs, lut)) in enumerate(zip(items, labels), 1):
+                cv2.polylines(outline, [pts], isClosed=True, color=1, thickness=2)
+                tables[outline[ly, lx] != 0] = colors[k][:, None]
+                cv2.polylines(outline, [pts], isClosed=True, color=0, thickness=2)
+                rows = np.searchsorted(flat, ys * w + xs)
+                tables[rows] = np.take_along_axis(lut, tables[rows], axis=2)
+        unchanged = (tables == np.arange(256, dtype=np.uint8)).all(axis=2)
+        labelled = ~unchanged.all(axis=1)
+        ly, lx = np.divmod(flat[labelled], w)
+
+        covered = (fill_idx != 0) | (line_idx != 0)
+        covered[ly, lx] = True
+        ys = np.flatnonzero(covered.any(axis=1))
+        xs = np.flatnonzero(covered.any(axis=0))
+        if not len(ys):
+            return None
+        y0, y1, x0, x1 = ys[0], ys[-1] + 1, xs[0], xs[-1] + 1
+        fill, fill_idx, line_idx, covered = (img[y0:y1, x0:x1] for img in (fill, fill_idx, line_idx, covered))
+        edge_mask = (line_idx != 0)
+        edge_mask[ly - y0, lx - x0] = True
+
+        filled_only = (fill_idx != 0) & ~edge_mask
+        fill_mask = filled_only.view(np.uint8) if filled_only.any() else None
+
+        edge_mask &= covered
+        edges = None
+        if edge_mask.any():
+            pixels = np.nonzero(edge_mask)
+            lines = line_idx[pixels]
+            overlay_const = np.repeat((fill_idx[pixels] != 0)[:, None], channels, axis=1)
+            drawn_const = np.repeat((lines != 0)[:, None], channels, axis=1)
+            drawn_value = colors[lines]
+
+            # label pixels take their value from the replayed tables instead
+            pos = (pixels[0] + y0) * w + pixels[1] + x0
+            rows = np.minimum(np.searchsorted(flat, pos), max(len(flat) - 1, 0))
+            in_label = np.flatnonzero(flat[rows] == pos) if len(flat) else rows[:0]
+            rows = rows[in_label]
+            table = tables[rows]
+            const = (table == table[..., :1]).all(axis=2)
+            drawn_const[in_label] = const
+            drawn_value[in_label] = table[..., 0]
+            antialiased = ~(const | unchanged[rows]).all(axis=1)
+            aa_rows, aa_lut = None, None
+            if antialiased.any():
+                aa_rows = in_label[antialiased]
+                aa_lut = table[antialiased]
+            edges = (pixels, overlay_const, fill[pixels].reshape(len(lines), channels), drawn_const, drawn_value, aa_rows, aa_lut)
+        if fill_mask is None:
+            fill = None
+        return (y0, y1, x0, x1), fill, fill_mask, alpha_fill, edges
+
+    def _label_lut(self, shape, text, position, font_size, font_thickness, font_color):
+        '''
+        The pixels a ROI label changes, as frame coordinates `ys, xs` and a
+        (n, channels, 256) table of their value for every background value.
+
+        Text rendering only depends on the position up to a translation, so
+        a label that fits in the frame is rendered once in a small buffer and
+        kept in `_label_luts` by text and font; moving the ROI reuses it.
+        Labels cut by the frame border are rendered in place.
+        '''
+        h, w = shape[:2]
+        channels = shape[2] if len(shape) > 2 else 1
+        (tw, th), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_size, font_thickness)
+        margin = 2 * font_thickness + 4
+        x, y = position
+        y0, y1, x0, x1 = y - th - margin, y + baseline + margin, x - margin, x + tw + margin
+        if y0 >= 0 and x0 >= 0 and y1 <= h and x1 <= w:
+            key = (text, font_size, font_thickness, tuple(font_color), channels)
+            entry = self._label_luts.get(key)
+            if entry is None:
+                if len(self._label_luts) >= self._LABEL_CACHE_SIZE:
+                    self._label_luts.clear()
+                ys, xs, lut = self._render_lut((y1 - y0, x1 - x0, channels), (0, y1 - y0, 0, x1 - x0), text,
+                                               (x - x0, y - y0), font_size, font_thickness, font_color)
+                entry = self._label_luts[key] = (ys - (y - y0), xs - (x - x0), lut)
+            ys, xs, lut = entry
+            return ys + y, xs + x, lut
+
+        y0, y1, x0, x1 = max(y0, 0), min(y1, h), max(x0, 0), min(x1, w)
+        if y0 >= y1 or x0 >= x1:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros((0, channels, 256), dtype=np.uint8)
+        ys, xs, lut = self._render_lut(shape, (y0, y1, x0, x1), text, position, font_size, font_thickness, font_color)
+        return ys + y0, xs + x0, lut
+
+    @staticmethod
+    def _render_lut(shape, box, text, position, font_size, font_thickness, font_color):
+        '''
+        Draw the label on every background value 0..255 inside `box` of a
+        `shape` buffer; returns the changed pixels (relative to the box) and
+        their (n, channels, 256) values.
 
-        if roi_dict:
-            for key, val in roi_dict.items():
-                color = self._get_color_roi(key)
-                if color is None:
-                    continue
-
-                alpha_fill = 0.3
-                np_val = np.array(val)
-                abs_val = np_val * [w, h]
-                abs_val = abs_val.astype(np.int32)
-                cv2.fillPoly(overlay, [abs_val], color=color)
-                cv2.polylines(draw_roi, [abs_val], isClosed=True, color=color, thickness=2)
-
-                M = cv2.moments(abs_val)
-                if M["m00"] != 0:
-                    cX = int(M["m10"] / M["m00"])
-                    cY = int(M["m01"] / M["m00"])
-                else:
-                    cX, cY = abs_val[0]
-
-                Drawer.text(draw_roi, key, (cX, cY), font_size, font_color, font_thickness)
-
-            cv2.addWeighted(overlay, alpha_fill, draw_roi, 1 - alpha_fill, 0, draw_roi)
-        return draw_roi
\ No newline at end of file
+        Antialiasing blends each channel with the same coverage, so a channel
+        only depends on its own background and text color: the label is drawn
+        on a 4-channel buffer holding 4 background values at once, once per
+        distinct channel color.
+        '''
+        y0, y1, x0, x1 = box
+        channels = shape[2] if len(shape) > 2 else 1
+        colors = (tuple(font_color) + (0,) * channels)[:channels]
+        buffer = np.empty(shape[:2] + (4,), dtype=np.uint8) # only the box is reset and read
+        backgrounds = np.arange(256, dtype=np.uint8).view(np.uint32) # 4 values per pixel
+        box = buffer.view(np.uint32)[y0:y1, x0:x1]
+        per_color = {}
+        for color in set(colors):
+            lut = np.empty((y1 - y0, x1 - x0, 256), dtype=np.uint8)
+            for value in range(0, 256, 4):
+                box[...] = backgrounds[value // 4]
+                Drawer.text(buffer, text, position, font_size, (color,) * 4, font_thickness)
+                lut[..., value:value + 4] = buffer[y0:y1, x0:x1]
+            per_color[color] = lut
+        lut = np.stack([per_color[color] for color in colors], axis=2)
+        ys, xs = np.nonzero((lut != np.arange(256, dtype=np.uint8)).any(axis=(2, 3)))
+        return ys, xs, lut[ys, xs]
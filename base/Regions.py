@@ -0,0 +1,131 @@
+import numpy as np
+from typing import Dict, Optional
+
+class CompiledRegions:
+    '''
+    Region configs (roi, roni, roi1, roni1, ...) compiled once into NumPy polygons.
+
+    Polygons are kept in normalized coordinates and scaled to absolute pixel
+    coordinates lazily, once per frame resolution.
+
+    Notes:
+        - keys containing "roni" are Regions Of No Interest (exclude detections)
+        - any other key containing "roi" is a Region Of Interest (keep detections)
+        - keys matching neither are kept for drawing only
+    '''
+    _MAX_CACHED_SIZES = 8
+
+    def __init__(self, regions:Optional[Dict]=None):
+        self.source = regions
+        self.keys = []
+        self.polygons = []
+        self.is_roi = np.zeros(0, dtype=bool)
+        self.is_roni = np.zeros(0, dtype=bool)
+        self._scaled = {}
+
+        if regions:
+            for key, val in regions.items():
+                self.keys.append(key)
+                self.polygons.append(np.asarray(val, dtype=np.float64).reshape(-1, 2))
+            self.is_roni = np.array(['roni' in k for k in self.keys], dtype=bool)
+            self.is_roi = np.array(['roi' in k for k in self.keys], dtype=bool) & ~self.is_roni
+
+    @property
+    def has_filter(self):
+        return bool(self.is_roi.any() or self.is_roni.any())
+
+    def scaled(self, w, h):
+        '''
+        Absolute (float) polygons for a frame of size (w, h), cached per resolution.
+        '''
+        size = (int(w), int(h))
+        polys = self._scaled.get(size)
+        if polys is None:
+            if len(self._scaled) >= self._MAX_CACHED_SIZES:
+                self._scaled.clear()
+            scale = np.array(size, dtype=np.float64)
+            polys = [p * scale for p in self.polygons]
+            self._scaled[size] = polys
+        return polys
+
+    @staticmethod
+    def signature(regions:Optional[Dict]):
+        '''
+        Hashable summary of a region config's content (keys and coordinates),
+        so caches notice dicts edited in place.
+        '''
+        if not regions:
+            return ()
+        return tuple((key, np.asarray(val, dtype=np.float64).tobytes()) for key, val in regions.items())
+
+    @staticmethod
+    def points_in_polygon(points, polygon):
+        '''
+        Vectorized even-odd (ray casting) test of (N, 2) points against one (K, 2) polygon.
+        Points on the boundary are outside, as with shapely's `Point.within`.
+
+        Returns:
+            np.ndarray: (N,) boolean mask.
+        '''
+        if len(polygon) < 3 or len(points) == 0:
+            return np.zeros(len(points), dtype=bool)
+        x = points[:, 0:1]
+        y = points[:, 1:2]
+        x1, y1 = polygon[:, 0], polygon[:, 1]
+        x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+
+        crosses = (y1 > y) != (y2 > y)
+        dy = np.where(y2 == y1, 1.0, y2 - y1)
+        x_cross = x1 + (y - y1) * (x2 - x1) / dy
+        hits = crosses & (x < x_cross)
+
+        # the ray test alone is half-open (left/bottom edges in, right/top out)
+        on_edge = (((x2 - x1) * (y - y1) == (y2 - y1) * (x - x1))
+                   & (np.minimum(x1, x2) <= x) & (x <= np.maximum(x1, x2))
+                   & (np.minimum(y1, y2) <= y) & (y <= np.maximum(y1, y2)))
+        return (np.count_nonzero(hits, axis=1) % 2).astype(bool) & ~on_edge.any(axis=1)
+
+    def membership(self, points, w, h):
+        '''
+        (N, R) boolean matrix: point n lies inside region r.
+        '''
+        polys = self.scaled(w, h)
+        out = np.zeros((len(points), len(polys)), dtype=bool)
+        for r, poly in enumerate(polys):
+            out[:, r] = self.points_in_polygon(points, poly)
+        return out
+
+    def filter_mask(self, points, w, h):
+        '''
+        (N,) boolean mask of points kept by the region config.
+
+        A point is kept if it lies inside at least one roi (or no roi is
+        configured) and inside none of the roni regions.
+        '''
+        keep = np.ones(len(points), dtype=bool)
+        if not self.has_filter or len(points) == 0:
+            return keep
+        polys = self.scaled(w, h)
+        if self.is_roi.any():
+            in_roi = np.zeros(len(points), dtype=bool)
+            for r in np.flatnonzero(self.is_roi):
+                in_roi |= self.points_in_polygon(points, polys[r])
+            keep &= in_roi
+        for r in np.flatnonzero(self.is_roni):
+            keep &= ~self.points_in_polygon(points, polys[r])
+        return keep
+
+    @staticmethod
+    def centers(points):
+        '''
+        Centers of (N, 2) points or (N, 4) / (N, 2, 2) boxes as an (N, 2) float array.
+        '''
+        arr = np.asarray(points, dtype=np.float64)
+        if len(arr) == 0:
+            return np.zeros((0, 2), dtype=np.float64)
+        arr = arr.reshape(len(arr), -1)
+        if arr.shape[1] == 4:
+            return (arr[:, :2] + arr[:, 2:]) / 2
+        if arr.shape[1] == 2:
+            return arr
+        raise ValueError(f"Unexpected point format: expected (N, 2) or (N, 4), got {arr.shape}")
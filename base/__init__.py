@@ -1,2 +1,8 @@
 from .Results import BaseResultsTracker
-from .Drawer import BaseDrawer
\ No newline at end of file
+from .Regions import CompiledRegions
+
+def __getattr__(name):
+    if name == 'BaseDrawer': # imports cv2 / norfair.drawing, only when drawing is used
+        from .Drawer import BaseDrawer
+        return BaseDrawer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,132 @@
+'''
+`norfairDevTrackedObject` vs. `CompactTrackedObject` (optionally with
+`KalmanFilterBankFactory`) on a high-churn synthetic stream.
+
+For every variant, the timing pass reports frame time (p50/p99/max), objects
+created, garbage collector runs per generation and total GC pause. A
+separate tracemalloc pass reports the memory peak and the memory held per
+live object.
+
+Usage (from the directory containing the package):
+    python -m ObjTracker.benchmarks.compact_objects --objects 500 --frames 300
+'''
+import argparse
+import gc
+import time
+import tracemalloc
+import numpy as np
+
+from ..tracker.norfairDev.compact import CompactTrackedObject
+from ..tracker.norfairDev.filter import KalmanFilterBankFactory
+from ..tracker.norfairDev.tracker import norfairDevTracker, norfairDevTrackedObject
+from .scene import SyntheticScene
+
+VARIANTS = {
+    'default': (norfairDevTrackedObject, False),
+    'default+bank': (norfairDevTrackedObject, True),
+    'compact': (CompactTrackedObject, False),
+    'compact+bank': (CompactTrackedObject, True),
+}
+
+def _make_tracker(variant, tracker_kwargs):
+    object_class, banked = VARIANTS[variant]
+    kwargs = dict(tracker_kwargs)
+    if banked:
+        kwargs['filter_factory'] = KalmanFilterBankFactory()
+    return norfairDevTracker(**kwargs).set_tracker(object_class)
+
+class _GCTimer:
+    '''
+    Collects the duration of every garbage collection through `gc.callbacks`.
+    '''
+    def __init__(self):
+        self.pauses = []
+        self.collections = [0, 0, 0]
+        self._t0 = None
+
+    def __call__(self, phase, info):
+        if phase == 'start':
+            self._t0 = time.perf_counter()
+        elif self._t0 is not None:
+            self.pauses.append(time.perf_counter() - self._t0)
+            self.collections[info['generation']] += 1
+            self._t0 = None
+
+    def __enter__(self):
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        gc.callbacks.remove(self)
+
+def run_variant(variant, frames, frame_shape, tracker_kwargs):
+    '''
+    Timing pass then tracemalloc pass of one variant over pre-generated detections.
+    '''
+    gc.collect()
+    tracker = _make_tracker(variant, tracker_kwargs)
+    times = []
+    with _GCTimer() as gc_timer:
+        for boxes, scores in frames:
+            t0 = time.perf_counter()
+            tracker.update_detections_batch(frame_shape, boxes, scores)
+            times.append(time.perf_counter() - t0)
+    times = np.asarray(times)
+    created = tracker._obj_factory.initializing_count
+
+    # memory pass
+    del tracker
+    gc.collect()
+    tracker = _make_tracker(variant, tracker_kwargs)
+    tracemalloc.start()
+    for boxes, scores in frames:
+        tracker.update_detections_batch(frame_shape, boxes, scores)
+    current, peak = tracemalloc.get_traced_memory()
+    live = len(tracker.tracked_objects)
+    # memory held by the tracked objects: drop them and measure what is freed
+    tracker.tracked_objects = []
+    gc.collect()
+    freed = current - tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return {
+        'variant': variant,
+        'p50_ms': float(np.percentile(times, 50)) * 1e3,
+        'p99_ms': float(np.percentile(times, 99)) * 1e3,
+        'max_ms': float(times.max()) * 1e3,
+        'objects_created': created,
+        'gc_collections': gc_timer.collections,
+        'gc_pause_ms': sum(gc_timer.pauses) * 1e3,
+        'gc_max_pause_ms': max(gc_timer.pauses, default=0.0) * 1e3,
+        'peak_mb': peak / 2**20,
+        'bytes_per_object': freed / live if live else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--objects', type=int, default=500)
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--miss-rate', type=float, default=0.3, help='detection drop rate (drives object churn)')
+    parser.add_argument('--occlusion', type=float, default=0.2)
+    parser.add_argument('--variants', nargs='+', default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scene = SyntheticScene(args.objects, occlusion=args.occlusion, miss_rate=args.miss_rate, seed=args.seed)
+    frames = [(boxes, scores) for boxes, scores, _ in scene.frames(args.frames)]
+    tracker_kwargs = dict(distance_function='euclidean', distance_threshold=50, hit_counter_max=4)
+
+    rows = []
+    print(f"{'variant':>14} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'created':>8} "
+          f"{'gc g0/g1/g2':>12} {'gc ms':>8} {'gc max':>8} {'peak MB':>8} {'B/object':>9}")
+    for variant in args.variants:
+        row = run_variant(variant, frames, scene.frame.shape, tracker_kwargs)
+        rows.append(row)
+        collections = '/'.join(str(c) for c in row['gc_collections'])
+        per_object = f"{row['bytes_per_object']:.0f}" if row['bytes_per_object'] is not None else '-'
+        print(f"{variant:>14} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['max_ms']:>8.2f} {row['objects_created']:>8} "
+              f"{collections:>12} {row['gc_pause_ms']:>8.2f} {row['gc_max_pause_ms']:>8.2f} {row['peak_mb']:>8.2f} {per_object:>9}")
+    return rows
+
+if __name__ == '__main__':
+    main()
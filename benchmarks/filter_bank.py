@@ -0,0 +1,78 @@
+'''
+Per-object Kalman filters vs. `KalmanFilterBankFactory`.
+
+Times one predict + update step for N objects with each approach and reports
+the object count from which the bank is faster.
+
+Usage (from the directory containing the package):
+    python -m ObjTracker.benchmarks.filter_bank --counts 1 5 10 50 100 500 1000
+'''
+import argparse
+import time
+import numpy as np
+from norfair.filter import OptimizedKalmanFilterFactory
+
+from ..tracker.norfairDev.filter import KalmanFilterBankFactory
+
+def _time_step(step, repeat):
+    step() # warm up
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        step()
+    return (time.perf_counter() - t0) / repeat
+
+def bench_filters(n, num_points=2, repeat=50, seed=0):
+    '''
+    Seconds per frame (predict + update of every object) for per-object filters and the bank.
+    '''
+    rng = np.random.default_rng(seed)
+    dim_z = num_points * 2
+    initial = rng.random((n, num_points, 2)) * 1000
+    z = initial.reshape(n, dim_z) + rng.normal(0, 1, (n, dim_z))
+    H = np.hstack([np.identity(dim_z), np.zeros((dim_z, dim_z))])
+    mask = np.ones(dim_z, dtype=bool)
+
+    per_object = [OptimizedKalmanFilterFactory().create_filter(p) for p in initial]
+    def per_object_step():
+        for f, zi in zip(per_object, z):
+            f.predict()
+            f.update(zi[:, None], None, H)
+
+    factory = KalmanFilterBankFactory(capacity=n)
+    banked = [factory.create_filter(p) for p in initial]
+    def bank_step():
+        factory.begin_step()
+        for f, zi in zip(banked, z):
+            f.predict()
+            f.update_masked(zi, mask)
+        factory.end_step()
+
+    return _time_step(per_object_step, repeat), _time_step(bank_step, repeat)
+
+def crossover(rows):
+    '''
+    Smallest object count from which the bank stays faster, or None.
+    '''
+    for i, (n, per_object, bank) in enumerate(rows):
+        if all(b < p for _, p, b in rows[i:]):
+            return n
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--counts', type=int, nargs='+', default=[1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000])
+    parser.add_argument('--points', type=int, default=2, help='points per object (1 = centers, 2 = boxes)')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    rows = []
+    print(f"{'objects':>8} {'per-object ms':>14} {'bank ms':>10} {'speedup':>8}")
+    for n in args.counts:
+        per_object, bank = bench_filters(n, args.points, args.repeat)
+        rows.append((n, per_object, bank))
+        print(f"{n:>8} {per_object * 1e3:>14.3f} {bank * 1e3:>10.3f} {per_object / bank:>7.2f}x")
+    print(f"crossover: bank faster from {crossover(rows)} objects")
+    return rows
+
+if __name__ == '__main__':
+    main()
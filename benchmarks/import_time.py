@@ -0,0 +1,104 @@
+'''
+Cold import cost of the tracker package for headless workers.
+
+Runs `python -X importtime -c "import <package>.tracker.norfairDev"` in fresh
+interpreters and parses the import-time log. It reports:
+- the total import time;
+- the part spent in norfair and its dependencies, which cannot be deferred
+  (norfair's `__init__` imports its drawing stack and cv2);
+- the part spent in this package;
+- the slowest modules by self time.
+
+It also checks that no module from `--forbid` was imported. These default to
+the drawing code and YAML, which headless workers should never load. The
+exit code is 1 when a forbidden module was imported or the package's own
+import time exceeds `--max-own-ms`.
+
+Usage (from the directory containing the package):
+    python -m ObjTracker.benchmarks.import_time --runs 5 --max-own-ms 50
+'''
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+import numpy as np
+
+PACKAGE = __package__.rsplit('.', 1)[0]
+ROOT = Path(__file__).resolve().parents[2] # directory containing the package
+FORBID = ('yaml', f'{PACKAGE}.base.Drawer', f'{PACKAGE}.tracker.norfairDev.drawer', 'multiprocessing', 'concurrent.futures')
+
+def parse_importtime(stderr):
+    '''
+    Rows of a `-X importtime` log as (module, self_us, cumulative_us, depth), in log order.
+    '''
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def measure(module, python=sys.executable):
+    '''
+    Import `module` in a fresh interpreter.
+
+    Returns:
+        dict: total, norfair (cumulative, with everything it imports) and own
+        (self time of this package's modules) times in ms, the imported module
+        names and the parsed rows.
+    '''
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(ROOT), os.environ.get('PYTHONPATH')])))
+    proc = subprocess.run([python, '-X', 'importtime', '-c', f'import {module}'],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    total = sum(self_us for _, self_us, _, _ in rows)
+
+    norfair = next((cumulative_us for name, _, cumulative_us, _ in rows if name == 'norfair'), 0)
+    own = sum(self_us for name, self_us, _, _ in rows if name == PACKAGE or name.startswith(PACKAGE + '.'))
+    return {
+        'total_ms': total / 1e3,
+        'norfair_ms': norfair / 1e3,
+        'own_ms': own / 1e3,
+        'modules': {name for name, _, _, _ in rows},
+        'rows': rows,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default=f'{PACKAGE}.tracker.norfairDev')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='slowest modules (self time) to list')
+    parser.add_argument('--forbid', nargs='*', default=list(FORBID), help='modules a headless import must not load')
+    parser.add_argument('--max-own-ms', type=float, default=None, help='budget for the package\'s own import time')
+    args = parser.parse_args(argv)
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    for key in ('total_ms', 'norfair_ms', 'own_ms'):
+        values = np.array([run[key] for run in runs])
+        print(f"{key:>11}: median {np.median(values):8.1f}  min {values.min():8.1f}  max {values.max():8.1f}")
+
+    last = runs[-1]['rows']
+    print(f"\nslowest modules (self time, last run):")
+    for name, self_us, cumulative_us, _ in sorted(last, key=lambda row: -row[1])[:args.top]:
+        print(f"  {self_us / 1e3:8.1f} ms  (cumulative {cumulative_us / 1e3:8.1f} ms)  {name}")
+
+    failed = False
+    loaded = sorted(m for m in args.forbid if m in runs[-1]['modules'])
+    if loaded:
+        print(f"\nFAIL: headless import loaded {loaded}")
+        failed = True
+    own = float(np.median([run['own_ms'] for run in runs]))
+    if args.max_own_ms is not None and own > args.max_own_ms:
+        print(f"\nFAIL: own import time {own:.1f} ms > {args.max_own_ms:.1f} ms")
+        failed = True
+    if not failed:
+        print("\nOK")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+'''
+Synthetic scenes for the benchmarks: boxes moving across a frame, with
+configurable density, occlusion and roi layout. Needs no model or video.
+'''
+import numpy as np
+
+ROI_LAYOUTS = ('none', 'single', 'grid', 'roni')
+
+def roi_layout(name):
+    '''
+    Normalized region config (`set_tracker(**regions)`) for a named layout.
+
+    - none: no filtering
+    - single: one roi over the central 80% of the frame
+    - grid: 3x3 roi tiles with gaps between them
+    - roni: one roi with a roni hole in the middle
+    '''
+    if name == 'none':
+        return {}
+    if name == 'single':
+        return {'roi': np.array([[0.1, 0.1], [0.9, 0.1], [0.9, 0.9], [0.1, 0.9]])}
+    if name == 'grid':
+        regions = {}
+        for i in range(3):
+            for j in range(3):
+                x0, y0 = 0.02 + j / 3, 0.02 + i / 3
+                x1, y1 = x0 + 0.29, y0 + 0.29
+                regions[f'roi{i * 3 + j}'] = np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+        return regions
+    if name == 'roni':
+        return {
+            'roi': np.array([[0.05, 0.05], [0.95, 0.05], [0.95, 0.95], [0.05, 0.95]]),
+            'roni': np.array([[0.4, 0.4], [0.6, 0.4], [0.6, 0.6], [0.4, 0.6]]),
+        }
+    raise ValueError(f"unknown roi layout {name!r}, expected one of {ROI_LAYOUTS}")
+
+class SyntheticScene:
+    '''
+    `num_objects` boxes with constant velocity and a little jitter, bouncing
+    off the frame borders.
+
+    Parameters:
+        num_objects: objects in the scene (detection density).
+        frame_size: (h, w) of the frame.
+        box_size: (min, max) box side in pixels.
+        speed: standard deviation of the per-frame velocity, in pixels.
+        occlusion: fraction of the frame width covered by a vertical occluder
+            in the middle; boxes whose center is behind it are not detected.
+        miss_rate: probability that a visible object is not detected in a frame.
+        jitter: standard deviation of the box noise, in pixels.
+        seed: random seed; the same parameters give the same detections.
+    '''
+    def __init__(self,
+                 num_objects=100,
+                 frame_size=(720, 1280),
+                 box_size=(20, 60),
+                 speed=3.0,
+                 occlusion=0.0,
+                 miss_rate=0.0,
+                 jitter=1.0,
+                 seed=0):
+        self.num_objects = num_objects
+        self.frame_size = tuple(frame_size)
+        self.occlusion = occlusion
+        self.miss_rate = miss_rate
+        self.jitter = jitter
+        self._rng = np.random.default_rng(seed)
+        h, w = self.frame_size
+        self._size = self._rng.uniform(*box_size, (num_objects, 2))
+        self._centers = self._rng.uniform([0, 0], [w, h], (num_objects, 2))
+        self._velocity = self._rng.normal(0, speed, (num_objects, 2))
+        self._frame = None
+
+    @property
+    def frame(self):
+        '''
+        Blank frame of `frame_size` (shared between calls, do not draw into it).
+        '''
+        if self._frame is None:
+            self._frame = np.zeros((*self.frame_size, 3), dtype=np.uint8)
+        return self._frame
+
+    def step(self):
+        '''
+        Advance one frame.
+
+        Returns:
+            tuple: (boxes (M, 4) float64, scores (M,), ids (M,)) of the detected
+            objects, ids being the ground truth index of each box.
+        '''
+        h, w = self.frame_size
+        self._centers += self._velocity
+        for axis, limit in ((0, w), (1, h)):
+            low = self._centers[:, axis] < 0
+            high = self._centers[:, axis] > limit
+            self._velocity[low | high, axis] *= -1
+            self._centers[:, axis] = np.clip(self._centers[:, axis], 0, limit)
+
+        visible = np.ones(self.num_objects, dtype=bool)
+        if self.occlusion > 0:
+            half = self.occlusion * w / 2
+            visible &= np.abs(self._centers[:, 0] - w / 2) > half
+        if self.miss_rate > 0:
+            visible &= self._rng.random(self.num_objects) >= self.miss_rate
+
+        ids = np.flatnonzero(visible)
+        centers = self._centers[ids] + self._rng.normal(0, self.jitter, (len(ids), 2))
+        half_size = self._size[ids] / 2
+        boxes = np.hstack([centers - half_size, centers + half_size])
+        scores = self._rng.uniform(0.5, 1.0, len(ids))
+        return boxes, scores, ids
+
+    def frames(self, n):
+        '''
+        Yield `(boxes, scores, ids)` for `n` frames.
+        '''
+        for _ in range(n):
+            yield self.step()
@@ -0,0 +1,196 @@
+'''
+Hot-path benchmarks on synthetic scenes.
+
+Times `update_detections` (end to end), `_preprocess_update_input` (roi
+filter), `_update_tracker_results` and `norfairDrawer.draw_tracker_results`
+separately. It reports p50/p99 latency and fps per stage and the tracemalloc
+peak per case. Results can be saved as a JSON baseline and compared against
+a previous one. The exit code is 1 when a stage got slower than the tolerance.
+
+Usage (from the directory containing the package):
+    python -m ObjTracker.benchmarks.suite --save baseline.json
+    python -m ObjTracker.benchmarks.suite --compare baseline.json --tolerance 0.2
+'''
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+import numpy as np
+import norfair
+
+from ..tracker.norfairDev.tracker import norfairDevTracker
+from .scene import ROI_LAYOUTS, SyntheticScene, roi_layout
+
+STAGES = ('update_detections', '_preprocess_update_input', '_update_tracker_results', 'draw_tracker_results')
+
+def _timed(func, samples):
+    def wrapper(*args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - t0)
+    return wrapper
+
+def _summary(samples):
+    samples = np.asarray(samples)
+    if not len(samples):
+        return None
+    p50 = float(np.percentile(samples, 50))
+    return {
+        'p50_ms': p50 * 1e3,
+        'p99_ms': float(np.percentile(samples, 99)) * 1e3,
+        'mean_ms': float(samples.mean()) * 1e3,
+        'fps': 1 / p50 if p50 > 0 else None,
+    }
+
+def _make_tracker(layout, tracker_kwargs):
+    return norfairDevTracker(**tracker_kwargs).set_tracker(**roi_layout(layout))
+
+def case_name(objects, frame_size, layout, occlusion):
+    return f"n{objects}_{frame_size[0]}x{frame_size[1]}_{layout}_occ{occlusion:g}"
+
+def run_case(objects,
+             frame_size=(720, 1280),
+             layout='single',
+             occlusion=0.0,
+             frames=100,
+             warmup=10,
+             draw=True,
+             tracker_kwargs=None,
+             seed=0):
+    '''
+    Benchmark one scene configuration.
+
+    Returns:
+        dict: per-stage latency summary (`stages`) and tracemalloc peak
+        (`peak_memory_kib`, measured in a separate pass so it does not skew timings).
+    '''
+    tracker_kwargs = tracker_kwargs or dict(distance_function='euclidean', distance_threshold=50)
+
+    samples = {stage: [] for stage in STAGES}
+    tracker = _make_tracker(layout, tracker_kwargs)
+    # instance attributes shadow the methods, so the tracker calls the timed versions
+    tracker._preprocess_update_input = _timed(tracker._preprocess_update_input, samples['_preprocess_update_input'])
+    tracker._update_tracker_results = _timed(tracker._update_tracker_results, samples['_update_tracker_results'])
+    scene = SyntheticScene(objects, frame_size, occlusion=occlusion, seed=seed)
+    frame = scene.frame
+
+    for i, (boxes, scores, _) in enumerate(scene.frames(warmup + frames)):
+        if i == warmup:
+            for stage_samples in samples.values():
+                stage_samples.clear()
+        t0 = time.perf_counter()
+        results = tracker.update_detections(frame, boxes, scores)
+        samples['update_detections'].append(time.perf_counter() - t0)
+        if draw:
+            t0 = time.perf_counter()
+            tracker.Drawer.draw_tracker_results(frame, results)
+            samples['draw_tracker_results'].append(time.perf_counter() - t0)
+
+    tracker = _make_tracker(layout, tracker_kwargs)
+    scene = SyntheticScene(objects, frame_size, occlusion=occlusion, seed=seed)
+    tracemalloc.start()
+    try:
+        for boxes, scores, _ in scene.frames(min(frames, warmup + 20)):
+            results = tracker.update_detections(frame, boxes, scores)
+            if draw:
+                tracker.Drawer.draw_tracker_results(frame, results)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'objects': objects,
+        'frame_size': list(frame_size),
+        'layout': layout,
+        'occlusion': occlusion,
+        'frames': frames,
+        'stages': {stage: _summary(s) for stage, s in samples.items()},
+        'peak_memory_kib': peak / 1024,
+    }
+
+def run_suite(counts, frame_sizes, layouts, occlusions, frames, warmup, draw=True, tracker_kwargs=None, log=print):
+    cases = {}
+    for frame_size in frame_sizes:
+        for layout in layouts:
+            for occlusion in occlusions:
+                for n in counts:
+                    name = case_name(n, frame_size, layout, occlusion)
+                    cases[name] = result = run_case(n, frame_size, layout, occlusion, frames, warmup, draw, tracker_kwargs)
+                    if log:
+                        update = result['stages']['update_detections']
+                        log(f"{name:<36} update p50 {update['p50_ms']:8.3f} ms  p99 {update['p99_ms']:8.3f} ms"
+                            f"  {update['fps']:8.1f} fps  peak {result['peak_memory_kib']:9.1f} KiB")
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'norfair': getattr(norfair, '__version__', None),
+            'platform': platform.platform(),
+        },
+        'cases': cases,
+    }
+
+def compare(current, baseline, tolerance=0.2, metric='p50_ms'):
+    '''
+    Stages whose `metric` grew by more than `tolerance` (relative) since the baseline.
+
+    Returns:
+        list: (case, stage, baseline value, current value) per regression.
+    '''
+    regressions = []
+    for name, case in current['cases'].items():
+        base_case = baseline['cases'].get(name)
+        if base_case is None:
+            continue
+        for stage, summary in case['stages'].items():
+            base = base_case['stages'].get(stage)
+            if not summary or not base:
+                continue
+            if summary[metric] > base[metric] * (1 + tolerance):
+                regressions.append((name, stage, base[metric], summary[metric]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 50, 100, 500, 1000, 2000])
+    parser.add_argument('--frame-sizes', nargs='+', default=['720x1280'], help='HxW, e.g. 1080x1920')
+    parser.add_argument('--layouts', nargs='+', default=['single'], choices=ROI_LAYOUTS)
+    parser.add_argument('--occlusions', type=float, nargs='+', default=[0.0])
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--no-draw', action='store_true')
+    parser.add_argument('--distance', default='euclidean')
+    parser.add_argument('--threshold', type=float, default=50)
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative p50 slowdown')
+    args = parser.parse_args(argv)
+
+    frame_sizes = [tuple(int(v) for v in size.lower().split('x')) for size in args.frame_sizes]
+    results = run_suite(args.counts, frame_sizes, args.layouts, args.occlusions,
+                        args.frames, args.warmup, not args.no_draw,
+                        dict(distance_function=args.distance, distance_threshold=args.threshold))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for name, stage, base, current in regressions:
+            print(f"REGRESSION {name} {stage}: {base:.3f} ms -> {current:.3f} ms")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.compare}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
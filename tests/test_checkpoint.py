@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from ..tracker.norfairDev import norfairDevTracker, KalmanFilterBankFactory
+from ..benchmarks.scene import SyntheticScene, roi_layout
+
+def make_tracker(filter_factory=None):
+    return norfairDevTracker('euclidean', 50, filter_factory=filter_factory).set_tracker(**roi_layout('roni'))
+
+@pytest.mark.parametrize('save_bank,load_bank', [(False, False), (True, False), (False, True), (True, True)])
+def test_round_trip(tmp_path, save_bank, load_bank):
+    scene = SyntheticScene(80, miss_rate=0.1, seed=6)
+    frames = list(scene.frames(40))
+    path = str(tmp_path / 'tracker.ckpt')
+
+    original = make_tracker(KalmanFilterBankFactory() if save_bank else None)
+    for boxes, scores, _ in frames[:20]:
+        original.update_detections_batch(scene.frame, boxes, scores)
+    original.save_checkpoint(path)
+
+    restored = make_tracker(KalmanFilterBankFactory() if load_bank else None)
+    restored.load_checkpoint(path)
+    assert [obj.id for obj in restored.tracked_objects] == [obj.id for obj in original.tracked_objects]
+
+    for boxes, scores, _ in frames[20:]:
+        expected = original.update_detections_batch(scene.frame, boxes, scores)
+        results = restored.update_detections_batch(scene.frame, boxes, scores)
+        assert results.ids == expected.ids
+        if len(expected.ids):
+            np.testing.assert_allclose(results.estimate_array, expected.estimate_array, atol=1e-6)
+
+def reid_stream(frames=26, seed=0):
+    '''
+    Three objects with distinct embeddings; the third one is gone on frames
+    10-17 and comes back far from where it left, so only Re-ID can match it.
+    '''
+    rng = np.random.default_rng(seed)
+    embeddings = rng.normal(size=(3, 16))
+    centers = np.array([[300., 200.], [500., 300.], [100., 100.]])
+    for t in range(frames):
+        rows = [0, 1] + ([2] if t < 10 or t >= 18 else [])
+        boxes, vectors = [], []
+        for row in rows:
+            center = centers[row] + ([0, 250] if row == 2 and t >= 18 else 0)
+            boxes.append([*(center - 15), *(center + 15)])
+            vectors.append(embeddings[row] + rng.normal(scale=0.05, size=16))
+        yield np.array(boxes), np.ones(len(rows)), np.array(vectors)
+
+def make_reid_tracker():
+    return norfairDevTracker('euclidean', 50, hit_counter_max=3, initialization_delay=1,
+                             reid_hit_counter_max=30).set_tracker().set_reid_gallery(reid_distance_threshold=0.3)
+
+def test_round_trip_keeps_reid_gallery(tmp_path):
+    path = str(tmp_path / 'tracker.ckpt')
+    frames = list(reid_stream())
+    original = make_reid_tracker()
+    for boxes, scores, embeddings in frames[:15]: # the third object waits in the Re-ID pool
+        original.update_detections_batch((480, 640), boxes, scores, embeddings=embeddings)
+    original.save_checkpoint(path)
+
+    restored = make_reid_tracker().load_checkpoint(path)
+    assert len(restored.gallery) == len(original.gallery)
+    for boxes, scores, embeddings in frames[15:]:
+        expected = original.update_detections_batch((480, 640), boxes, scores, embeddings=embeddings)
+        results = restored.update_detections_batch((480, 640), boxes, scores, embeddings=embeddings)
+        assert results.ids == expected.ids
+    assert results.ids == [1, 2, 3] # re-identified after the restart
@@ -0,0 +1,34 @@
+import numpy as np
+from norfair.filter import OptimizedKalmanFilterFactory
+
+from ..tracker.norfairDev import norfairDevTracker, KalmanFilterBankFactory
+from ..benchmarks.scene import SyntheticScene
+
+def run(filter_factory, frames, shape, reverse=False):
+    tracker = norfairDevTracker('euclidean', 50, filter_factory=filter_factory).set_tracker()
+    out = []
+    for boxes, scores, _ in frames:
+        if reverse:
+            boxes, scores = boxes[::-1], scores[::-1]
+        results = tracker.update_detections_batch(shape, boxes, scores)
+        out.append((results.ids, results.estimate_array))
+    return tracker, out
+
+def test_bank_matches_optimized_filter():
+    scene = SyntheticScene(60, seed=2, miss_rate=0.2)
+    frames = list(scene.frames(30))
+    _, bank = run(KalmanFilterBankFactory(), frames, scene.frame.shape)
+    _, reference = run(OptimizedKalmanFilterFactory(), frames, scene.frame.shape)
+    for (ids, estimate), (ref_ids, ref_estimate) in zip(bank, reference):
+        assert ids == ref_ids
+        if len(ref_ids):
+            np.testing.assert_allclose(estimate, ref_estimate, atol=1e-6)
+
+def test_shared_bank_factory_is_copied():
+    scene = SyntheticScene(30, seed=3, miss_rate=0.1)
+    frames = list(scene.frames(20))
+    shared = KalmanFilterBankFactory()
+    first, _ = run(shared, frames, scene.frame.shape)
+    second, _ = run(shared, frames, scene.frame.shape, reverse=True)
+    assert first.filter_factory is shared
+    assert second.filter_factory is not shared
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from norfair.distances import ScalarDistance, VectorizedDistance
+
+from ..tracker.norfairDev import norfairDevTracker, GatedDistance
+from ..benchmarks.scene import SyntheticScene
+
+# mean_euclidean is evaluated pair by pair, euclidean as one cdist per block
+@pytest.mark.parametrize('distance, kind', [('mean_euclidean', ScalarDistance), ('euclidean', VectorizedDistance)])
+def test_gated_matches_ungated(distance, kind):
+    scene = SyntheticScene(150, frame_size=(720, 1280), seed=8, miss_rate=0.1)
+    frames = list(scene.frames(12))
+    gated = norfairDevTracker(distance, 40, gate_radius=40).set_tracker()
+    plain = norfairDevTracker(distance, 40).set_tracker()
+    assert isinstance(gated.distance_function, GatedDistance)
+    assert isinstance(gated.distance_function.distance, kind)
+
+    evaluated = pruned = 0
+    for boxes, scores, _ in frames:
+        expected = plain.update_detections_batch(scene.frame, boxes, scores)
+        results = gated.update_detections_batch(scene.frame, boxes, scores)
+        assert results.ids == expected.ids
+        if len(expected.ids):
+            np.testing.assert_array_equal(results.estimate_array, expected.estimate_array)
+        evaluated += results.gating_pairs_evaluated or 0
+        pruned += results.gating_pairs_pruned or 0
+
+    assert len(expected.ids) > 100
+    assert evaluated > 0
+    assert pruned > evaluated # most pairs never reach the distance function
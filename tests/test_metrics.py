@@ -0,0 +1,47 @@
+import numpy as np
+
+from ..tracker.norfairDev import norfairDevTracker, CallbackSink
+
+SHAPE = (480, 640)
+BOX = np.array([[100., 100., 140., 140.]])
+
+def run(tracker, schedule, gauge='objects_dead'):
+    '''
+    One box, present on the frames where `schedule` is True. Returns one gauge
+    per frame; objects_active is also checked against `get_active_objects`.
+    '''
+    frames = []
+    tracker.set_metrics(CallbackSink(frames.append))
+    for present in schedule:
+        tracker.update_detections_batch(SHAPE, BOX if present else np.zeros((0, 4)), np.ones(int(present)))
+        assert frames[-1]['gauges']['objects_active'] == len(tracker.get_active_objects())
+    return [frame['gauges'][gauge] for frame in frames]
+
+def make_tracker(**kwargs):
+    return norfairDevTracker('euclidean', 50, hit_counter_max=3, initialization_delay=1, **kwargs).set_tracker()
+
+def test_dead_without_reid():
+    dead = run(make_tracker(), [True] * 5 + [False] * 10)
+    assert sum(dead) == 1
+
+def test_reid_merge_is_not_dead():
+    reid = dict(reid_distance_function=lambda obj, candidate: 0.0, reid_distance_threshold=1, reid_hit_counter_max=20)
+    tracker = make_tracker(**reid)
+    dead = run(tracker, [True] * 5 + [False] * 8 + [True] * 5)
+    assert sum(dead) == 0
+    assert len(tracker.tracked_objects) == 1 # merged back, not a new object
+
+    # gone for longer than reid_hit_counter_max: it leaves the Re-ID pool once
+    dead = run(make_tracker(**reid), [True] * 5 + [False] * 40)
+    assert sum(dead) == 1
+
+def test_reid_pool_gauge():
+    reid = dict(reid_distance_function=lambda obj, candidate: 0.0, reid_distance_threshold=1, reid_hit_counter_max=20)
+    schedule = [True] * 5 + [False] * 8 + [True] * 5
+    pool = run(make_tracker(**reid), schedule, 'objects_reid_pool')
+    active = run(make_tracker(**reid), schedule, 'objects_active')
+    assert max(pool) == 1 and pool[-1] == 0
+    for in_pool, n_active in zip(pool, active):
+        assert in_pool + n_active <= 1 # never both in the pool and active
+    assert active[-1] == 1
+    assert run(make_tracker(), schedule, 'objects_reid_pool') == [0] * len(schedule)
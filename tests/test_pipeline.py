@@ -0,0 +1,60 @@
+import time
+import numpy as np
+import pytest
+
+from ..tracker.norfairDev import norfairDevTracker, TrackingPipeline, StubDetector
+
+ROI = {'roi_a': np.array([[0.1, 0.1], [0.9, 0.1], [0.9, 0.9], [0.1, 0.9]])}
+
+def make_tracker():
+    return norfairDevTracker(distance_function='euclidean', distance_threshold=50).set_tracker(**ROI).set_trajectories(16)
+
+@pytest.fixture
+def frames():
+    return [np.zeros((240, 320, 3), np.uint8) for _ in range(40)]
+
+def test_order_and_results_match_sequential(frames):
+    tracker = make_tracker()
+    pipeline = TrackingPipeline(tracker, StubDetector(15), drawer=tracker.Drawer, queue_size=2,
+                                draw_kwargs=dict(draw_trails=True, trail_length=8))
+    out = list(pipeline.run(frames))
+    assert [index for index, _, _ in out] == list(range(len(frames)))
+
+    reference, detector = make_tracker(), StubDetector(15)
+    for (index, image, results), frame in zip(out, frames):
+        expected = reference.update_detections_batch(frame, **detector(frame))
+        assert results.ids == expected.ids, index
+        # trails are a snapshot of this frame, not the live store of a later one
+        np.testing.assert_array_equal(results.trails, reference.trajectories.last(expected.ids_array, 8))
+
+    report = pipeline.report()
+    assert report['track']['count'] == len(frames)
+    assert report['end_to_end']['count'] == len(frames)
+
+def test_drop_frames_keeps_order(frames):
+    class SlowDetector(StubDetector):
+        def __call__(self, frame):
+            time.sleep(0.005)
+            return super().__call__(frame)
+
+    pipeline = TrackingPipeline(make_tracker(), SlowDetector(5), queue_size=1, drop_frames=True)
+    indices = [index for index, _, _ in pipeline.run(frames)]
+    assert indices == sorted(indices)
+    assert len(indices) + pipeline.stats['decode'].dropped == len(frames)
+
+def test_stage_error_is_raised(frames):
+    def detector(frame):
+        raise ValueError('boom')
+
+    pipeline = TrackingPipeline(make_tracker(), detector)
+    with pytest.raises(RuntimeError, match="'detect'") as info:
+        list(pipeline.run(frames))
+    assert isinstance(info.value.__cause__, ValueError)
+
+def test_abandoned_run_stops_threads(frames):
+    pipeline = TrackingPipeline(make_tracker(), StubDetector(5), queue_size=1)
+    run = pipeline.run(frames)
+    next(run)
+    t0 = time.perf_counter()
+    run.close()
+    assert time.perf_counter() - t0 < 2
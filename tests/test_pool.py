@@ -0,0 +1,71 @@
+import os
+import signal
+import time
+import numpy as np
+import pytest
+
+from ..tracker.norfairDev import TrackerPool, norfairDevTracker
+from ..benchmarks.scene import SyntheticScene
+
+TRACKER_KWARGS = dict(distance_function='euclidean', distance_threshold=50)
+
+def test_results_match_in_process_trackers():
+    roi = {'roi': np.array([[0.05, 0.05], [0.95, 0.05], [0.95, 0.95], [0.05, 0.95]])}
+    scenes = {'a': SyntheticScene(40, seed=1, miss_rate=0.1), 'b': SyntheticScene(25, seed=2, miss_rate=0.1)}
+    streams = {stream_id: list(scene.frames(15)) for stream_id, scene in scenes.items()}
+    shape = scenes['a'].frame.shape
+
+    received = {stream_id: [] for stream_id in streams}
+    with TrackerPool(num_workers=2, queue_size=2) as pool:
+        for stream_id in streams:
+            pool.add_stream(stream_id, TRACKER_KWARGS, **roi)
+        # submit everything before reading: workers run the next update while results are queued
+        for index in range(15):
+            for stream_id, frames in streams.items():
+                boxes, scores, _ = frames[index]
+                pool.submit(stream_id, {'shape': shape, 'index': index}, boxes=boxes, scores=scores)
+        for _ in range(30):
+            stream_id, frame_meta, results = pool.get(timeout=30)
+            received[stream_id].append((frame_meta['index'], results))
+
+    for stream_id, frames in streams.items():
+        assert [index for index, _ in received[stream_id]] == list(range(15))
+        reference = norfairDevTracker(**TRACKER_KWARGS).set_tracker(**roi)
+        for (index, results), (boxes, scores, _) in zip(received[stream_id], frames):
+            expected = reference.update_detections_batch(shape, boxes, scores)
+            assert results.ids == expected.ids, (stream_id, index)
+            np.testing.assert_array_equal(results.boxes_array, expected.boxes_array)
+            np.testing.assert_array_equal(results.estimate_array, expected.estimate_array)
+            assert results.roi.keys() == roi.keys()
+            assert results.trajectories is None
+
+def test_close_without_get():
+    pool = TrackerPool(num_workers=2, queue_size=4)
+    pool.add_stream('a', TRACKER_KWARGS)
+    pool.add_stream('b', TRACKER_KWARGS)
+    for i in range(40):
+        pool.submit('a' if i % 2 else 'b', {'shape': (480, 640)}, boxes=np.random.rand(10, 4) * 400)
+    t0 = time.monotonic()
+    pool.close()
+    assert time.monotonic() - t0 < pool.join_timeout
+    assert not any(process.is_alive() for process, _, _, _ in pool._workers)
+
+def test_close_after_exception():
+    with pytest.raises(KeyError):
+        with TrackerPool(num_workers=1) as pool:
+            pool.add_stream('a', TRACKER_KWARGS)
+            pool.submit('a', {'shape': (480, 640)}, boxes=np.random.rand(5, 4) * 400)
+            raise KeyError('x')
+    assert not pool._workers[0][0].is_alive()
+
+def test_dead_worker_raises():
+    pool = TrackerPool(num_workers=1)
+    pool.add_stream('a', TRACKER_KWARGS)
+    process = pool._workers[0][0]
+    os.kill(process.pid, signal.SIGKILL)
+    process.join(5)
+    with pytest.raises(RuntimeError):
+        pool.get(timeout=5)
+    with pytest.raises(RuntimeError):
+        pool.submit('a', {'shape': (480, 640)}, boxes=np.zeros((1, 4)))
+    pool.close()
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from ..tracker.norfairDev import norfairDevTracker, DetectionPrefilter
+from ..benchmarks.scene import SyntheticScene
+
+LABELS = np.array(['person', 'car', 'bike'])
+
+def box(x, y, size=10):
+    return [x, y, x + size, y + size]
+
+def test_filter_steps():
+    boxes = np.array([box(0, 0), box(1, 0), box(0, 0), box(50, 50), box(100, 100),
+                      box(200, 200), box(300, 300), box(400, 400)], dtype=np.float64)
+    scores = np.array([0.9, 0.8, 0.85, 0.2, 0.5, 0.6, 0.35, 0.45])
+    labels = ['person', 'person', 'car', 'person', 'person', 'person', 'truck', 'truck']
+    prefilter = DetectionPrefilter({'person': 0.3, 'truck': 0.4}, min_score=0.1,
+                                   iou_threshold=0.7, max_per_label={'person': 2})
+    keep, dropped = prefilter.filter(boxes, scores, labels)
+    # 1 duplicates 0 (IoU 0.82), not 2 (other label); 3 and 6 are below their
+    # label's threshold; 4 is the third person left
+    np.testing.assert_array_equal(keep, [True, False, True, False, False, True, False, True])
+    assert dropped == {'score': 2, 'duplicate': 1, 'cap': 1}
+
+def test_int_labels_match_string_keys():
+    boxes = np.array([box(0, 0), box(50, 0), box(100, 0), box(150, 0)], dtype=np.float64)
+    scores = np.array([0.5, 0.5, 0.2, 0.9])
+    labels = np.array([1, 2, 2, 1])
+    for score_thresholds, caps in [({'2': 0.3}, {'1': 1}), ({2: 0.3}, {1: 1})]:
+        keep, dropped = DetectionPrefilter(score_thresholds, max_per_label=caps).filter(boxes, scores, labels)
+        np.testing.assert_array_equal(keep, [False, True, False, True])
+        assert dropped == {'score': 1, 'duplicate': 0, 'cap': 1}
+
+def test_cap_keeps_best_scores_per_label():
+    boxes = np.array([box(60 * i, 0) for i in range(7)], dtype=np.float64)
+    labels = ['a', 'b', 'a', 'a', 'b', 'b', 'b']
+    scores = np.array([0.1, 0.9, 0.7, 0.8, 0.2, 0.5, 0.95])
+    keep, dropped = DetectionPrefilter(max_per_label=2).filter(boxes, scores, labels)
+    np.testing.assert_array_equal(keep, [False, True, True, True, False, False, True])
+    assert dropped['cap'] == 3
+    # without scores the earlier detections win
+    keep, _ = DetectionPrefilter(max_per_label=2).filter(boxes, None, labels)
+    np.testing.assert_array_equal(keep, [True, True, True, False, True, False, False])
+
+def test_detections_dropped_on_results():
+    tracker = norfairDevTracker('euclidean', 50).set_tracker().set_prefilter(min_score=0.5, iou_threshold=0.5)
+    boxes = np.array([box(0, 0), box(1, 1), box(100, 100), box(200, 200)], dtype=np.float64)
+    results = tracker.update_detections_batch((480, 640), boxes, np.array([0.9, 0.8, 0.3, 0.7]))
+    assert results.detections_dropped == {'score': 1, 'duplicate': 1, 'cap': 0}
+    assert tracker.predict().detections_dropped == {}
+
+def labeled_stream(frames=40, seed=4):
+    '''
+    A dense scene where every object has a label and an embedding; one
+    object in three is missed on a frame, so Re-ID has work to do.
+    '''
+    scene = SyntheticScene(60, seed=seed, miss_rate=0.3, occlusion=0.2)
+    embeddings = np.random.default_rng(seed).normal(size=(60, 8))
+    for boxes, scores, ids in scene.frames(frames):
+        yield scene.frame.shape, boxes, scores, LABELS[ids % 3], embeddings[ids]
+
+def make_tracker(reid, partition_labels):
+    kwargs = dict(hit_counter_max=4, initialization_delay=1, reid_hit_counter_max=20) if reid else {}
+    tracker = norfairDevTracker('euclidean', 60, **kwargs).set_tracker()
+    if reid:
+        tracker.set_reid_gallery(reid_distance_threshold=0.3)
+    return tracker.set_prefilter(min_score=0.0, partition_labels=partition_labels)
+
+@pytest.mark.parametrize('reid', [False, True])
+def test_partition_labels_keeps_matches(reid):
+    frames = list(labeled_stream())
+    partitioned, joint = make_tracker(reid, True), make_tracker(reid, False)
+    for shape, boxes, scores, labels, embeddings in frames:
+        kwargs = dict(labels=labels, embeddings=embeddings if reid else None)
+        expected = joint.update_detections_batch(shape, boxes, scores, **kwargs)
+        results = partitioned.update_detections_batch(shape, boxes, scores, **kwargs)
+        assert results.ids == expected.ids
+        if len(expected.ids):
+            np.testing.assert_array_equal(results.estimate_array, expected.estimate_array)
+    assert len(expected.ids) > 20
+    assert [o.id for o in partitioned.tracked_objects] == [o.id for o in joint.tracked_objects]
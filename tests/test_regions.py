@@ -0,0 +1,53 @@
+import numpy as np
+
+from ..base.Regions import CompiledRegions
+
+SQUARE = np.array([[0., 0.], [10., 0.], [10., 10.], [0., 10.]])
+
+def inside(points, polygon):
+    return CompiledRegions.points_in_polygon(np.array(points, dtype=np.float64), polygon).tolist()
+
+def test_points_inside_outside_and_on_edge():
+    assert inside([[5, 5], [0.01, 9.99], [9.99, 0.01]], SQUARE) == [True] * 3
+    assert inside([[-1, 5], [11, 5], [5, -0.01], [5, 10.5], [20, 20]], SQUARE) == [False] * 5
+    # every edge and vertex is outside, not only the right/top ones
+    edges = [[0, 5], [10, 5], [5, 0], [5, 10], [0, 0], [10, 0], [10, 10], [0, 10]]
+    assert inside(edges, SQUARE) == [False] * len(edges)
+
+def test_diagonal_edge_and_concave_polygon():
+    triangle = np.array([[0., 0.], [10., 0.], [0., 10.]])
+    assert inside([[2, 2], [5, 5], [6, 6]], triangle) == [True, False, False]
+    l_shape = np.array([[0., 0.], [10., 0.], [10., 4.], [4., 4.], [4., 10.], [0., 10.]])
+    assert inside([[2, 8], [8, 2], [8, 8], [4, 6]], l_shape) == [True, True, False, False]
+
+def test_degenerate_polygon_keeps_nothing():
+    assert inside([[0, 0], [1, 1]], np.array([[0., 0.], [2., 2.]])) == [False, False]
+
+W, H = 200, 100
+
+def kept(regions, points):
+    return CompiledRegions(regions).filter_mask(np.array(points, dtype=np.float64), W, H).tolist()
+
+def box(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+def test_empty_config_keeps_everything():
+    points = [[10, 10], [150, 90], [-5, 300]]
+    for regions in (None, {}, {'zone': box(0, 0, 0.5, 0.5)}): # zone is drawn only
+        assert not CompiledRegions(regions).has_filter
+        assert kept(regions, points) == [True] * 3
+    assert CompiledRegions({}).filter_mask(np.zeros((0, 2)), W, H).shape == (0,)
+
+def test_several_rois_are_or_ed():
+    regions = {'roi': box(0, 0, 0.25, 0.5), 'roi2': box(0.5, 0.5, 1, 1)}
+    # normalized coordinates are scaled by (W, H)
+    assert kept(regions, [[20, 20], [150, 80], [150, 20], [20, 80], [50, 30]]) == [True, True, False, False, False]
+
+def test_roi_minus_roni():
+    regions = {'roi': box(0.1, 0.1, 0.9, 0.9), 'roni': box(0.4, 0.4, 0.6, 0.6)}
+    # [80, 40] is a corner of the roni, so not inside it
+    assert kept(regions, [[40, 20], [100, 50], [5, 5], [80, 40]]) == [True, False, False, True]
+
+def test_roni_only():
+    regions = {'roni': box(0.4, 0.4, 0.6, 0.6), 'roni1': box(0, 0, 0.1, 0.1)}
+    assert kept(regions, [[100, 50], [5, 5], [150, 80], [80, 50]]) == [False, False, True, True] # [80, 50]: roni edge
@@ -0,0 +1,73 @@
+import numpy as np
+
+from ..tracker.norfairDev import EmbeddingGallery, GalleryReidDistance
+
+def unit(*values):
+    v = np.array(values, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+def test_similarity_is_best_pair_and_unknown_is_minus_inf():
+    gallery = EmbeddingGallery(per_track=2, capacity=4)
+    gallery.add(['a', 'b'], [[1, 0], [0, 1]])
+    gallery.add(['a'], [[1, 1]])
+    sims = gallery.similarity(['a', 'b', 'x'], ['a', 'b'])
+    np.testing.assert_allclose(sims[:2], [[1, unit(1, 1)[1]], [unit(1, 1)[1], 1]], rtol=1e-6)
+    assert np.isneginf(sims[2]).all()
+    assert len(gallery.get('a')) == 2
+
+def test_ring_buffer_keeps_last_per_track():
+    gallery = EmbeddingGallery(per_track=2, capacity=2)
+    for v in ([1, 0, 0], [0, 1, 0], [0, 0, 1]):
+        gallery.add(['a'], [v])
+    stored = {tuple(row) for row in gallery.get('a').tolist()}
+    assert stored == {(0, 1, 0), (0, 0, 1)}
+
+def test_full_gallery_evicts_least_recently_updated():
+    gallery = EmbeddingGallery(per_track=1, capacity=2)
+    gallery.add(['a'], [[1, 0]])
+    gallery.step()
+    gallery.add(['b'], [[0, 1]])
+    gallery.step()
+    gallery.add(['a'], [[1, 0]]) # a is now the most recent
+    gallery.step()
+    gallery.add(['c'], [[1, 1]])
+    assert 'b' not in gallery and 'a' in gallery and 'c' in gallery
+    assert gallery.evicted == 1
+
+def test_max_age_and_prune():
+    gallery = EmbeddingGallery(per_track=1, capacity=4, max_age=2)
+    gallery.add(['a', 'b'], [[1, 0], [0, 1]])
+    for _ in range(2):
+        gallery.step()
+        gallery.add(['b'], [[0, 1]])
+        gallery.prune()
+    assert 'a' in gallery
+    gallery.step()
+    gallery.prune()
+    assert 'a' not in gallery and 'b' in gallery
+    gallery.prune(alive_keys={'c'})
+    assert len(gallery) == 0
+
+def test_state_round_trip():
+    gallery = EmbeddingGallery(per_track=2, capacity=3, max_age=5)
+    gallery.add(['a', 'b', 'c'], np.eye(3))
+    free_slot = gallery.slot_of['b']
+    gallery.release('b')
+    restored = EmbeddingGallery().load_state(gallery.state())
+    np.testing.assert_array_equal(restored.similarity(['a', 'c'], ['a', 'c']), gallery.similarity(['a', 'c'], ['a', 'c']))
+    restored.add(['d'], [[1, 1, 0]]) # reuses the free slot of b
+    assert restored.slot_of['d'] == free_slot
+    assert (restored.capacity, restored.per_track, restored.max_age) == (3, 2, 5)
+
+def test_distance_label_mismatch_is_inf():
+    class Obj:
+        def __init__(self, key, label):
+            self.initializing_id, self.label = key, label
+
+    gallery = EmbeddingGallery(per_track=1, capacity=4)
+    gallery.add([1, 2, 3], [[1, 0], [1, 0], [0, 1]])
+    distance = GalleryReidDistance(gallery)
+    matrix = distance.get_distances([Obj(2, 'car'), Obj(3, 'person')], [Obj(1, 'car'), Obj(9, 'car')])
+    np.testing.assert_allclose(matrix[0, 0], 0, atol=1e-6) # same embedding, same label
+    assert np.isinf(matrix[0, 1]) # label mismatch
+    assert np.isinf(matrix[1]).all() # unknown candidate
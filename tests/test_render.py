@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from ..tracker.norfairDev import norfairDevTracker, norfairDrawer, SharedFrameRing, RenderOffload
+from ..benchmarks.scene import SyntheticScene
+
+SHAPE = (240, 320, 3)
+
+def test_roi_edited_in_place_is_resent():
+    scene = SyntheticScene(10, frame_size=SHAPE[:2], seed=0)
+    detections = list(scene.frames(2))
+    roi = {'roi_a': [[0.1, 0.1], [0.6, 0.1], [0.6, 0.6], [0.1, 0.6]]}
+    tracker = norfairDevTracker('euclidean', 50).set_tracker(**roi)
+    drawer = norfairDrawer()
+    drawer.color_mapping_keys = tracker.color_mapping_keys
+
+    ring = SharedFrameRing(SHAPE, slots=2)
+    try:
+        with RenderOffload(ring, hold_frames=True, color_mapping_keys=tracker.color_mapping_keys) as render:
+            for (index, slot), (boxes, scores, _) in zip(ring.feed([np.zeros(SHAPE, np.uint8)] * 2), detections):
+                results = tracker.update_detections_batch(ring.shape, boxes, scores)
+                if index == 1:
+                    results.roi['roi_a'][1][0] = 0.9 # same dict, new content
+                expected = drawer.draw_tracker_results(np.zeros(SHAPE, np.uint8), results)
+                render.submit(slot, results)
+                assert render.get(timeout=30) == (index, slot)
+                np.testing.assert_array_equal(ring.frame(slot), expected)
+                ring.release(slot)
+        assert render.stats['frames'] == 2
+        with pytest.raises(EOFError):
+            render.get(timeout=1)
+    finally:
+        ring.close()
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from ..base.Drawer import BaseDrawer
+from ..benchmarks.scene import roi_layout
+
+def frames(shape, count=2, seed=0):
+    # noise, so the antialiased label pixels see every background value
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(count)]
+
+def edge_layout():
+    return {
+        'roi_corner': np.array([[0.0, 0.0], [0.03, 0.0], [0.03, 0.03], [0.0, 0.03]]), # label cut by the border
+        'roi_a': np.array([[0.3, 0.3], [0.7, 0.3], [0.7, 0.7], [0.3, 0.7]]),
+        'roni_a': np.array([[0.35, 0.35], [0.65, 0.35], [0.65, 0.65], [0.35, 0.65]]), # same label spot
+        'roi_line': np.array([[0.1, 0.8], [0.2, 0.85], [0.3, 0.9]]), # zero area
+        'zone': np.array([[0.8, 0.1], [0.9, 0.1], [0.9, 0.2]]), # no color, not drawn
+    }
+
+@pytest.mark.parametrize('shape', [(240, 320, 3), (720, 1280, 3)])
+@pytest.mark.parametrize('layout', ['single', 'grid', 'roni', 'edges'])
+def test_cached_overlay_matches_full_render(layout, shape):
+    roi = edge_layout() if layout == 'edges' else roi_layout(layout)
+    drawer = BaseDrawer()
+    for frame in frames(shape):
+        expected = drawer._draw_roi_full(frame, roi)
+        np.testing.assert_array_equal(drawer._draw_roi(frame, roi), expected)
+        assert drawer._roi_layer is not None
+
+def test_cached_overlay_follows_edits():
+    shape = (360, 640, 3)
+    roi = roi_layout('grid')
+    drawer = BaseDrawer()
+    steps = [
+        lambda: None,
+        lambda: roi['roi4'].__setitem__((1, 0), 0.95), # moved in place
+        lambda: roi.__setitem__('roni_new', np.array([[0.5, 0.5], [0.8, 0.5], [0.8, 0.8]])),
+        lambda: roi.pop('roi0'),
+        lambda: setattr(drawer, 'color_mapping_keys', {'roi': (255, 0, 255), 'roni': (0, 128, 255)}),
+    ]
+    for step, frame in zip(steps, frames(shape, len(steps))):
+        step()
+        np.testing.assert_array_equal(drawer._draw_roi(frame, roi), drawer._draw_roi_full(frame, roi))
+
+def test_font_color_channels():
+    roi = roi_layout('grid')
+    drawer = BaseDrawer()
+    for frame, color in zip(frames((240, 320, 3), 2), [(0, 200, 255), (10, 10, 90)]):
+        expected = drawer._draw_roi_full(frame, roi, font_color=color)
+        np.testing.assert_array_equal(drawer._draw_roi(frame, roi, font_color=color), expected)
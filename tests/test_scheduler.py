@@ -0,0 +1,31 @@
+import numpy as np
+
+from ..tracker.norfairDev import norfairDevTracker, DetectionScheduler
+
+SHAPE = (480, 640)
+BOX = np.array([[100., 100., 140., 140.]])
+
+def make_tracker():
+    return norfairDevTracker('euclidean', 50, hit_counter_max=10, initialization_delay=1).set_tracker()
+
+def test_empty_detector_output_is_a_detection_frame():
+    present = [True] * 4 + [False] * 3 + [True] * 2 + [False] * 4
+    scheduler = DetectionScheduler(make_tracker(), min_interval=1, max_interval=1)
+    reference = make_tracker()
+    for frame, seen in enumerate(present):
+        scheduler.step(SHAPE, lambda shape: {'boxes': BOX} if seen else {})
+        reference.update_detections_batch(SHAPE, BOX if seen else np.zeros((0, 4)))
+        assert [obj.hit_counter for obj in scheduler.tracker.tracked_objects] == \
+               [obj.hit_counter for obj in reference.tracked_objects], frame
+    assert scheduler.detections_run == scheduler.frames == len(present)
+
+def test_skipped_frames_are_predicted():
+    scheduler = DetectionScheduler(make_tracker(), min_interval=3, max_interval=3)
+    calls = []
+    def detector(shape):
+        calls.append(scheduler.frames)
+        return {'boxes': BOX}
+    for _ in range(7):
+        scheduler.step(SHAPE, detector)
+    assert calls == [0, 3, 6]
+    assert scheduler.detections_run == 3
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from ..tracker.norfairDev import norfairDevTracker
+from ..tracker.norfairDev.tiled import TiledTracker, tile_grid
+from ..utils.utils import ColumnarData
+
+FRAME = (480, 1280)
+TRACKER_KWARGS = dict(distance_function='euclidean', distance_threshold=40, initialization_delay=2)
+
+def crossing_stream(frames=120):
+    '''
+    Object 0 crosses the seam between the two tiles (and their overlap) left to
+    right, object 1 right to left on another row; object 2 stays in the left tile.
+    '''
+    starts = np.array([[60., 100.], [1220., 300.], [200., 400.]])
+    velocity = np.array([[9., 0.], [-9., 0.5], [0., 0.]])
+    for t in range(frames):
+        centers = starts + velocity * t
+        yield np.hstack([centers - 12, centers + 12])
+
+@pytest.mark.parametrize('num_workers', [1, 2])
+def test_ids_survive_tile_seam(num_workers):
+    tiled = TiledTracker(TRACKER_KWARGS, tile_size=(480, 720), overlap=160, num_workers=num_workers).set_tracker()
+    single = norfairDevTracker(**TRACKER_KWARGS).set_tracker()
+    assert len(tile_grid(FRAME, tiled.tile_size, tiled.overlap)) == 2
+
+    ids_tiled, ids_single, owner = [], [], {} # owner: box -> object (boxes never repeat across objects)
+    for boxes in crossing_stream():
+        data = ColumnarData(box_coords=boxes)
+        owner.update((tuple(box), i) for i, box in enumerate(boxes.tolist()))
+        results = tiled.update_detections_batch(FRAME, boxes, data=data)
+        expected = single.update_detections_batch(FRAME, boxes, data=data)
+        # merged results are in frame coordinates: boxes are the frame boxes given
+        for box, points, det_data in zip(results.boxes_array, results.last_det_points, results.last_det_data):
+            assert tuple(box) in owner
+            np.testing.assert_array_equal(np.reshape(points, -1), box)
+            np.testing.assert_array_equal(det_data['box_coords'], box)
+        ids_tiled.append({owner[tuple(box)]: idx for idx, box in zip(results.ids, results.boxes_array.tolist())})
+        ids_single.append({owner[tuple(box)]: idx for idx, box in zip(expected.ids, expected.boxes_array.tolist())})
+    tiled.close()
+
+    for ids in (ids_tiled, ids_single):
+        for obj in range(3):
+            seen = {frame_ids[obj] for frame_ids in ids if obj in frame_ids}
+            assert len(seen) == 1, (obj, seen) # one id from start to end
+    # object 0 went through the seam and was reported on both sides
+    assert ids_tiled[20].get(0) == ids_tiled[-1].get(0) is not None
+    # same objects reported as by the untiled tracker, once tracks are up (its results lag one frame)
+    assert [sorted(f) for f in ids_tiled[5:-1]] == [sorted(f) for f in ids_single[6:]]
+
+def test_points_with_box_coords_match_single_tracker():
+    tiled = TiledTracker(TRACKER_KWARGS, tile_size=(480, 720), overlap=160, num_workers=1).set_tracker()
+    single = norfairDevTracker(**TRACKER_KWARGS).set_tracker()
+
+    def columns(results):
+        order = np.argsort(results.boxes_array[:, 0], kind='stable')
+        points = np.array([np.reshape(p, -1) for p in results.last_det_points]).reshape(-1, 2)
+        return results.boxes_array[order], points[order]
+
+    out_tiled, out_single = [], []
+    for boxes in crossing_stream(30):
+        centers = boxes.reshape(-1, 2, 2).mean(axis=1) # points, boxes only in data
+        data = ColumnarData(box_coords=boxes)
+        out_tiled.append(columns(tiled.update_detections_batch(FRAME, centers, data=data)))
+        out_single.append(columns(single.update_detections_batch(FRAME, centers, data=data)))
+    tiled.close()
+
+    # once tracks are up; a single tracker's results describe the previous frame
+    for (boxes, points), (expected_boxes, expected_points) in zip(out_tiled[4:-1], out_single[5:]):
+        np.testing.assert_array_equal(boxes, expected_boxes)
+        np.testing.assert_array_equal(points, expected_points)
@@ -1,7 +1,14 @@
-from ..base.Drawer import BaseDrawer
 from ..base.Results import BaseResultsTracker
+from ..base.Regions import CompiledRegions
+
+def __getattr__(name):
+    if name == 'BaseDrawer': # imports cv2 / norfair.drawing, only when drawing is used
+        from ..base.Drawer import BaseDrawer
+        return BaseDrawer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'BaseDrawer',
     'BaseResultsTracker',
-]
\ No newline at end of file
+    'CompiledRegions',
+]
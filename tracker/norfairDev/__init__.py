@@ -1,10 +1,74 @@
+import importlib
+
 from .tracker import norfairDevTracker, norfairDevTrackedObject
-from .drawer import norfairDrawer
 from .results import norfairResults
+from .filter import KalmanFilterBankFactory
+from .gating import GatedDistance
+from .zones import ZoneAnalytics
+from .trajectory import TrajectoryStore
+from .tracklog import TrackLogWriter, TrackLogReader
+from .reid import EmbeddingGallery, GalleryReidDistance
+from .prefilter import DetectionPrefilter
+from .replay import DetectionLogWriter, DetectionLog, replay, sweep
+from .metrics import MetricsSink, HistogramSink, PrometheusTextSink, CallbackSink
+
+# imported on first access: drawing (cv2), multiprocessing and thread pools
+# are not needed by headless workers
+_LAZY = {
+    'norfairDrawer': '.drawer',
+    'TrackerPool': '.pool',
+    'TrackingPipeline': '.pipeline',
+    'StubDetector': '.pipeline',
+    'TiledTracker': '.tiled',
+    'CompactTrackedObject': '.compact',
+    'TrackedObjectArena': '.compact',
+    'DetectionScheduler': '.scheduler',
+    'SharedFrameRing': '.render',
+    'RenderOffload': '.render',
+    'VideoSink': '.render',
+}
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
 __all__ = [
     'norfairDevTracker',
     'norfairDevTrackedObject',
     'norfairDrawer',
     'norfairResults',
-]
\ No newline at end of file
+    'KalmanFilterBankFactory',
+    'GatedDistance',
+    'TrackerPool',
+    'TrackingPipeline',
+    'StubDetector',
+    'ZoneAnalytics',
+    'TrajectoryStore',
+    'TrackLogWriter',
+    'TrackLogReader',
+    'TiledTracker',
+    'EmbeddingGallery',
+    'GalleryReidDistance',
+    'DetectionPrefilter',
+    'CompactTrackedObject',
+    'TrackedObjectArena',
+    'DetectionScheduler',
+    'SharedFrameRing',
+    'RenderOffload',
+    'VideoSink',
+    'DetectionLogWriter',
+    'DetectionLog',
+    'replay',
+    'sweep',
+    'MetricsSink',
+    'HistogramSink',
+    'PrometheusTextSink',
+    'CallbackSink',
+]
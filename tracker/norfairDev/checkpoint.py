@@ -0,0 +1,259 @@
+import copy
+import importlib
+import os
+import pickle
+import threading
+from norfair.filter import OptimizedKalmanFilter
+from norfair.tracker import _TrackedObjectFactory, Detection
+import numpy as np
+
+from ...utils.utils import DataRow
+from .filter import BankedKalmanFilter, KalmanFilterBankFactory
+
+CHECKPOINT_VERSION = 1
+
+def _class_path(cls):
+    return (cls.__module__, cls.__qualname__)
+
+def _import_class(path, _cache={}):
+    cls = _cache.get(path)
+    if cls is None:
+        module, qualname = path
+        cls = importlib.import_module(module)
+        for name in qualname.split('.'):
+            cls = getattr(cls, name)
+        _cache[path] = cls
+    return cls
+
+def _slot_names(cls):
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get('__slots__', ())
+        names.extend([slots] if isinstance(slots, str) else slots)
+    return [n for n in names if n not in ('__dict__', '__weakref__')]
+
+def _pack(records):
+    '''
+    Columnar encoding of a list of dicts: records are grouped by key set and
+    every field whose values are ndarrays of one shape/dtype is stacked into
+    a single array (copied), other fields are kept as lists. Much smaller and
+    faster to pickle than one small array per object.
+    '''
+    groups = {}
+    for i, record in enumerate(records):
+        groups.setdefault(tuple(record), []).append(i)
+    packed = []
+    for keys, rows in groups.items():
+        columns = {}
+        for key in keys:
+            values = [records[i][key] for i in rows]
+            first = values[0]
+            if isinstance(first, np.ndarray) and all(
+                isinstance(v, np.ndarray) and v.shape == first.shape and v.dtype == first.dtype for v in values
+            ):
+                columns[key] = ('stack', np.stack(values))
+            else:
+                columns[key] = ('list', [v.copy() if isinstance(v, np.ndarray) else v for v in values])
+        packed.append((rows, columns))
+    return len(records), packed
+
+def _unpack(packed):
+    n, groups = packed
+    records = [None] * n
+    for rows, columns in groups:
+        group = [{} for _ in rows]
+        for key, (kind, values) in columns.items():
+            for record, value in zip(group, values.copy() if kind == 'stack' else values):
+                record[key] = value
+        for i, record in zip(rows, group):
+            records[i] = record
+    return records
+
+def _filter_state(f):
+    '''
+    Kalman state in one layout for both per-object and banked filters, so a
+    checkpoint can be restored with either filter factory.
+    '''
+    if isinstance(f, BankedKalmanFilter):
+        bank = f.bank
+        bank.flush()
+        return {
+            'kind': 'kalman',
+            'x': bank.x[f.slot],
+            'pos_variance': bank.pos_variance[f.slot],
+            'pos_vel_covariance': bank.pos_vel_covariance[f.slot],
+            'vel_variance': bank.vel_variance[f.slot],
+            'q': bank.Q,
+            'r': bank.R,
+        }
+    if isinstance(f, OptimizedKalmanFilter):
+        return {
+            'kind': 'kalman',
+            'x': f.x,
+            'pos_variance': f.pos_variance.ravel(),
+            'pos_vel_covariance': f.pos_vel_covariance.ravel(),
+            'vel_variance': f.vel_variance.ravel(),
+            'q': f.q_Q,
+            'r': float(f.default_r.ravel()[0]),
+        }
+    return {'kind': 'object', 'filter': copy.deepcopy(f)}
+
+def _restore_filter(values, filter_factory):
+    if values['kind'] == 'object':
+        return values['filter']
+    dim_z = len(values['pos_variance'])
+    if isinstance(filter_factory, KalmanFilterBankFactory):
+        f = filter_factory.create_filter(values['x'][:dim_z, 0])
+        bank = f.bank
+        bank.x[f.slot] = values['x']
+        bank.pos_variance[f.slot] = values['pos_variance']
+        bank.pos_vel_covariance[f.slot] = values['pos_vel_covariance']
+        bank.vel_variance[f.slot] = values['vel_variance']
+        return f
+    f = OptimizedKalmanFilter.__new__(OptimizedKalmanFilter)
+    f.dim_z = dim_z
+    f.x = values['x']
+    f.pos_variance = values['pos_variance'].reshape(dim_z, 1)
+    f.pos_vel_covariance = values['pos_vel_covariance'].reshape(dim_z, 1)
+    f.vel_variance = values['vel_variance'].reshape(dim_z, 1)
+    f.q_Q = values['q']
+    f.default_r = values['r'] * np.ones((dim_z, 1))
+    return f
+
+def _detection_record(det):
+    record = dict(det.__dict__)
+    if isinstance(record.get('data'), DataRow): # do not drag the whole batch columns along
+        record['data'] = record['data'].to_dict()
+    return record
+
+def _object_record(obj, detection_index, detections):
+    record = dict(getattr(obj, '__dict__', {}))
+    for name in _slot_names(type(obj)):
+        if hasattr(obj, name):
+            record[name] = getattr(obj, name)
+    for name in getattr(type(obj), '_ARENA_FIELDS', ()): # CompactTrackedObject: fields stored in the arena
+        value = getattr(obj, name)
+        record[name] = value.copy() if isinstance(value, np.ndarray) else value
+    for name in ('_obj_factory', 'filter', '_arena', '_slot', '_num_points'):
+        record.pop(name, None)
+
+    def index_of(det): # detections shared between last_detection and past_detections stay shared
+        key = id(det)
+        i = detection_index.get(key)
+        if i is None:
+            i = detection_index[key] = len(detections)
+            detections.append(_detection_record(det))
+        return i
+    record['last_detection'] = index_of(obj.last_detection)
+    record['past_detections'] = [index_of(d) for d in obj.past_detections]
+    return record
+
+def snapshot(tracker):
+    '''
+    Copy of the full tracker state (objects, filter states, hit counters, id
+    counters, roi config, Re-ID gallery) that is independent of the live tracker, so it can
+    be serialized from another thread. Per-object fields are packed into
+    columns (see `_pack`).
+    '''
+    factory = tracker._obj_factory
+    object_class = getattr(factory, 'object_class', None)
+    results = tracker.Results
+    detection_index, detections = {}, []
+    objects = tracker.tracked_objects
+    return {
+        'version': CHECKPOINT_VERSION,
+        'config': dict(tracker._config),
+        'roi': dict(results.roi) if results.roi is not None else None,
+        'color_mapping_keys': dict(tracker.color_mapping_keys),
+        'object_class': _class_path(object_class) if object_class is not None else None,
+        'count': factory.count,
+        'initializing_count': factory.initializing_count,
+        'global_count': _TrackedObjectFactory.global_count,
+        'frame_count': tracker.frame_count,
+        'results': {
+            'ids_array': None if results.ids_array is None else results.ids_array.copy(),
+            'hit_counter_array': None if results.hit_counter_array is None else results.hit_counter_array.copy(),
+        },
+        'classes': [_class_path(type(obj)) for obj in objects],
+        'objects': _pack([_object_record(obj, detection_index, detections) for obj in objects]),
+        'filters': _pack([_filter_state(obj.filter) for obj in objects]),
+        'detections': _pack(detections),
+        'gallery': tracker.gallery.state() if tracker.gallery is not None else None,
+    }
+
+def restore(tracker, state):
+    '''
+    Load a `snapshot` into `tracker` (built with compatible distance
+    functions). Tracked objects are re-created as their original classes,
+    without running their `__init__`, and attached to the tracker's factory.
+    A saved Re-ID gallery is loaded into the tracker's gallery (attached with
+    `set_reid_gallery` first if the tracker has none).
+    '''
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"unsupported checkpoint version {state.get('version')}")
+
+    if state['object_class'] is not None:
+        tracker.set_tracker(_import_class(tuple(state['object_class'])), state['color_mapping_keys'], **(state['roi'] or {}))
+    else: # set_tracker was never called: plain norfair objects
+        tracker._obj_factory = _TrackedObjectFactory()
+        tracker.Results.roi = state['roi']
+    factory = tracker._obj_factory
+    factory.count = state['count']
+    factory.initializing_count = state['initializing_count']
+    _TrackedObjectFactory.global_count = max(_TrackedObjectFactory.global_count, state['global_count'])
+
+    detections = []
+    for record in _unpack(state['detections']):
+        det = Detection.__new__(Detection)
+        det.__dict__.update(record)
+        detections.append(det)
+
+    objects = []
+    filter_factory = tracker.filter_factory
+    for class_path, record, filter_state in zip(state['classes'], _unpack(state['objects']), _unpack(state['filters'])):
+        cls = _import_class(tuple(class_path))
+        obj = cls.__new__(cls)
+        record['last_detection'] = detections[record['last_detection']]
+        record['past_detections'] = [detections[i] for i in record['past_detections']]
+        record['filter'] = _restore_filter(filter_state, filter_factory)
+        record['_obj_factory'] = factory
+        if getattr(cls, '_ARENA_FIELDS', None):
+            obj._attach(factory, record['num_points'])
+        if hasattr(obj, '__dict__') and not _slot_names(cls):
+            obj.__dict__.update(record)
+        else:
+            for key, value in record.items():
+                setattr(obj, key, value)
+        objects.append(obj)
+    tracker.tracked_objects = objects
+    tracker.frame_count = state['frame_count']
+    tracker.Results.ids_array = state['results']['ids_array']
+    tracker.Results.hit_counter_array = state['results']['hit_counter_array']
+    gallery = state.get('gallery') # absent in checkpoints written before the gallery was saved
+    if gallery is not None:
+        if tracker.gallery is None:
+            tracker.set_reid_gallery(gallery['per_track'], gallery['capacity'], gallery['max_age'])
+        tracker.gallery.load_state(gallery)
+    return tracker
+
+def write_snapshot(state, path):
+    '''
+    Pickle a snapshot to `path` atomically (temp file + rename).
+    '''
+    path = str(path)
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+def read_snapshot(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def write_snapshot_async(state, path):
+    '''
+    `write_snapshot` from a background thread; returns the thread.
+    '''
+    thread = threading.Thread(target=write_snapshot, args=(state, path), daemon=True)
+    thread.start()
+    return thread
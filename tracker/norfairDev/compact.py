@@ -0,0 +1,172 @@
+import numpy as np
+
+from .tracker import norfairDevTrackedObject
+
+class TrackedObjectArena:
+    '''
+    Preallocated structure-of-arrays storage for the hot per-object fields of
+    `CompactTrackedObject` (hit counter, age, per-point hit counters and
+    detected flags). One arena is shared by all objects of a tracker (it
+    lives on the tracker's object factory); rows are recycled from a free
+    list when objects die, and the arrays double when they run out of rows.
+
+    Parameters:
+        capacity: initial number of rows.
+        max_points: initial number of points per row (widened on demand).
+    '''
+    def __init__(self, capacity=1024, max_points=2):
+        self.hit_counter = np.zeros(0, dtype=np.int64)
+        self.age = np.zeros(0, dtype=np.int64)
+        self.point_hit_counter = np.zeros((0, max_points), dtype=np.int64)
+        self.detected = np.zeros((0, max_points), dtype=bool)
+        self.active = np.zeros(0, dtype=bool)
+        self._free = []
+        self._grow(capacity)
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def _grow(self, capacity):
+        old = len(self.active)
+        if capacity <= old:
+            return
+        extra = capacity - old
+        width = self.point_hit_counter.shape[1]
+        self.hit_counter = np.concatenate([self.hit_counter, np.zeros(extra, dtype=np.int64)])
+        self.age = np.concatenate([self.age, np.zeros(extra, dtype=np.int64)])
+        self.point_hit_counter = np.concatenate([self.point_hit_counter, np.zeros((extra, width), dtype=np.int64)])
+        self.detected = np.concatenate([self.detected, np.zeros((extra, width), dtype=bool)])
+        self.active = np.concatenate([self.active, np.zeros(extra, dtype=bool)])
+        self._free.extend(range(capacity - 1, old - 1, -1))
+
+    def _widen(self, num_points):
+        extra = num_points - self.point_hit_counter.shape[1]
+        if extra > 0:
+            rows = len(self.active)
+            self.point_hit_counter = np.hstack([self.point_hit_counter, np.zeros((rows, extra), dtype=np.int64)])
+            self.detected = np.hstack([self.detected, np.zeros((rows, extra), dtype=bool)])
+
+    def allocate(self, num_points):
+        self._widen(num_points)
+        if not self._free:
+            self._grow(max(2 * len(self.active), 1))
+        slot = self._free.pop()
+        self.hit_counter[slot] = 0
+        self.age[slot] = 0
+        self.point_hit_counter[slot] = 0
+        self.detected[slot] = False
+        self.active[slot] = True
+        return slot
+
+    def release(self, slot):
+        if self.active[slot]:
+            self.active[slot] = False
+            self._free.append(slot)
+
+class CompactTrackedObject(norfairDevTrackedObject):
+    '''
+    Lightweight tracked object for streams that create many short-lived
+    objects: the attributes set by norfair's `TrackedObject` are `__slots__`
+    and the hot fields live in the factory's shared `TrackedObjectArena`, so
+    an object allocates no per-instance dict entries and no per-object
+    counter arrays, and its row is recycled when it is garbage collected.
+
+    Pair with `KalmanFilterBankFactory` to also keep the filter state in a
+    shared arena, and a small `past_detections_length` to release old
+    detections (and their data) early.
+
+    Example:
+        tracker = norfairDevTracker('euclidean', 50, filter_factory=KalmanFilterBankFactory())
+        tracker.set_tracker(CompactTrackedObject, roi=roi)
+
+    Notes:
+        - `point_hit_counter` / `detected_at_least_once_points` return views
+          into the arena; do not keep them across tracker updates (the arena
+          may be reallocated when it grows).
+        - norfair's `TrackedObject` has no `__slots__`, so instances still
+          carry a `__dict__` for custom attributes; it stays empty otherwise.
+    '''
+    __slots__ = (
+        '_arena', '_slot', '_num_points',
+        '_obj_factory', 'dim_points', 'num_points', 'dim_z',
+        'hit_counter_max', 'pointwise_hit_counter_max', 'initialization_delay',
+        'detection_threshold', 'initial_period', 'reid_hit_counter_max', 'reid_hit_counter',
+        'last_distance', 'current_min_distance', 'last_detection', 'is_initializing',
+        'initializing_id', 'id', 'global_id', 'past_detections_length', 'past_detections',
+        'filter', 'label', 'abs_to_rel',
+    )
+    _ARENA_FIELDS = ('hit_counter', 'age', 'point_hit_counter', 'detected_at_least_once_points')
+
+    def __init__(self,
+                 obj_factory,
+                 initial_detection,
+                 hit_counter_max,
+                 initialization_delay,
+                 pointwise_hit_counter_max,
+                 detection_threshold,
+                 period,
+                 filter_factory,
+                 past_detections_length,
+                 reid_hit_counter_max,
+                 coord_transformations = None):
+        self._attach(obj_factory, np.shape(initial_detection.absolute_points)[0])
+        super().__init__(obj_factory,
+                         initial_detection,
+                         hit_counter_max,
+                         initialization_delay,
+                         pointwise_hit_counter_max,
+                         detection_threshold,
+                         period,
+                         filter_factory,
+                         past_detections_length,
+                         reid_hit_counter_max,
+                         coord_transformations)
+
+    def _attach(self, obj_factory, num_points):
+        '''
+        Take a row of the factory's arena (created on first use).
+        '''
+        arena = getattr(obj_factory, 'arena', None)
+        if arena is None:
+            arena = obj_factory.arena = TrackedObjectArena()
+        self._arena = arena
+        self._slot = arena.allocate(num_points)
+        self._num_points = num_points
+
+    def __del__(self):
+        try:
+            self._arena.release(self._slot)
+        except Exception: # never attached, or interpreter shutdown
+            pass
+
+    @property
+    def hit_counter(self):
+        return int(self._arena.hit_counter[self._slot])
+
+    @hit_counter.setter
+    def hit_counter(self, value):
+        self._arena.hit_counter[self._slot] = value
+
+    @property
+    def age(self):
+        return int(self._arena.age[self._slot])
+
+    @age.setter
+    def age(self, value):
+        self._arena.age[self._slot] = value
+
+    @property
+    def point_hit_counter(self):
+        return self._arena.point_hit_counter[self._slot, :self._num_points]
+
+    @point_hit_counter.setter
+    def point_hit_counter(self, value):
+        self._arena.point_hit_counter[self._slot, :self._num_points] = value
+
+    @property
+    def detected_at_least_once_points(self):
+        return self._arena.detected[self._slot, :self._num_points]
+
+    @detected_at_least_once_points.setter
+    def detected_at_least_once_points(self, value):
+        self._arena.detected[self._slot, :self._num_points] = value
@@ -5,13 +5,23 @@ if TYPE_CHECKING:
     from .results import norfairResults
 
 from norfair.drawing.drawer import Drawer
-from norfair.drawing.color import Palette
+import time
+import cv2
 import numpy as np
 from dataclasses import dataclass
 
 @dataclass
 class DrawerCallback:
+    '''
+    Hooks on the render pass.
+
+    - draw_tracker_results_batch(im, results): once per render pass with the
+      shared draw buffer; draw into `im` in place and return it (or None).
+    - draw_tracker_results(im, results, i): per-id compatibility mode, must
+      return the image.
+    '''
     draw_tracker_results = None
+    draw_tracker_results_batch = None
 
 class norfairDrawer(BaseDrawer):
     def __init__(self, results = None):
@@ -26,16 +36,40 @@ class norfairDrawer(BaseDrawer):
                   draw_points=True,
                   draw_bounding_box=True,
                   draw_estimate=True,
-                  use_callback=True):
-        im = frame.copy()
+                  use_callback=True,
+                  out=None,
+                  inplace=False,
+                  draw_trails=False,
+                  trail_length=None):
+        '''
+        Draw tracker results. The frame is copied at most once (into `out` if
+        given, not at all if `inplace`) and every primitive draws into that buffer.
+
+        With `draw_trails`, the last `trail_length` positions of each object are
+        drawn from the tracker's trajectory store (see `set_trajectories`), or
+        from `Results.trails` when the results carry a snapshot.
+        '''
+        metrics = self.metrics
+        if metrics is not None:
+            t0 = time.perf_counter()
+            if not inplace:
+                metrics.count('frame_copies')
+        im = self._render_buffer(frame, out, inplace)
         
         if tracker_results: # update
             self.Results = tracker_results
 
         if draw_roi:
-            im = self._draw_roi(im, self.Results.roi)
+            im = self._draw_roi(im, self.Results.roi, inplace=True)
 
         if self.Results.ids:
+            thickness, font_scale, radius = self._frame_style(im)
+            trails = self.Results.trails if draw_trails else None
+            if trails is None and draw_trails and self.Results.trajectories is not None:
+                trails = self.Results.trajectories.last(self.Results.ids_array, trail_length)
+            if trails is not None:
+                for indx, trail in zip(self.Results.ids, trails):
+                    im = self._draw_trail(im, trail, indx, thickness, inplace=True)
             for i, indx in enumerate(self.Results.ids):
                 if draw_estimate:
                     if not self.Results.is_update_detections[i]:
@@ -43,18 +77,29 @@ class norfairDrawer(BaseDrawer):
                         im = self._draw_estimate(frame=im, 
                                                         point=estimate,
                                                         idx=indx, 
-                                                        distance_threshold=self.Results.DISTANCE_THRESHOLD)
+                                                        distance_threshold=self.Results.DISTANCE_THRESHOLD,
+                                                        radius=radius,
+                                                        thickness=thickness,
+                                                        inplace=True)
                 if self.Results.is_update_detections[i]:
                     point = self.Results.last_det_points[i]
                     if draw_points:
-                        im = self._draw_point(im, point, indx)
+                        im = self._draw_point(im, point, indx, radius, thickness, inplace=True)
                     if draw_id:
-                        im = self._draw_id(im, indx, point)
+                        im = self._draw_id(im, indx, point, font_scale, thickness, inplace=True)
                     if draw_bounding_box:
                         box = self.Results.last_det_bounding_boxes[i]
-                        im = self._draw_box(im, box, indx)
+                        im = self._draw_box(im, box, indx, thickness, inplace=True)
                 if callable(self.callback.draw_tracker_results) and use_callback:
                     im = self.callback.draw_tracker_results(im, self.Results, i)
+
+        if callable(self.callback.draw_tracker_results_batch) and use_callback:
+            batch_im = self.callback.draw_tracker_results_batch(im, self.Results)
+            if batch_im is not None:
+                im = batch_im
+
+        if metrics is not None:
+            metrics.observe('draw', time.perf_counter() - t0)
         return im
     
     def _draw_estimate(self, 
@@ -63,10 +108,11 @@ class norfairDrawer(BaseDrawer):
                        idx, 
                        distance_threshold,
                        radius=None, 
-                       thickness=None):
+                       thickness=None,
+                       inplace=False):
         
-        draw_estimate = frame.copy()
-        color = Palette.choose_color(idx)
+        draw_estimate = frame if inplace else frame.copy()
+        color = self._get_color(idx)
         point = np.array(point, dtype=np.int32).reshape(-1)
 
         if thickness is None:
@@ -85,4 +131,13 @@ class norfairDrawer(BaseDrawer):
             p1, p2 = point.reshape(2,2)
             ct = ((p2 - p1) // 2) + p1
             draw_estimate = Drawer.circle(draw_estimate, ct, int(distance_threshold), thickness, color)
-        return super()._draw_point(draw_estimate, point, idx, radius, thickness)
\ No newline at end of file
+        return super()._draw_point(draw_estimate, point, idx, radius, thickness, inplace=True)
+
+    def _draw_trail(self, frame, trail, idx, thickness=None, inplace=False):
+        if thickness is None:
+            thickness = self._thickness_cal(frame)
+        draw_trail = frame if inplace else frame.copy()
+        trail = trail[~np.isnan(trail).any(axis=1)]
+        if len(trail) >= 2:
+            cv2.polylines(draw_trail, [np.rint(trail).astype(np.int32)], False, self._get_color(idx), max(thickness, 1))
+        return draw_trail
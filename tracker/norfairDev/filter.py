@@ -0,0 +1,252 @@
+from norfair.filter import OptimizedKalmanFilterFactory
+import numpy as np
+import weakref
+
+class KalmanFilterBank:
+    '''
+    Structure-of-arrays storage for the `OptimizedKalmanFilter` state of many
+    objects that share one measurement layout (`dim_z` = points * dims).
+
+    Each object gets a slot (row). `predict` advances all slots with one NumPy
+    operation and measurement updates are queued and applied in one batch on
+    `flush` (or as soon as any filter state is read).
+    '''
+    def __init__(self,
+                 dim_z,
+                 capacity=256,
+                 R=4.0,
+                 Q=0.1,
+                 pos_variance=10,
+                 pos_vel_covariance=0,
+                 vel_variance=1):
+        self.dim_z = dim_z
+        self.R = R
+        self.Q = Q
+        self._init_variances = (pos_variance, pos_vel_covariance, vel_variance)
+
+        self.x = np.zeros((0, 2 * dim_z, 1))
+        self.pos_variance = np.zeros((0, dim_z))
+        self.pos_vel_covariance = np.zeros((0, dim_z))
+        self.vel_variance = np.zeros((0, dim_z))
+        self.active = np.zeros(0, dtype=bool)
+        self._free = []
+        self._grow(capacity)
+
+        self._pending_slots = []
+        self._pending_z = []
+        self._pending_mask = []
+        self._pending_set = set()
+        self.batched_predict = False
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def _grow(self, capacity):
+        old = len(self.active)
+        if capacity <= old:
+            return
+        extra = capacity - old
+        self.x = np.concatenate([self.x, np.zeros((extra, 2 * self.dim_z, 1))])
+        self.pos_variance = np.concatenate([self.pos_variance, np.zeros((extra, self.dim_z))])
+        self.pos_vel_covariance = np.concatenate([self.pos_vel_covariance, np.zeros((extra, self.dim_z))])
+        self.vel_variance = np.concatenate([self.vel_variance, np.zeros((extra, self.dim_z))])
+        self.active = np.concatenate([self.active, np.zeros(extra, dtype=bool)])
+        self._free.extend(range(capacity - 1, old - 1, -1))
+
+    def allocate(self, initial_points):
+        '''
+        Reserve a slot initialized like `OptimizedKalmanFilterFactory.create_filter`.
+        '''
+        if not self._free:
+            self._grow(max(2 * len(self.active), 1))
+        slot = self._free.pop()
+        pos_variance, pos_vel_covariance, vel_variance = self._init_variances
+        self.x[slot] = 0
+        self.x[slot, :self.dim_z, 0] = initial_points
+        self.pos_variance[slot] = pos_variance
+        self.pos_vel_covariance[slot] = pos_vel_covariance
+        self.vel_variance[slot] = vel_variance
+        self.active[slot] = True
+        return BankedKalmanFilter(self, slot)
+
+    def release(self, slot):
+        if self.active[slot]:
+            if slot in self._pending_set:
+                self.flush()
+            self.active[slot] = False
+            self._free.append(slot)
+
+    def predict(self):
+        '''
+        Advance every slot (x += v). Inactive slots are advanced too, which is
+        cheaper than masking and harmless since they are reset on allocation.
+        '''
+        self.flush()
+        self.x[:, :self.dim_z] += self.x[:, self.dim_z:]
+
+    def predict_slot(self, slot):
+        self.flush()
+        self.x[slot, :self.dim_z] += self.x[slot, self.dim_z:]
+
+    def queue_update(self, slot, z, mask):
+        '''
+        Queue a measurement for `slot`. `mask` marks the measured sensors
+        (the diagonal of H in `OptimizedKalmanFilter.update`).
+        '''
+        if slot in self._pending_set:
+            self.flush()
+        self._pending_slots.append(slot)
+        self._pending_z.append(z)
+        self._pending_mask.append(mask)
+        self._pending_set.add(slot)
+
+    def flush(self):
+        '''
+        Apply all queued measurement updates in one batch.
+        '''
+        if not self._pending_slots:
+            return
+        slots = np.array(self._pending_slots)
+        z = np.array(self._pending_z, dtype=np.float64).reshape(len(slots), self.dim_z)
+        diagonal = np.array(self._pending_mask, dtype=np.float64).reshape(len(slots), self.dim_z)
+        self._pending_slots, self._pending_z, self._pending_mask = [], [], []
+        self._pending_set.clear()
+
+        dz = self.dim_z
+        kalman_r = self.R
+        pos_variance = self.pos_variance[slots]
+        pos_vel_covariance = self.pos_vel_covariance[slots]
+        vel_variance = self.vel_variance[slots]
+
+        error = (z - self.x[slots, :dz, 0]) * diagonal
+        vel_var_plus_pos_vel_cov = pos_vel_covariance + vel_variance
+        added_variances = pos_variance + pos_vel_covariance + vel_var_plus_pos_vel_cov + self.Q + kalman_r
+        kalman_r_over_added_variances = kalman_r / added_variances
+        vel_var_plus_pos_vel_cov_over_added_variances = vel_var_plus_pos_vel_cov / added_variances
+        added_variances_or_kalman_r = added_variances * (1 - diagonal) + kalman_r * diagonal
+
+        self.x[slots, :dz, 0] += diagonal * (1 - kalman_r_over_added_variances) * error
+        self.x[slots, dz:, 0] += diagonal * vel_var_plus_pos_vel_cov_over_added_variances * error
+
+        self.pos_variance[slots] = (1 - kalman_r_over_added_variances) * added_variances_or_kalman_r
+        self.pos_vel_covariance[slots] = vel_var_plus_pos_vel_cov_over_added_variances * added_variances_or_kalman_r
+        self.vel_variance[slots] = vel_variance + self.Q - diagonal * (
+            np.square(vel_var_plus_pos_vel_cov_over_added_variances) * added_variances
+        )
+
+
+class BankedKalmanFilter:
+    '''
+    Per-object handle on a `KalmanFilterBank` slot with the `OptimizedKalmanFilter`
+    interface (`x`, `predict`, `update`). The slot is returned to the bank when
+    the handle is garbage collected.
+    '''
+    __slots__ = ('bank', 'slot', 'dim_z')
+
+    def __init__(self, bank:KalmanFilterBank, slot:int):
+        self.bank = bank
+        self.slot = slot
+        self.dim_z = bank.dim_z
+
+    def __del__(self):
+        try:
+            self.bank.release(self.slot)
+        except Exception: # interpreter shutdown
+            pass
+
+    @property
+    def x(self):
+        bank = self.bank
+        if bank._pending_slots:
+            bank.flush()
+        return bank.x[self.slot]
+
+    def predict(self):
+        if not self.bank.batched_predict: # the tracker already advanced the whole bank
+            self.bank.predict_slot(self.slot)
+
+    def update(self, detection_points_flatten, R=None, H=None):
+        if R is not None:
+            raise ValueError("BankedKalmanFilter does not support a per-update R")
+        if H is not None:
+            mask = np.diagonal(H)[:self.dim_z] != 0
+        else:
+            mask = np.ones(self.dim_z, dtype=bool)
+        self.update_masked(np.asarray(detection_points_flatten).reshape(-1), mask)
+
+    def update_masked(self, points, mask):
+        '''
+        Queue a measurement given as flat points and a boolean sensor mask (no H matrix).
+        '''
+        self.bank.queue_update(self.slot, points, mask)
+
+
+class KalmanFilterBankFactory(OptimizedKalmanFilterFactory):
+    '''
+    Drop-in replacement for `OptimizedKalmanFilterFactory` that keeps all filter
+    states in `KalmanFilterBank`s (one per measurement layout).
+
+    With `norfairDevTracker` the whole bank is predicted once per frame and
+    measurement updates are applied in one batch, instead of one small NumPy
+    call per object. Same parameters as `OptimizedKalmanFilterFactory`.
+
+    Notes:
+        - The banks belong to one tracker (it predicts them once per frame).
+          A factory passed to a second tracker is copied for it (see `bind`),
+          so `tracker.filter_factory` may not be the instance passed in.
+    '''
+    def __init__(self,
+                 R: float = 4.0,
+                 Q: float = 0.1,
+                 pos_variance: float = 10,
+                 pos_vel_covariance: float = 0,
+                 vel_variance: float = 1,
+                 capacity: int = 256):
+        super().__init__(R, Q, pos_variance, pos_vel_covariance, vel_variance)
+        self.capacity = capacity
+        self.banks = {}
+        self._tracker = None # weak reference to the tracker owning the banks
+
+    def copy(self):
+        '''
+        New factory with the same parameters and empty banks.
+        '''
+        return type(self)(self.R, self.Q, self.pos_variance, self.pos_vel_covariance, self.vel_variance, self.capacity)
+
+    def bind(self, tracker):
+        '''
+        Factory for `tracker`: this one if no other live tracker uses it yet,
+        else a fresh `copy` bound to `tracker`.
+        '''
+        owner = self._tracker() if self._tracker is not None else None
+        if owner is not None and owner is not tracker:
+            return self.copy().bind(tracker)
+        self._tracker = weakref.ref(tracker)
+        return self
+
+    def create_filter(self, initial_detection: np.ndarray):
+        initial_points = np.asarray(initial_detection).reshape(-1)
+        dim_z = len(initial_points)
+        bank = self.banks.get(dim_z)
+        if bank is None:
+            bank = self.banks[dim_z] = KalmanFilterBank(dim_z,
+                                                        capacity=self.capacity,
+                                                        R=self.R,
+                                                        Q=self.Q,
+                                                        pos_variance=self.pos_variance,
+                                                        pos_vel_covariance=self.pos_vel_covariance,
+                                                        vel_variance=self.vel_variance)
+        return bank.allocate(initial_points)
+
+    def begin_step(self):
+        '''
+        Predict every bank once; per-object `predict()` calls become no-ops until `end_step`.
+        '''
+        for bank in self.banks.values():
+            bank.predict()
+            bank.batched_predict = True
+
+    def end_step(self):
+        for bank in self.banks.values():
+            bank.batched_predict = False
+            bank.flush()
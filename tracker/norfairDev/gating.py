@@ -0,0 +1,168 @@
+from norfair.distances import Distance, ScalarDistance, VectorizedDistance
+import numpy as np
+
+class GatedDistance(Distance):
+    '''
+    Wraps a norfair `Distance` and only evaluates candidate/object pairs whose
+    centers are spatially close, using a uniform grid keyed on `radius`.
+    Pairs outside the gate get `inf`, which never matches.
+
+    The gate is only valid for distances that grow at least as fast as the
+    displacement of the centers (euclidean, mean_euclidean, frobenius, ...),
+    with `radius` set to the tracker's `distance_threshold`.
+
+    Parameters:
+        distance: wrapped norfair `Distance`.
+        radius: gate radius in pixels.
+        min_pairs: below this many pairs the full matrix is evaluated.
+        max_blocks: for vectorized distances, the grid is coarsened so at most
+            about this many block evaluations are done per call.
+
+    Counters (`pairs_total`, `pairs_evaluated`, `pairs_pruned`) accumulate
+    until `reset_stats()`.
+    '''
+    def __init__(self, distance:Distance, radius:float, min_pairs:int=4096, max_blocks:int=64):
+        self.distance = distance
+        self.radius = float(radius)
+        self.min_pairs = min_pairs
+        self.max_blocks = max_blocks
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.pairs_total = 0
+        self.pairs_evaluated = 0
+
+    @property
+    def pairs_pruned(self):
+        return self.pairs_total - self.pairs_evaluated
+
+    @staticmethod
+    def _vectors(items):
+        # same stacking as norfair's VectorizedDistance: detection points / object estimates
+        return [
+            (item.points if hasattr(item, 'absolute_points') else item.estimate).ravel()
+            for item in items
+        ]
+
+    @staticmethod
+    def _centers(vectors):
+        if len({len(v) for v in vectors}) == 1:
+            return np.stack(vectors).reshape(len(vectors), -1, 2).mean(axis=1)
+        return np.array([v.reshape(-1, 2).mean(axis=0) for v in vectors]).reshape(-1, 2)
+
+    @staticmethod
+    def _cells(centers, cell):
+        return np.floor(centers / cell).astype(np.int64)
+
+    @staticmethod
+    def _neighbor_pairs(cand_cells, obj_cells):
+        '''
+        All (candidate, object) index pairs whose grid cells are 8-neighbors (or equal).
+        '''
+        origin = np.minimum(cand_cells.min(axis=0), obj_cells.min(axis=0)) - 1
+        cand_cells = cand_cells - origin
+        obj_cells = obj_cells - origin
+        stride = max(cand_cells[:, 1].max(), obj_cells[:, 1].max()) + 2
+
+        obj_keys = obj_cells[:, 0] * stride + obj_cells[:, 1]
+        order = np.argsort(obj_keys, kind='stable')
+        sorted_keys = obj_keys[order]
+
+        cand_idx, obj_idx = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                keys = (cand_cells[:, 0] + dx) * stride + cand_cells[:, 1] + dy
+                lo = np.searchsorted(sorted_keys, keys, side='left')
+                hi = np.searchsorted(sorted_keys, keys, side='right')
+                counts = hi - lo
+                if not counts.any():
+                    continue
+                c = np.repeat(np.arange(len(keys)), counts)
+                starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+                cand_idx.append(c)
+                obj_idx.append(order[starts + np.arange(len(c))])
+        if not cand_idx:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(cand_idx), np.concatenate(obj_idx)
+
+    def get_distances(self, objects, candidates):
+        distance_matrix = np.full(
+            (len(candidates), len(objects)),
+            fill_value=np.inf,
+            dtype=np.float32,
+        )
+        if not objects or not candidates:
+            return distance_matrix
+
+        total = len(candidates) * len(objects)
+        self.pairs_total += total
+        if total <= self.min_pairs:
+            self.pairs_evaluated += total
+            return self.distance.get_distances(objects, candidates)
+
+        cand_vectors = self._vectors(candidates)
+        obj_vectors = self._vectors(objects)
+        cand_centers = self._centers(cand_vectors)
+        obj_centers = self._centers(obj_vectors)
+
+        if isinstance(self.distance, ScalarDistance):
+            self._fill_pairs(distance_matrix, objects, candidates, cand_centers, obj_centers)
+            return distance_matrix
+
+        compute = None
+        if isinstance(self.distance, VectorizedDistance) and len({len(v) for v in cand_vectors + obj_vectors}) == 1:
+            stacked_candidates, stacked_objects = np.stack(cand_vectors), np.stack(obj_vectors)
+            cand_labels = np.array([str(c.label) for c in candidates])
+            obj_labels = np.array([str(o.label) for o in objects])
+
+            def compute(rows, cols):
+                block = self.distance._compute_distance(stacked_candidates[rows], stacked_objects[cols])
+                return np.where(cand_labels[rows][:, None] == obj_labels[cols][None, :], block, np.inf)
+
+        self._fill_blocks(distance_matrix, objects, candidates, cand_centers, obj_centers, compute)
+        return distance_matrix
+
+    def _fill_pairs(self, distance_matrix, objects, candidates, cand_centers, obj_centers):
+        # scalar distances: evaluate exactly the pairs inside the gate
+        cand_idx, obj_idx = self._neighbor_pairs(self._cells(cand_centers, self.radius),
+                                                 self._cells(obj_centers, self.radius))
+        near = np.linalg.norm(cand_centers[cand_idx] - obj_centers[obj_idx], axis=1) <= self.radius
+        cand_idx, obj_idx = cand_idx[near], obj_idx[near]
+        self.pairs_evaluated += len(cand_idx)
+
+        distance_function = self.distance.distance_function
+        for c, o in zip(cand_idx.tolist(), obj_idx.tolist()):
+            candidate, obj = candidates[c], objects[o]
+            if candidate.label != obj.label:
+                continue
+            distance_matrix[c, o] = distance_function(candidate, obj)
+
+    def _fill_blocks(self, distance_matrix, objects, candidates, cand_centers, obj_centers, compute=None):
+        # vectorized distances: one call per occupied (coarse) candidate cell
+        span = np.ptp(np.vstack([cand_centers, obj_centers]), axis=0).max()
+        cell = max(self.radius, span / max(np.sqrt(self.max_blocks), 1))
+        cand_cells = self._cells(cand_centers, cell)
+        obj_cells = self._cells(obj_centers, cell)
+
+        cand_idx, obj_idx = self._neighbor_pairs(cand_cells, obj_cells)
+        if not len(cand_idx):
+            return
+        _, block_of_cand = np.unique(cand_cells, axis=0, return_inverse=True)
+        block_of_cand = block_of_cand.reshape(-1)
+        pair_block = block_of_cand[cand_idx]
+        order = np.argsort(pair_block, kind='stable')
+        pair_block, obj_idx = pair_block[order], obj_idx[order]
+        bounds = np.flatnonzero(np.diff(pair_block)) + 1
+
+        for block_objs, block in zip(np.split(obj_idx, bounds), pair_block[np.r_[0, bounds]]):
+            rows = np.flatnonzero(block_of_cand == block)
+            cols = np.unique(block_objs)
+            self.pairs_evaluated += len(rows) * len(cols)
+            if compute is not None:
+                block_distances = compute(rows, cols)
+            else:
+                block_distances = self.distance.get_distances(
+                    [objects[i] for i in cols],
+                    [candidates[i] for i in rows],
+                )
+            distance_matrix[np.ix_(rows, cols)] = block_distances
@@ -0,0 +1,166 @@
+import os
+from collections import defaultdict, deque
+import numpy as np
+
+class MetricsSink:
+    '''
+    Receives stage timings, counters and gauges from `norfairDevTracker` and
+    `norfairDrawer` (attach with `tracker.set_metrics(sink)`).
+
+    Tracker stages (seconds): preprocess, prefilter, make_detections,
+    norfair_update, results, update. Drawer stages: draw.
+    Counters: frames, detections_in, detections_roi_out, detections_prefilter_out,
+    matched_pairs, frame_copies.
+    Gauges: objects_active (as `get_active_objects`), objects_initializing,
+    objects_reid_pool (past their hit counter, kept for Re-ID), objects_dead
+    (pruned this frame; with Re-ID, only objects that also left the Re-ID pool).
+
+    `frame_end` is called by the tracker at the end of every update; drawing
+    happens after that, so draw metrics are reported with the next frame.
+    '''
+    def observe(self, name, seconds):
+        pass
+
+    def count(self, name, value=1):
+        pass
+
+    def gauge(self, name, value):
+        pass
+
+    def frame_end(self):
+        pass
+
+class HistogramSink(MetricsSink):
+    '''
+    In-memory sink: fixed-bucket histograms per stage plus the last `window`
+    samples for percentiles.
+
+    Parameters:
+        buckets: histogram upper bounds in seconds.
+        window: samples kept per stage for `percentile`/`summary`.
+    '''
+    BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 1e-1, 2.5e-1, 1.0)
+
+    def __init__(self, buckets=BUCKETS, window=1024):
+        self.buckets = np.asarray(buckets, dtype=np.float64)
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        self.bucket_counts = defaultdict(lambda: np.zeros(len(self.buckets) + 1, dtype=np.int64))
+        self.sums = defaultdict(float)
+        self.samples = defaultdict(lambda: deque(maxlen=self.window))
+        self.counters = defaultdict(int)
+        self.gauges = {}
+
+    def observe(self, name, seconds):
+        self.bucket_counts[name][np.searchsorted(self.buckets, seconds)] += 1
+        self.sums[name] += seconds
+        self.samples[name].append(seconds)
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def gauge(self, name, value):
+        self.gauges[name] = value
+
+    def percentile(self, name, q):
+        samples = self.samples.get(name)
+        return float(np.percentile(samples, q)) if samples else None
+
+    def summary(self):
+        '''
+        Dict with p50/p99/mean/count per stage, counters and gauges.
+        '''
+        stages = {
+            name: {
+                'p50': self.percentile(name, 50),
+                'p99': self.percentile(name, 99),
+                'mean': self.sums[name] / max(int(counts.sum()), 1),
+                'count': int(counts.sum()),
+            }
+            for name, counts in self.bucket_counts.items()
+        }
+        return {'stages': stages, 'counters': dict(self.counters), 'gauges': dict(self.gauges)}
+
+class PrometheusTextSink(HistogramSink):
+    '''
+    `HistogramSink` that writes the Prometheus text exposition format to
+    `path` every `write_every` frames (e.g. for the node_exporter textfile
+    collector). The file is replaced atomically.
+
+    Parameters:
+        path: output file (.prom).
+        prefix: metric name prefix.
+        write_every: frames between writes.
+        labels (optional): constant labels, e.g. {'stream': 'cam0'}.
+    '''
+    def __init__(self, path, prefix='objtracker', write_every=30, labels=None, **kwargs):
+        super().__init__(**kwargs)
+        self.path = str(path)
+        self.prefix = prefix
+        self.write_every = write_every
+        self.labels = labels or {}
+        self._frames = 0
+
+    def frame_end(self):
+        self._frames += 1
+        if self._frames % self.write_every == 0:
+            self.write()
+
+    def _labels(self, **extra):
+        labels = {**self.labels, **extra}
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
+
+    def render(self):
+        lines = []
+        name = f'{self.prefix}_stage_seconds'
+        lines.append(f'# TYPE {name} histogram')
+        for stage, counts in self.bucket_counts.items():
+            cumulative = np.cumsum(counts)
+            for bound, value in zip(self.buckets, cumulative):
+                lines.append(f'{name}_bucket{self._labels(stage=stage, le=repr(float(bound)))} {value}')
+            lines.append(f'{name}_bucket{self._labels(stage=stage, le="+Inf")} {cumulative[-1]}')
+            lines.append(f'{name}_sum{self._labels(stage=stage)} {self.sums[stage]}')
+            lines.append(f'{name}_count{self._labels(stage=stage)} {cumulative[-1]}')
+        for counter, value in self.counters.items():
+            lines.append(f'# TYPE {self.prefix}_{counter}_total counter')
+            lines.append(f'{self.prefix}_{counter}_total{self._labels()} {value}')
+        for gauge, value in self.gauges.items():
+            lines.append(f'# TYPE {self.prefix}_{gauge} gauge')
+            lines.append(f'{self.prefix}_{gauge}{self._labels()} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self):
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp, self.path)
+
+class CallbackSink(MetricsSink):
+    '''
+    Collects the metrics of one frame and passes them to `func` on `frame_end`:
+    `func({'timings': {stage: seconds}, 'counters': {...}, 'gauges': {...}})`.
+    '''
+    def __init__(self, func):
+        self.func = func
+        self._reset()
+
+    def _reset(self):
+        self._frame = {'timings': defaultdict(float), 'counters': defaultdict(int), 'gauges': {}}
+
+    def observe(self, name, seconds):
+        self._frame['timings'][name] += seconds
+
+    def count(self, name, value=1):
+        self._frame['counters'][name] += value
+
+    def gauge(self, name, value):
+        self._frame['gauges'][name] = value
+
+    def frame_end(self):
+        frame = {k: dict(v) for k, v in self._frame.items()}
+        self._reset()
+        self.func(frame)
@@ -0,0 +1,256 @@
+import copy
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+import numpy as np
+
+_END = object()
+
+class StubDetector:
+    '''
+    Detector stand-in that returns `num_objects` boxes moving linearly across
+    the frame. Enough to drive the pipeline in tests and benchmarks.
+    '''
+    def __init__(self, num_objects=20, box_size=20, speed=2.0, seed=0):
+        rng = np.random.default_rng(seed)
+        self.num_objects = num_objects
+        self.box_size = box_size
+        self._start = rng.random((num_objects, 2))
+        self._velocity = rng.normal(0, speed, (num_objects, 2))
+        self._step = 0
+
+    def __call__(self, frame):
+        h, w = frame.shape[:2]
+        centers = (self._start * [w, h] + self._velocity * self._step) % [w, h]
+        self._step += 1
+        half = self.box_size / 2
+        return {
+            'boxes': np.hstack([centers - half, centers + half]),
+            'scores': np.ones(self.num_objects),
+        }
+
+@dataclass
+class StageStats:
+    '''
+    Latency (seconds per item) and throughput of one pipeline stage.
+    '''
+    name: str
+    count: int = 0
+    dropped: int = 0
+    busy_time: float = 0.0
+    started: float = None
+    finished: float = None
+    latencies: deque = field(default_factory=lambda: deque(maxlen=2048))
+
+    def record(self, latency):
+        self.count += 1
+        self.busy_time += latency
+        self.latencies.append(latency)
+
+    @property
+    def p50(self):
+        return float(np.percentile(self.latencies, 50)) if self.latencies else None
+
+    @property
+    def p99(self):
+        return float(np.percentile(self.latencies, 99)) if self.latencies else None
+
+    @property
+    def throughput(self):
+        if not self.count or self.started is None:
+            return None
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return self.count / max(end - self.started, 1e-9)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'dropped': self.dropped,
+            'p50': self.p50,
+            'p99': self.p99,
+            'throughput': self.throughput,
+        }
+
+class _StageError:
+    def __init__(self, stage, exc):
+        self.stage = stage
+        self.exc = exc
+
+class TrackingPipeline:
+    '''
+    Runs decode -> detect -> track -> draw with one thread per stage,
+    connected by bounded queues.
+
+    Frames stay in order. With `drop_frames=True`, frames are dropped at the
+    decode stage while the detector's queue is full, instead of blocking the
+    decoder (live sources); the tracker and drawer see every frame they get.
+
+    Example:
+        pipeline = TrackingPipeline(tracker, detector=model_fn, drawer=tracker.Drawer)
+        for index, image, results in pipeline.run(frames):
+            ...
+        print(pipeline.report())
+
+    Parameters:
+        tracker: `norfairDevTracker`.
+        detector: callable(frame) -> dict of `update_detections_batch`
+            arguments (boxes, scores, labels, embeddings, data).
+        drawer (optional): `norfairDrawer`; None skips the draw stage and
+            yields the original frame.
+        queue_size: capacity of each inter-stage queue.
+        drop_frames: drop frames under back-pressure instead of blocking.
+        draw_kwargs (optional): extra arguments for `draw_tracker_results`.
+    '''
+    STAGES = ('decode', 'detect', 'track', 'draw')
+
+    def __init__(self,
+                 tracker,
+                 detector,
+                 drawer=None,
+                 queue_size=4,
+                 drop_frames=False,
+                 draw_kwargs=None):
+        self.tracker = tracker
+        self.detector = detector
+        self.drawer = drawer
+        self.queue_size = queue_size
+        self.drop_frames = drop_frames
+        self.draw_kwargs = draw_kwargs or {}
+        self.stats = {}
+        self.end_to_end = StageStats('end_to_end')
+        self._stop = threading.Event()
+
+    def report(self):
+        '''
+        Per-stage latency/throughput summary, plus end-to-end latency.
+        '''
+        out = {name: stats.summary() for name, stats in self.stats.items()}
+        out['end_to_end'] = self.end_to_end.summary()
+        return out
+
+    def stop(self):
+        self._stop.set()
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _END
+
+    def _decode(self, source, out):
+        stats = self.stats['decode']
+        stats.started = time.perf_counter()
+        try:
+            it = iter(source)
+            index = 0
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    frame = next(it)
+                except StopIteration:
+                    break
+                stats.record(time.perf_counter() - t0)
+                item = (index, t0, frame)
+                index += 1
+                if self.drop_frames:
+                    try:
+                        out.put_nowait(item)
+                    except queue.Full:
+                        stats.dropped += 1
+                elif not self._put(out, item):
+                    break
+        except Exception as e:
+            self._put(out, _StageError('decode', e))
+        finally:
+            stats.finished = time.perf_counter()
+            self._put(out, _END)
+
+    def _worker(self, name, func, inp, out):
+        stats = self.stats[name]
+        stats.started = time.perf_counter()
+        try:
+            while True:
+                item = self._get(inp)
+                if item is _END or isinstance(item, _StageError):
+                    self._put(out, item)
+                    break
+                t0 = time.perf_counter()
+                try:
+                    item = func(*item)
+                except Exception as e:
+                    self._put(out, _StageError(name, e)) # forwarded downstream, raised by `run`
+                    break
+                stats.record(time.perf_counter() - t0)
+                if not self._put(out, item):
+                    break
+        finally:
+            stats.finished = time.perf_counter()
+
+    def _detect(self, index, t_start, frame):
+        return index, t_start, frame, self.detector(frame)
+
+    def _track(self, index, t_start, frame, detections):
+        results = copy.copy(self.tracker.update_detections_batch(frame, **detections))
+        # the tracker reuses its Results object and keeps updating the trajectory
+        # store while the draw stage runs, so the drawer gets this frame's snapshot
+        if self.draw_kwargs.get('draw_trails') and results.trajectories is not None and results.ids_array is not None:
+            results.trails = results.trajectories.last(results.ids_array, self.draw_kwargs.get('trail_length'))
+        return index, t_start, frame, results
+
+    def _draw(self, index, t_start, frame, results):
+        image = self.drawer.draw_tracker_results(frame, results, **self.draw_kwargs) if self.drawer is not None else frame
+        return index, t_start, image, results
+
+    def run(self, source):
+        '''
+        Run the pipeline over an iterable of frames.
+
+        Yields:
+            (index, image, norfairResults) per processed frame, in order.
+
+        Raises:
+            RuntimeError: if a stage raised; the original exception is chained.
+        '''
+        self._stop.clear()
+        self.stats = {name: StageStats(name) for name in self.STAGES}
+        self.end_to_end = StageStats('end_to_end')
+        queues = [queue.Queue(self.queue_size) for _ in self.STAGES]
+        threads = [threading.Thread(target=self._decode, args=(source, queues[0]), daemon=True)]
+        for (name, func), inp, out in zip((('detect', self._detect), ('track', self._track), ('draw', self._draw)),
+                                          queues[:-1], queues[1:]):
+            threads.append(threading.Thread(target=self._worker, args=(name, func, inp, out), daemon=True))
+        for thread in threads:
+            thread.start()
+
+        self.end_to_end.started = time.perf_counter()
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _END:
+                    break
+                if isinstance(item, _StageError):
+                    raise RuntimeError(f"pipeline stage '{item.stage}' failed") from item.exc
+                index, t_start, image, results = item
+                self.end_to_end.record(time.perf_counter() - t_start)
+                yield index, image, results
+        finally:
+            self.end_to_end.finished = time.perf_counter()
+            self._stop.set()
+            for q in queues: # unblock producers
+                while not q.empty():
+                    q.get_nowait()
+            for thread in threads:
+                thread.join(timeout=1)
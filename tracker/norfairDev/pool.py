@@ -0,0 +1,269 @@
+import copy
+import multiprocessing as mp
+import pickle
+import queue
+import time
+import traceback
+from multiprocessing import shared_memory
+import numpy as np
+
+from .tracker import norfairDevTracker
+
+_ALIGN = 64
+
+def _pack(buf, arrays):
+    '''
+    Copy arrays into a shared-memory slot. Returns their layout, or None if they do not fit.
+    '''
+    layout = []
+    offset = 0
+    for name, arr in arrays.items():
+        offset = -(-offset // _ALIGN) * _ALIGN
+        if offset + arr.nbytes > len(buf):
+            return None
+        view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=buf, offset=offset)
+        view[...] = arr
+        layout.append((name, arr.dtype.str, arr.shape, offset))
+        offset += arr.nbytes
+    return layout
+
+def _unpack(buf, layout):
+    # copy out: detections keep references to their arrays after the slot is reused
+    return {
+        name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=buf, offset=offset).copy()
+        for name, dtype, shape, offset in layout
+    }
+
+def _snapshot(results):
+    '''
+    This frame's results, pickled now: the tracker reuses its Results object
+    for the next update while the queue's feeder thread would still be
+    pickling it. The roi and the trajectory store stay in the worker.
+    '''
+    snapshot = copy.copy(results)
+    snapshot.roi = None
+    snapshot.trajectories = None
+    return pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _worker_main(commands, results, free_slots, shm_name, slot_bytes):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    trackers = {}
+    try:
+        while True:
+            message = commands.get()
+            if message is None:
+                break
+            if message[0] == 'add':
+                _, stream_id, tracker_class, tracker_kwargs, set_tracker_kwargs = message
+                try:
+                    trackers[stream_id] = tracker_class(**tracker_kwargs).set_tracker(**set_tracker_kwargs)
+                except Exception as e:
+                    results.put((stream_id, None, RuntimeError(f"stream {stream_id!r}: {e!r}\n{traceback.format_exc()}")))
+                continue
+
+            _, stream_id, frame_meta, slot, layout, arrays = message
+            try:
+                if layout is not None:
+                    buf = shm.buf[slot * slot_bytes:(slot + 1) * slot_bytes]
+                    try:
+                        arrays = _unpack(buf, layout)
+                    finally:
+                        buf.release()
+                out = trackers[stream_id].update_detections_batch(frame_meta.get('shape'), **arrays)
+                results.put((stream_id, frame_meta, _snapshot(out)))
+            except Exception as e:
+                results.put((stream_id, frame_meta, RuntimeError(f"stream {stream_id!r}: {e!r}\n{traceback.format_exc()}")))
+            # the slot stays taken until its result is queued: at most `queue_size`
+            # batches per worker are in flight, results included
+            free_slots.put(slot)
+    finally:
+        shm.close()
+
+class TrackerPool:
+    '''
+    Runs one tracker per stream, sharded across worker processes.
+
+    Each stream is pinned to one worker, so its tracker state never leaves
+    that process. Detection arrays are copied into a per-worker shared-memory
+    ring of `queue_size` slots instead of being pickled. A slot is freed once
+    its results are queued, so a full ring (unread results included) applies
+    back-pressure to `submit`.
+
+    Example:
+        with TrackerPool(num_workers=4) as pool:
+            pool.add_stream('cam0', dict(distance_function='euclidean', distance_threshold=50), roi=roi)
+            pool.submit('cam0', {'shape': frame.shape, 'index': 0}, boxes=boxes, scores=scores)
+            stream_id, frame_meta, results = pool.get()
+
+    Parameters:
+        num_workers: number of worker processes (default: cpu count).
+        queue_size: in-flight batches per worker (shared-memory slots).
+        slot_bytes: size of one slot; larger batches fall back to pickling.
+        start_method: multiprocessing start method (default: platform default).
+        join_timeout: seconds `close` waits for each worker before terminating it.
+    '''
+    _POLL = 0.1 # seconds between liveness checks while blocked
+
+    def __init__(self, num_workers=None, queue_size=4, slot_bytes=1 << 20, start_method=None, join_timeout=5.0):
+        ctx = mp.get_context(start_method)
+        self.num_workers = num_workers or mp.cpu_count()
+        self.queue_size = queue_size
+        self.slot_bytes = slot_bytes
+        self.join_timeout = join_timeout
+        self._results = ctx.Queue()
+        self._assignment = {}
+        self._rois = {}
+        self._stream_counts = [0] * self.num_workers
+        self._workers = []
+        self._closed = False
+
+        for _ in range(self.num_workers):
+            shm = shared_memory.SharedMemory(create=True, size=queue_size * slot_bytes)
+            commands = ctx.Queue()
+            free_slots = ctx.Queue()
+            for slot in range(queue_size):
+                free_slots.put(slot)
+            process = ctx.Process(target=_worker_main,
+                                  args=(commands, self._results, free_slots, shm.name, slot_bytes),
+                                  daemon=True)
+            process.start()
+            self._workers.append((process, commands, free_slots, shm))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_stream(self,
+                   stream_id,
+                   tracker_kwargs:dict,
+                   tracker_class=norfairDevTracker,
+                   worker:int=None,
+                   **set_tracker_kwargs):
+        '''
+        Create the tracker for `stream_id` on one worker (least loaded unless `worker` is given).
+
+        Parameters:
+            tracker_kwargs: constructor arguments (must be picklable, e.g. distance by name).
+            tracker_class: `norfairDevTracker` or a subclass importable by the workers.
+            **set_tracker_kwargs: forwarded to `set_tracker` (roi/roni regions, ...).
+        '''
+        if stream_id in self._assignment:
+            raise ValueError(f"stream {stream_id!r} already exists")
+        if worker is None:
+            worker = int(np.argmin(self._stream_counts))
+        self._assignment[stream_id] = worker
+        self._rois[stream_id] = {k: v for k, v in set_tracker_kwargs.items()
+                                 if k not in ('custom_tracked_object', 'color_mapping_keys')}
+        self._stream_counts[worker] += 1
+        self._workers[worker][1].put(('add', stream_id, tracker_class, tracker_kwargs, set_tracker_kwargs))
+        return worker
+
+    def submit(self, stream_id, frame_meta:dict, block=True, timeout=None, **detections):
+        '''
+        Queue one batch of detections for `stream_id`.
+
+        Parameters:
+            frame_meta: passed back with the results; `frame_meta['shape']` is
+                the frame shape used for roi scaling.
+            block, timeout: behaviour when the worker already has `queue_size`
+                batches in flight.
+            **detections: `update_detections_batch` arrays (boxes, scores, labels, embeddings).
+
+        Returns:
+            bool: False if the batch was not queued because of back-pressure.
+
+        Raises:
+            RuntimeError: if the pool is closed or the stream's worker died.
+        '''
+        if self._closed:
+            raise RuntimeError("pool is closed")
+        process, commands, free_slots, shm = self._workers[self._assignment[stream_id]]
+        if not process.is_alive():
+            raise RuntimeError(f"tracker pool worker {process.pid} of stream {stream_id!r} died")
+        slot = self._wait(free_slots.get, block, timeout, [process])
+        if slot is None:
+            return False
+
+        arrays = {k: np.asarray(v) for k, v in detections.items() if v is not None}
+        layout = None
+        if all(arr.dtype != object for arr in arrays.values()):
+            buf = shm.buf[slot * self.slot_bytes:(slot + 1) * self.slot_bytes]
+            try:
+                layout = _pack(buf, arrays)
+            finally:
+                buf.release()
+        if layout is None: # object dtype or too large for a slot: pickled, slot still counts as in flight
+            commands.put(('update', stream_id, frame_meta, slot, None, arrays))
+        else:
+            commands.put(('update', stream_id, frame_meta, slot, layout, None))
+        return True
+
+    def get(self, timeout=None):
+        '''
+        Next `(stream_id, frame_meta, norfairResults)` from any worker. The
+        results are a snapshot of that frame; `roi` is the stream's roi config
+        and `trajectories` is not sent (the store lives in the worker).
+
+        Raises:
+            RuntimeError: if the tracker of that stream raised, or a worker died.
+            queue.Empty: on timeout.
+        '''
+        item = self._wait(self._results.get, True, timeout, [process for process, _, _, _ in self._workers])
+        if item is None:
+            raise queue.Empty
+        stream_id, frame_meta, results = item
+        if isinstance(results, Exception):
+            raise results
+        results = pickle.loads(results)
+        results.roi = self._rois.get(stream_id)
+        return stream_id, frame_meta, results
+
+    def _wait(self, get, block, timeout, processes):
+        '''
+        `get` in short steps until an item arrives (None on timeout), raising
+        instead of blocking forever once a worker died.
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            step = self._POLL if deadline is None else min(self._POLL, max(deadline - time.monotonic(), 0))
+            try:
+                return get(True, step) if block else get(False)
+            except queue.Empty:
+                pass
+            dead = [process.pid for process in processes if not process.is_alive()]
+            if dead:
+                raise RuntimeError(f"tracker pool worker(s) {dead} died")
+            if not block or (deadline is not None and time.monotonic() >= deadline):
+                return None
+
+    def close(self):
+        '''
+        Stop the workers and free the shared memory. Results not read with
+        `get` are discarded (they are drained so the workers can exit); a
+        worker still alive after `join_timeout` is terminated.
+        '''
+        if self._closed:
+            return
+        self._closed = True
+        for process, commands, _, _ in self._workers:
+            if process.is_alive():
+                commands.put(None)
+        deadline = time.monotonic() + self.join_timeout
+        # a worker only exits once its queued results are flushed to the pipe
+        while any(process.is_alive() for process, _, _, _ in self._workers) and time.monotonic() < deadline:
+            try:
+                self._results.get(timeout=self._POLL)
+            except queue.Empty:
+                pass
+        for process, commands, free_slots, shm in self._workers:
+            process.join(timeout=max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            for q in (commands, free_slots):
+                q.cancel_join_thread()
+            shm.close()
+            shm.unlink()
+        self._results.cancel_join_thread()
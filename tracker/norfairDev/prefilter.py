@@ -0,0 +1,119 @@
+import numpy as np
+
+class DetectionPrefilter:
+    '''
+    Vectorized clean-up of raw detections before matching, so that low-score
+    boxes and the near-duplicates left by the detector's NMS neither enter
+    the cost matrix nor spawn short-lived initializing objects.
+
+    Steps, in order:
+        - score: drop detections below the threshold of their label.
+        - duplicate: drop boxes overlapping a higher-scoring box of the same
+          label by more than `iou_threshold` (Fast NMS: one IoU matrix per
+          label, a box is suppressed by any higher-scoring box). Only for
+          (N, 4) boxes.
+        - cap: keep the `max_per_label` highest-scoring detections of each label.
+
+    Labels are compared as strings (as in norfair's distances), so the keys
+    of the per-label dicts may be ints or strings.
+
+    Example:
+        prefilter = DetectionPrefilter({'person': 0.4, 'car': 0.6}, min_score=0.3,
+                                       iou_threshold=0.8, max_per_label={'person': 200})
+        keep, dropped = prefilter.filter(boxes, scores, labels)
+
+    Parameters:
+        score_thresholds (optional): {label: min score}.
+        min_score (optional): threshold of the labels not in `score_thresholds`.
+        iou_threshold (optional): IoU above which a box is a duplicate.
+        max_per_label (optional): int for every label, or {label: cap}.
+    '''
+    STEPS = ('score', 'duplicate', 'cap')
+
+    def __init__(self, score_thresholds=None, min_score=None, iou_threshold=None, max_per_label=None):
+        self.score_thresholds = {str(k): v for k, v in (score_thresholds or {}).items()}
+        self.min_score = min_score
+        self.iou_threshold = iou_threshold
+        if isinstance(max_per_label, dict):
+            max_per_label = {str(k): v for k, v in max_per_label.items()}
+        self.max_per_label = max_per_label
+
+    def _per_label(self, spec, default, keys):
+        '''
+        Value of a per-label setting for every unique label key (nan when unset).
+        '''
+        if not isinstance(spec, dict):
+            spec, default = {}, spec
+        values = [spec.get(key, default) for key in keys]
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+    @staticmethod
+    def _duplicates(boxes, scores, iou_threshold):
+        '''
+        Fast NMS over one label's boxes: True where a higher-scoring box overlaps by more than `iou_threshold`.
+        '''
+        order = np.argsort(-scores, kind='stable')
+        b = boxes[order]
+        w = np.clip(np.minimum(b[:, None, 2], b[None, :, 2]) - np.maximum(b[:, None, 0], b[None, :, 0]), 0, None)
+        h = np.clip(np.minimum(b[:, None, 3], b[None, :, 3]) - np.maximum(b[:, None, 1], b[None, :, 1]), 0, None)
+        inter = w * h
+        area = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+        iou = inter / np.maximum(area[:, None] + area[None, :] - inter, 1e-12)
+        suppressed = np.triu(iou, 1).max(axis=0) > iou_threshold
+        out = np.empty(len(b), dtype=bool)
+        out[order] = suppressed
+        return out
+
+    def filter(self, points, scores=None, labels=None):
+        '''
+        Parameters:
+            points: (N, 4) boxes (x1, y1, x2, y2) or (N, 2) points.
+            scores (optional): (N,) or (N, P) scores (per-point scores are averaged).
+            labels (optional): (N,) labels.
+
+        Returns:
+            tuple: (keep, dropped) with `keep` an (N,) bool mask and `dropped`
+            the number of detections removed by each step.
+        '''
+        points = np.asarray(points)
+        n = len(points)
+        keep = np.ones(n, dtype=bool)
+        dropped = dict.fromkeys(self.STEPS, 0)
+        if n == 0:
+            return keep, dropped
+
+        if scores is not None:
+            scores = np.asarray(scores, dtype=np.float64).reshape(n, -1).mean(axis=1)
+        keys, groups = np.unique(np.asarray(labels if labels is not None else [None] * n).astype(str), return_inverse=True)
+        groups = groups.reshape(-1)
+
+        if scores is not None and (self.score_thresholds or self.min_score is not None):
+            thresholds = self._per_label(self.score_thresholds, self.min_score, keys)[groups]
+            low = scores < thresholds # nan threshold: never low
+            dropped['score'] = int(low.sum())
+            keep &= ~low
+
+        if self.iou_threshold is not None and points.ndim == 2 and points.shape[1] == 4 and keep.sum() > 1:
+            idx = np.flatnonzero(keep)
+            priority = scores[idx] if scores is not None else -idx.astype(np.float64)
+            sub_groups = groups[idx]
+            for g in np.unique(sub_groups):
+                rows = np.flatnonzero(sub_groups == g)
+                if len(rows) < 2:
+                    continue
+                dup = self._duplicates(points[idx[rows]].astype(np.float64), priority[rows], self.iou_threshold)
+                keep[idx[rows[dup]]] = False
+                dropped['duplicate'] += int(dup.sum())
+
+        if self.max_per_label is not None:
+            idx = np.flatnonzero(keep)
+            priority = scores[idx] if scores is not None else -idx.astype(np.float64)
+            order = np.lexsort((-priority, groups[idx])) # by label, then score descending
+            sorted_groups = groups[idx][order]
+            rank = np.arange(len(order)) - np.searchsorted(sorted_groups, sorted_groups, side='left')
+            caps = self._per_label(self.max_per_label, None, keys)[sorted_groups]
+            over = rank >= caps # nan cap: never over
+            keep[idx[order[over]]] = False
+            dropped['cap'] = int(over.sum())
+
+        return keep, dropped
@@ -0,0 +1,207 @@
+from norfair.distances import Distance
+import numpy as np
+
+class EmbeddingGallery:
+    '''
+    Recent Re-ID embeddings of every tracked object in one contiguous float32
+    arena: `vectors[slot]` holds the last `per_track` unit-normalized
+    embeddings of one object (ring buffer), so a set of candidates is scored
+    against a set of tracks with a single matrix multiply.
+
+    Objects are keyed by their `initializing_id`, which they keep from
+    creation on (also through re-identification merges). Slots are reclaimed
+    when the object leaves the tracker, when it got no embedding for more
+    than `max_age` frames, or least recently updated first when the arena is
+    full.
+
+    Parameters:
+        per_track: embeddings kept per object.
+        capacity: number of objects held.
+        max_age (optional): frames without a new embedding before an object is evicted.
+    '''
+    def __init__(self, per_track=4, capacity=256, max_age=None):
+        self.per_track = per_track
+        self.capacity = capacity
+        self.max_age = max_age
+        self.vectors = None # (capacity, per_track, dim), allocated on the first add
+        self.valid = np.zeros((capacity, per_track), dtype=bool)
+        self.head = np.zeros(capacity, dtype=np.int64)        # next write index per slot
+        self.last_update = np.full(capacity, -1, dtype=np.int64)
+        self.slot_of = {}
+        self.frame = 0
+        self.evicted = 0 # slots taken back from live objects (arena full)
+        self._key_of = [None] * capacity
+        self._free = list(range(capacity - 1, -1, -1))
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def __contains__(self, key):
+        return key in self.slot_of
+
+    def _slot(self, key):
+        slot = self.slot_of.get(key)
+        if slot is not None:
+            return slot
+        if self._free:
+            slot = self._free.pop()
+        else: # least recently updated
+            slot = int(np.argmin(self.last_update))
+            del self.slot_of[self._key_of[slot]]
+            self.evicted += 1
+        self.valid[slot] = False
+        self.head[slot] = 0
+        self.slot_of[key] = slot
+        self._key_of[slot] = key
+        return slot
+
+    def release(self, key):
+        slot = self.slot_of.pop(key, None)
+        if slot is not None:
+            self.valid[slot] = False
+            self.last_update[slot] = -1
+            self._key_of[slot] = None
+            self._free.append(slot)
+
+    def add(self, keys, embeddings):
+        '''
+        Append one embedding per object.
+
+        Parameters:
+            keys: object keys, one per row (unique).
+            embeddings: (N, D) embeddings.
+
+        Raises:
+            ValueError: on a dimension change or more objects than `capacity`.
+        '''
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(keys), -1)
+        if not len(keys):
+            return
+        if len(keys) > self.capacity:
+            raise ValueError(f"{len(keys)} embeddings for a gallery of capacity {self.capacity}")
+        if self.vectors is None:
+            self.vectors = np.zeros((self.capacity, self.per_track, embeddings.shape[1]), dtype=np.float32)
+        elif embeddings.shape[1] != self.vectors.shape[2]:
+            raise ValueError(f"embedding dimension {embeddings.shape[1]}, expected {self.vectors.shape[2]}")
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.where(norms > 0, norms, 1)
+        slots = np.empty(len(keys), dtype=np.int64)
+        for i, key in enumerate(keys):
+            slots[i] = slot = self._slot(key)
+            self.last_update[slot] = self.frame # protects it from eviction within this batch
+        heads = self.head[slots]
+        self.vectors[slots, heads] = embeddings
+        self.valid[slots, heads] = True
+        self.head[slots] = (heads + 1) % self.per_track
+
+    def prune(self, alive_keys=None):
+        '''
+        Drop the objects not in `alive_keys` and the ones older than `max_age`.
+        '''
+        if alive_keys is not None:
+            alive = alive_keys if isinstance(alive_keys, (set, dict)) else set(alive_keys)
+            for key in [key for key in self.slot_of if key not in alive]:
+                self.release(key)
+        if self.max_age is not None:
+            for slot in np.flatnonzero((self.last_update >= 0) & (self.frame - self.last_update > self.max_age)).tolist():
+                self.release(self._key_of[slot])
+
+    def step(self):
+        '''
+        Advance the frame clock used for age-based eviction.
+        '''
+        self.frame += 1
+
+    def state(self):
+        '''
+        Copy of the gallery contents, for checkpoints (see `load_state`).
+        '''
+        return {
+            'per_track': self.per_track,
+            'capacity': self.capacity,
+            'max_age': self.max_age,
+            'vectors': None if self.vectors is None else self.vectors.copy(),
+            'valid': self.valid.copy(),
+            'head': self.head.copy(),
+            'last_update': self.last_update.copy(),
+            'slot_of': dict(self.slot_of),
+            'frame': self.frame,
+            'evicted': self.evicted,
+        }
+
+    def load_state(self, state):
+        '''
+        Replace the gallery contents (and its size parameters) with a `state`.
+        '''
+        self.per_track = state['per_track']
+        self.capacity = state['capacity']
+        self.max_age = state['max_age']
+        self.vectors = None if state['vectors'] is None else state['vectors'].copy()
+        self.valid = state['valid'].copy()
+        self.head = state['head'].copy()
+        self.last_update = state['last_update'].copy()
+        self.slot_of = dict(state['slot_of'])
+        self.frame = state['frame']
+        self.evicted = state['evicted']
+        self._key_of = [None] * self.capacity
+        for key, slot in self.slot_of.items():
+            self._key_of[slot] = key
+        self._free = [slot for slot in range(self.capacity - 1, -1, -1) if self._key_of[slot] is None]
+        return self
+
+    def get(self, key):
+        '''
+        (k, D) stored unit embeddings of one object (k = 0 if unknown).
+        '''
+        slot = self.slot_of.get(key)
+        if slot is None or self.vectors is None:
+            return np.zeros((0, 0 if self.vectors is None else self.vectors.shape[2]), dtype=np.float32)
+        return self.vectors[slot][self.valid[slot]]
+
+    def similarity(self, query_keys, keys):
+        '''
+        Best cosine similarity between the stored embeddings of every pair of
+        objects, computed with one matrix multiply.
+
+        Returns:
+            np.ndarray: (len(query_keys), len(keys)); -inf where either object has no embedding.
+        '''
+        out = np.full((len(query_keys), len(keys)), -np.inf, dtype=np.float32)
+        if self.vectors is None or not len(query_keys) or not len(keys):
+            return out
+        query_slots = np.array([self.slot_of.get(k, -1) for k in query_keys], dtype=np.int64)
+        slots = np.array([self.slot_of.get(k, -1) for k in keys], dtype=np.int64)
+        rows, cols = np.flatnonzero(query_slots >= 0), np.flatnonzero(slots >= 0)
+        if not len(rows) or not len(cols):
+            return out
+
+        p, dim = self.per_track, self.vectors.shape[2]
+        a = self.vectors[query_slots[rows]].reshape(-1, dim)
+        b = self.vectors[slots[cols]].reshape(-1, dim)
+        sims = (a @ b.T).reshape(len(rows), p, len(cols), p)
+        mask = self.valid[query_slots[rows]][:, :, None, None] & self.valid[slots[cols]][None, None, :, :]
+        out[np.ix_(rows, cols)] = np.where(mask, sims, -np.inf).max(axis=(1, 3))
+        return out
+
+class GalleryReidDistance(Distance):
+    '''
+    Re-ID distance reading the embeddings from an `EmbeddingGallery` instead
+    of the objects' `past_detections`: 1 - best cosine similarity between
+    the stored embeddings of a candidate and of an object. Pairs with a
+    missing embedding or different labels get `inf`, which never matches.
+
+    Use through `norfairDevTracker.set_reid_gallery`, which also keeps the
+    gallery filled.
+    '''
+    def __init__(self, gallery:EmbeddingGallery):
+        self.gallery = gallery
+
+    def get_distances(self, objects, candidates):
+        sims = self.gallery.similarity([c.initializing_id for c in candidates],
+                                       [o.initializing_id for o in objects])
+        distance_matrix = 1 - sims
+        cand_labels = np.array([str(c.label) for c in candidates])
+        obj_labels = np.array([str(o.label) for o in objects])
+        distance_matrix[cand_labels[:, None] != obj_labels[None, :]] = np.inf
+        return distance_matrix
@@ -0,0 +1,410 @@
+import multiprocessing as mp
+import os
+import queue
+import time
+import traceback
+from multiprocessing import shared_memory
+import numpy as np
+
+from ...base.Regions import CompiledRegions
+from .results import norfairResults
+
+_ALIGN = 64
+
+def _aligned(nbytes):
+    return -(-nbytes // _ALIGN) * _ALIGN
+
+class SharedFrameRing:
+    '''
+    Fixed-size frames in one shared-memory block. The decoder writes each
+    frame once; every process attached to the ring (detector, renderer,
+    encoder) reads and draws on it in place, so frames are never copied or
+    pickled between processes.
+
+    Slots are handed out through a free-slot queue: `acquire`/`write` block
+    while every slot is in flight (back-pressure on the decoder), and the
+    last consumer of a frame gives its slot back with `release`. Each slot
+    also records the index of the frame it holds, so a reader can check that
+    the slot still holds the frame it was told about.
+
+    The ring pickles by name: pass it to a `multiprocessing.Process` and the
+    child attaches to the same memory.
+
+    Example:
+        ring = SharedFrameRing((1080, 1920, 3), slots=8)
+        for index, slot in ring.feed(frames):   # decoder: one write per frame
+            image = ring.frame(slot)            # zero-copy view
+            ...
+            ring.release(slot)
+
+    Parameters:
+        shape: frame shape (H, W, C).
+        dtype: frame dtype.
+        slots: number of frames in flight.
+        start_method: multiprocessing start method of the processes sharing the ring.
+    '''
+    def __init__(self, shape, dtype=np.uint8, slots=8, start_method=None):
+        self.shape = tuple(int(s) for s in shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        self._free = mp.get_context(start_method).Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+        self._shm = shared_memory.SharedMemory(create=True, size=self._header_bytes() + slots * self._frame_bytes())
+        self._owner = os.getpid() # only the creating process frees the memory (also under fork)
+        self._map()
+        self._index[:] = -1
+
+    def _header_bytes(self):
+        return _aligned(self.slots * 8)
+
+    def _frame_bytes(self):
+        return _aligned(int(np.prod(self.shape)) * self.dtype.itemsize)
+
+    def _map(self):
+        buf = self._shm.buf
+        header, frame_bytes = self._header_bytes(), self._frame_bytes()
+        self._index = np.ndarray(self.slots, dtype=np.int64, buffer=buf)
+        self._frames = [np.ndarray(self.shape, dtype=self.dtype, buffer=buf, offset=header + slot * frame_bytes)
+                        for slot in range(self.slots)]
+
+    def __getstate__(self):
+        return {'name': self._shm.name, 'shape': self.shape, 'dtype': self.dtype.str,
+                'slots': self.slots, 'free': self._free}
+
+    def __setstate__(self, state):
+        self.shape = state['shape']
+        self.dtype = np.dtype(state['dtype'])
+        self.slots = state['slots']
+        self._free = state['free']
+        self._shm = shared_memory.SharedMemory(name=state['name'])
+        self._owner = None
+        self._map()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def acquire(self, block=True, timeout=None):
+        '''
+        A free slot for the next frame, or None when none freed up in time.
+        '''
+        try:
+            return self._free.get(block, timeout)
+        except queue.Empty:
+            return None
+
+    def publish(self, slot, index):
+        '''
+        Record that `slot` now holds frame `index` (after filling `frame(slot)` directly).
+        '''
+        self._index[slot] = index
+
+    def write(self, frame, index, block=True, timeout=None):
+        '''
+        Copy one decoded frame into a free slot.
+
+        Returns:
+            int: the slot, or None if no slot freed up within `timeout`.
+
+        Raises:
+            ValueError: if the frame does not match the ring's shape.
+        '''
+        frame = np.asarray(frame)
+        if frame.shape != self.shape:
+            raise ValueError(f"frame shape {frame.shape}, ring holds {self.shape}")
+        slot = self.acquire(block, timeout)
+        if slot is None:
+            return None
+        np.copyto(self._frames[slot], frame, casting='unsafe')
+        self.publish(slot, index)
+        return slot
+
+    def feed(self, source, start=0):
+        '''
+        Write the frames of an iterable and yield `(index, slot)` for each.
+        '''
+        for index, frame in enumerate(source, start):
+            yield index, self.write(frame, index)
+
+    def frame(self, slot):
+        '''
+        The frame in `slot`, as a view into shared memory (valid until the slot is released).
+        '''
+        return self._frames[slot]
+
+    def index(self, slot):
+        '''
+        Index of the frame in `slot` (-1 if the slot is free).
+        '''
+        return int(self._index[slot])
+
+    def release(self, slot):
+        self._index[slot] = -1
+        self._free.put(slot)
+
+    def close(self):
+        '''
+        Detach from the ring; the process that created it also frees the memory.
+        Views returned by `frame` must not be used afterwards.
+        '''
+        if self._shm is None:
+            return
+        self._index = self._frames = None
+        self._shm.close()
+        if self._owner == os.getpid():
+            self._shm.unlink()
+        self._shm = None
+
+def compact_results(results:norfairResults):
+    '''
+    What a renderer needs from a `norfairResults`, as a few small arrays:
+    ids, update flags, estimates, last detection points and boxes, labels and
+    the distance threshold. Cheap to pickle; no pixel data, and not the roi
+    (`RenderOffload` sends that only when it changes).
+    '''
+    ids = results.ids_array
+    if ids is None:
+        ids = np.zeros(0, dtype=np.int64)
+    points = results.last_det_points or []
+    try:
+        points = np.stack([np.asarray(p, dtype=np.float64) for p in points]) if len(points) else np.zeros((0, 1, 2))
+    except ValueError: # objects with different point layouts
+        points = [np.asarray(p) for p in points]
+    return {
+        'ids': ids,
+        'is_update': results.is_update_detections_array if results.is_update_detections_array is not None else np.ones(len(ids), dtype=bool),
+        'estimate': results.estimate_array if results.estimate_array is not None else results.estimate,
+        'points': points,
+        'boxes': results.boxes_array if results.boxes_array is not None else np.full((len(ids), 4), np.nan),
+        'labels': results.labels,
+        'distance_threshold': results.DISTANCE_THRESHOLD,
+    }
+
+def _results_from_compact(payload, roi):
+    ids = payload['ids']
+    boxes = payload['boxes']
+    estimate = payload['estimate']
+    results = norfairResults(
+        ids=ids.tolist(),
+        labels=payload['labels'],
+        last_det_points=list(payload['points']),
+        last_det_bounding_boxes=[None if np.isnan(box).any() else box for box in boxes],
+        estimate=list(estimate) if estimate is not None else None,
+        is_update_detections=payload['is_update'].tolist(),
+        DISTANCE_THRESHOLD=payload['distance_threshold'],
+        roi=roi,
+        ids_array=ids,
+        boxes_array=boxes,
+        is_update_detections_array=payload['is_update'],
+    )
+    results.index = dict(zip(results.ids, range(len(ids))))
+    return results
+
+class VideoSink:
+    '''
+    Encoder for `RenderOffload`: writes the composed frames to a video file
+    with OpenCV, from the render process. The writer is opened on the first
+    frame (its size is taken from the frame).
+
+    Parameters:
+        path: output file.
+        fps: frame rate.
+        fourcc: four-character codec code.
+    '''
+    def __init__(self, path, fps=30.0, fourcc='mp4v'):
+        self.path = str(path)
+        self.fps = fps
+        self.fourcc = fourcc
+        self._writer = None
+
+    def __call__(self, image, index):
+        if self._writer is None:
+            import cv2
+            h, w = image.shape[:2]
+            self._writer = cv2.VideoWriter(self.path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, (w, h))
+        self._writer.write(image)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+def _render_main(ring, jobs, done, sink, draw_kwargs, color_mapping_keys, hold_frames):
+    from .drawer import norfairDrawer # the drawing stack is only loaded here
+    drawer = norfairDrawer()
+    if color_mapping_keys is not None:
+        drawer.color_mapping_keys = color_mapping_keys
+    roi = None
+    frames, draw_seconds = 0, 0.0
+    try:
+        while True:
+            message = jobs.get()
+            if message is None:
+                break
+            if message[0] == 'roi':
+                roi = message[1]
+                continue
+
+            _, slot, index, payload = message
+            release = not hold_frames
+            try:
+                if ring.index(slot) != index:
+                    raise RuntimeError(f"slot {slot} holds frame {ring.index(slot)}, expected {index}")
+                t0 = time.perf_counter()
+                image = ring.frame(slot)
+                drawer.draw_tracker_results(image, _results_from_compact(payload, roi), inplace=True, **draw_kwargs)
+                if sink is not None:
+                    sink(image, index)
+                draw_seconds += time.perf_counter() - t0
+                frames += 1
+                if hold_frames:
+                    done.put((index, slot, None))
+            except Exception as e:
+                release = True # the consumer never sees this slot
+                done.put((index, slot, RuntimeError(f"frame {index}: {e!r}\n{traceback.format_exc()}")))
+            if release:
+                ring.release(slot)
+    finally:
+        close = getattr(sink, 'close', None)
+        if callable(close):
+            close()
+        done.put(('stats', {'frames': frames, 'draw_seconds': draw_seconds}, None))
+        ring.close()
+
+class RenderOffload:
+    '''
+    Composes the tracker's overlays in a separate process, straight into the
+    frames of a `SharedFrameRing`.
+
+    The tracking process only sends each frame's slot and its compact
+    results (`compact_results`); it never reads pixels, and the tracker only
+    needs `ring.shape` for roi scaling. The render process draws in place
+    into the shared frame and hands it to `sink` (e.g. `VideoSink`), then
+    frees the slot; with `hold_frames` the composed frame stays in its slot
+    and is reported by `get` instead, and the consumer calls `ring.release`.
+
+    Example:
+        ring = SharedFrameRing((1080, 1920, 3), slots=8)
+        with RenderOffload(ring, sink=VideoSink('out.mp4', fps=25)) as render:
+            for index, slot in ring.feed(frames):
+                detections = detector(ring.frame(slot))
+                results = tracker.update_detections_batch(ring.shape, **detections)
+                render.submit(slot, results)
+        ring.close()
+
+    Parameters:
+        ring: `SharedFrameRing` holding the frames.
+        sink (optional): picklable callable(image, index), called in the render
+            process for every composed frame; its `close()` is called at the end.
+        draw_kwargs (optional): extra arguments for `draw_tracker_results`
+            (trails are not available: the trajectory store lives in the tracker).
+        color_mapping_keys (optional): roi colors, e.g. `tracker.color_mapping_keys`.
+        hold_frames: keep composed frames in their slots and report them through `get`.
+        start_method: multiprocessing start method (default: platform default).
+    '''
+    def __init__(self,
+                 ring:SharedFrameRing,
+                 sink=None,
+                 draw_kwargs=None,
+                 color_mapping_keys=None,
+                 hold_frames=False,
+                 start_method=None):
+        ctx = mp.get_context(start_method)
+        self.ring = ring
+        self.hold_frames = hold_frames
+        self.stats = None
+        self._jobs = ctx.Queue()
+        self._done = ctx.Queue()
+        self._roi_signature = None
+        self._ended = False # end-of-stream ('stats') message received
+        self._closed = False
+        self._process = ctx.Process(target=_render_main,
+                                    args=(ring, self._jobs, self._done, sink, dict(draw_kwargs or {}),
+                                          color_mapping_keys, hold_frames),
+                                    daemon=True)
+        self._process.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, slot, results:norfairResults, index=None):
+        '''
+        Queue the overlay of one frame.
+
+        Parameters:
+            slot: ring slot holding the frame.
+            results: the tracker's results for that frame.
+            index (optional): frame index (default: the one recorded in the slot).
+        '''
+        if self._closed:
+            raise RuntimeError("render process is closed")
+        if index is None:
+            index = self.ring.index(slot)
+        signature = CompiledRegions.signature(results.roi) # by content: the roi dict may be edited in place
+        if signature != self._roi_signature:
+            self._roi_signature = signature
+            roi = None if results.roi is None else {key: np.array(val) for key, val in results.roi.items()}
+            self._jobs.put(('roi', roi))
+        self._jobs.put(('frame', slot, index, compact_results(results)))
+
+    def get(self, timeout=None):
+        '''
+        Next composed `(index, slot)` (with `hold_frames`).
+
+        Raises:
+            RuntimeError: if drawing or the sink raised for a frame (its slot is already released).
+            EOFError: once the render process has finished (after `close`), no more frames will come.
+            queue.Empty: on timeout.
+        '''
+        if self._ended:
+            raise EOFError("render process finished")
+        index, slot, error = self._done.get(timeout=timeout)
+        if index == 'stats':
+            self.stats = slot
+            self._ended = True
+            raise EOFError("render process finished")
+        if error is not None:
+            raise error
+        return index, slot
+
+    def close(self):
+        '''
+        Render everything submitted so far and stop the render process.
+        `stats` then holds the frames drawn and the time spent drawing.
+
+        Raises:
+            RuntimeError: for the first frame that failed, if any was not reported by `get`.
+        '''
+        if self._closed:
+            return
+        self._closed = True
+        self._jobs.put(None)
+        error = None
+        while not self._ended: # `get` may already have read the end-of-stream message
+            try:
+                index, slot, e = self._done.get(timeout=1.0)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    break
+                continue
+            if index == 'stats':
+                self.stats = slot
+                self._ended = True
+                break
+            if e is not None and error is None:
+                error = e
+            elif e is None: # held frame nobody collected
+                self.ring.release(slot)
+        self._process.join()
+        if error is not None:
+            raise error
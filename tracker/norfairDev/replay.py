@@ -0,0 +1,162 @@
+import itertools
+import json
+import time
+from pathlib import Path
+import numpy as np
+
+from .tracker import norfairDevTracker
+
+class DetectionLogWriter:
+    '''
+    Records detector output (boxes, scores, labels per frame) for offline
+    replay. Written as a directory of .npy files that `DetectionLog`
+    memory-maps:
+
+        boxes.npy (M, 4 or 2), scores.npy (M,), labels.npy (M,), offsets.npy (F + 1,), meta.json
+
+    Parameters:
+        path: output directory (created).
+        frame_shape: (h, w) of the recorded frames, used to scale the roi config on replay.
+    '''
+    def __init__(self, path, frame_shape):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.frame_shape = tuple(int(v) for v in frame_shape[:2])
+        self._boxes, self._scores, self._labels = [], [], []
+        self._counts = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, boxes, scores=None, labels=None):
+        '''
+        Add the detections of one frame (an empty `boxes` for a frame without detections).
+        '''
+        boxes = np.asarray(boxes, dtype=np.float64)
+        n = len(boxes)
+        boxes = boxes.reshape(n, boxes.shape[-1] if boxes.ndim > 1 else -1) if n else boxes.reshape(0, 0)
+        self._boxes.append(boxes)
+        self._scores.append(np.ones(n) if scores is None else np.asarray(scores, dtype=np.float64).reshape(n))
+        self._labels.append(np.full(n, '', dtype=str) if labels is None else np.asarray(labels).astype(str).reshape(n))
+        self._counts.append(n)
+
+    def close(self):
+        width = next((b.shape[1] for b in self._boxes if len(b)), 4)
+        boxes = np.concatenate([b.reshape(-1, width) for b in self._boxes]) if self._boxes else np.zeros((0, width))
+        np.save(self.path / 'boxes.npy', boxes)
+        np.save(self.path / 'scores.npy', np.concatenate(self._scores) if self._scores else np.zeros(0))
+        np.save(self.path / 'labels.npy', np.concatenate(self._labels) if self._labels else np.zeros(0, dtype=str))
+        np.save(self.path / 'offsets.npy', np.concatenate([[0], np.cumsum(self._counts, dtype=np.int64)]))
+        with open(self.path / 'meta.json', 'w') as f:
+            json.dump({'frame_shape': list(self.frame_shape), 'frames': len(self._counts)}, f)
+
+class DetectionLog:
+    '''
+    Memory-mapped detection log written by `DetectionLogWriter`. Iterating
+    yields one `update_detections_batch` kwargs dict per frame.
+    '''
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / 'meta.json') as f:
+            meta = json.load(f)
+        self.frame_shape = tuple(meta['frame_shape'])
+        self.boxes = np.load(self.path / 'boxes.npy', mmap_mode='r')
+        self.scores = np.load(self.path / 'scores.npy', mmap_mode='r')
+        self.labels = np.load(self.path / 'labels.npy', mmap_mode='r')
+        self.offsets = np.load(self.path / 'offsets.npy')
+        self.has_labels = bool(len(self.labels)) and bool((np.asarray(self.labels) != '').any())
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return {
+            'boxes': self.boxes[lo:hi],
+            'scores': self.scores[lo:hi],
+            'labels': self.labels[lo:hi] if self.has_labels else None,
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+def replay(tracker:norfairDevTracker, log:DetectionLog):
+    '''
+    Run `tracker` over every frame of `log`, without images (only the frame
+    shape is passed, for roi scaling). A track log attached to the tracker is
+    flushed at the end, including the last frame.
+
+    Returns:
+        dict: timing (seconds, fps) and track statistics (tracks, mean/median
+        track length in frames, mean active objects per frame).
+    '''
+    lengths = {}
+    active = 0
+    frame_shape = log.frame_shape
+    t0 = time.perf_counter()
+    for detections in log:
+        results = tracker.update_detections_batch(frame_shape, **detections)
+        ids = results.ids_array
+        active += len(ids)
+        for idx in ids.tolist():
+            lengths[idx] = lengths.get(idx, 0) + 1
+    if tracker.track_log is not None:
+        tracker.flush_track_log()
+    seconds = time.perf_counter() - t0
+
+    track_lengths = np.array(list(lengths.values()))
+    frames = len(log)
+    return {
+        'frames': frames,
+        'seconds': seconds,
+        'fps': frames / seconds if seconds > 0 else None,
+        'tracks': len(lengths),
+        'mean_track_length': float(track_lengths.mean()) if len(track_lengths) else 0.0,
+        'median_track_length': float(np.median(track_lengths)) if len(track_lengths) else 0.0,
+        'mean_active': active / frames if frames else 0.0,
+    }
+
+def _expand_grid(grid):
+    if isinstance(grid, dict):
+        keys = list(grid)
+        return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    return [dict(g) for g in grid]
+
+def _run_config(log_path, config, regions):
+    tracker = norfairDevTracker.from_config(config).set_tracker(**(regions or {}))
+    return replay(tracker, DetectionLog(log_path))
+
+def sweep(log_path, base_config, grid, regions=None, processes=None):
+    '''
+    Replay one detection log under many tracker configs in parallel, one
+    config per worker task.
+
+    Example:
+        base = yaml.safe_load(open('tracker_config/norfairDevTracker ....yaml'))
+        rows = sweep('logs/cam0_dets', base, {'distance_threshold': [30, 50, 80],
+                                             'hit_counter_max': [10, 15, 30]},
+                     regions={'roi': roi_polygon})
+
+    Parameters:
+        log_path: `DetectionLogWriter` directory (each worker maps it itself).
+        base_config: dict as written by `save_config`.
+        grid: dict of lists (cartesian product) or a list of override dicts.
+        regions (optional): region config passed to `set_tracker`.
+        processes (optional): worker processes (default: cpu count).
+
+    Returns:
+        list: `{'overrides': ..., 'config': ..., 'stats': ...}` per config, in grid order.
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+    overrides = _expand_grid(grid)
+    configs = [{**base_config, **o} for o in overrides]
+    with ProcessPoolExecutor(processes) as pool:
+        futures = [pool.submit(_run_config, str(log_path), config, regions) for config in configs]
+        return [
+            {'overrides': o, 'config': config, 'stats': future.result()}
+            for o, config, future in zip(overrides, configs, futures)
+        ]
@@ -1,10 +1,54 @@
 from ...base.Results import BaseResultsTracker
-from typing import List, Any, Optional
-from dataclasses import dataclass
+from typing import List, Any, Optional, Dict
+from dataclasses import dataclass, field
+import numpy as np
 
 @dataclass
 class norfairResults(BaseResultsTracker):
+    '''
+    Tracker results for one frame.
+
+    The `*_array` fields are the columnar store: contiguous arrays where row i
+    belongs to object `ids_array[i]`, and `index` maps id -> row. The list
+    fields (ids, ages, estimate, ...) are list views of the same rows, kept
+    for drawers and callbacks written against the list API.
+    '''
     estimate: Optional[List[Any]] = None
     hit_counter: List[int] = None
     DISTANCE_THRESHOLD:float = None
-    is_update_detections: List[int] = None
\ No newline at end of file
+    is_update_detections: List[int] = None
+
+    ids_array: Optional[np.ndarray] = None
+    ages_array: Optional[np.ndarray] = None
+    hit_counter_array: Optional[np.ndarray] = None
+    estimate_array: Optional[np.ndarray] = None
+    boxes_array: Optional[np.ndarray] = None
+    is_update_detections_array: Optional[np.ndarray] = None
+    index: Dict[Any, int] = field(default_factory=dict)
+
+    is_predicted: bool = False # produced by a prediction-only step (no detections)
+
+    # detections removed by `set_prefilter` in this update, per step (score, duplicate, cap)
+    detections_dropped: Dict[str, int] = field(default_factory=dict)
+
+    gating_pairs_evaluated: Optional[int] = None
+    gating_pairs_pruned: Optional[int] = None
+
+    # zone analytics (`set_zones`), rows aligned with ids_array
+    zone_keys: List[str] = field(default_factory=list)
+    zone_membership: Optional[np.ndarray] = None
+    zone_dwell: Optional[np.ndarray] = None
+    zone_occupancy: Dict[str, int] = field(default_factory=dict)
+    zone_events: List[tuple] = field(default_factory=list)
+
+    # live TrajectoryStore (`set_trajectories`), not a per-frame copy
+    trajectories: Optional[Any] = None
+    # (N, k, 2) trails snapshot, rows aligned with ids_array; when set, the
+    # drawer uses it instead of reading the live store (see TrackingPipeline)
+    trails: Optional[np.ndarray] = None
+
+    def row(self, idx):
+        '''
+        Row of object `idx` in the columnar arrays, or None if it is not in this frame.
+        '''
+        return self.index.get(idx)
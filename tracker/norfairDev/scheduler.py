@@ -0,0 +1,102 @@
+import numpy as np
+
+class DetectionScheduler:
+    '''
+    Decides on which frames the detector has to run. In between, the
+    tracker runs prediction-only steps (`norfairDevTracker.predict`), and
+    detection frames pass `period` = frames since the last detection, so
+    hit counters behave as if every frame had been detected.
+
+    The interval k is re-planned after every detection frame:
+    - motion: objects may move at most `motion_budget * distance_threshold`
+      pixels between detections, using the 90th percentile of the track speeds;
+    - churn: if more than `churn_threshold` of the tracks appeared or
+      disappeared since the last detection frame, k drops to `min_interval`.
+
+    Example:
+        scheduler = DetectionScheduler(tracker, max_interval=4)
+        for frame in frames:
+            if scheduler.should_detect():
+                results = scheduler.update(frame, **detector(frame))
+            else:
+                results = scheduler.update(frame)
+        print(scheduler.detector_ratio)
+
+    Parameters:
+        tracker: `norfairDevTracker`.
+        min_interval, max_interval: bounds of k (frames per detection).
+        motion_budget: fraction of `distance_threshold` an object may move between
+            detections; assumes a pixel distance (euclidean, ...). None disables
+            the motion rule (e.g. for iou).
+        churn_threshold: relative track churn that forces `min_interval`.
+    '''
+    def __init__(self, tracker, min_interval=1, max_interval=4, motion_budget=0.5, churn_threshold=0.2):
+        if not 1 <= min_interval <= max_interval:
+            raise ValueError("expected 1 <= min_interval <= max_interval")
+        self.tracker = tracker
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.motion_budget = motion_budget
+        self.churn_threshold = churn_threshold
+        self.interval = min_interval
+        self.frames = 0
+        self.detections_run = 0
+        self._since_detection = 0
+        self._ids = set()
+
+    @property
+    def detector_ratio(self):
+        '''
+        Fraction of frames on which the detector ran.
+        '''
+        return self.detections_run / self.frames if self.frames else None
+
+    def should_detect(self):
+        return self._since_detection + 1 >= self.interval or self.frames == 0
+
+    def update(self, frame, **detections):
+        '''
+        Advance one frame: a detection update if `detections` (the
+        `update_detections_batch` arguments) are given, a prediction-only
+        step otherwise. On a frame where the detector ran and found nothing,
+        pass an empty detection set (`boxes=np.zeros((0, 4))`), so that the
+        objects are penalized for the missed frame.
+
+        Returns:
+            norfairResults: `is_predicted` tells whether they come from a prediction-only step.
+        '''
+        self.frames += 1
+        self._since_detection += 1
+        if not detections:
+            return self.tracker.predict()
+
+        results = self.tracker.update_detections_batch(frame, period=self._since_detection, **detections)
+        self.detections_run += 1
+        self._since_detection = 0
+        self.interval = self._plan()
+        return results
+
+    def step(self, frame, detector):
+        '''
+        `update` that calls `detector(frame)` only when a detection is due.
+        A detector returning an empty dict counts as a detection with no boxes.
+        '''
+        if self.should_detect():
+            return self.update(frame, **(detector(frame) or {'boxes': np.zeros((0, 4))}))
+        return self.update(frame)
+
+    def _plan(self):
+        objects = [obj for obj in self.tracker.tracked_objects if not obj.is_initializing]
+        ids = {obj.id for obj in objects}
+        churn = len(ids ^ self._ids) / max(len(ids), 1)
+        self._ids = ids
+        if churn > self.churn_threshold or not objects:
+            return self.min_interval
+
+        if self.motion_budget is None:
+            return self.max_interval
+        speeds = np.array([np.linalg.norm(obj.estimate_velocity.mean(axis=0)) for obj in objects])
+        speed = np.percentile(speeds, 90)
+        budget = self.motion_budget * self.tracker.distance_threshold
+        k = int(budget / speed) if speed > 0 else self.max_interval
+        return int(np.clip(k, self.min_interval, self.max_interval))
@@ -0,0 +1,343 @@
+import copy
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from .tracker import norfairDevTracker, norfairDevTrackedObject, _result_columns
+from .results import norfairResults
+
+def _greedy_pairs(dist, threshold):
+    '''
+    Greedy one-to-one matching by increasing distance, pairs below `threshold`.
+    '''
+    rows, cols = np.nonzero(dist < threshold)
+    order = np.argsort(dist[rows, cols], kind='stable')
+    used_rows, used_cols, pairs = set(), set(), []
+    for r, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        pairs.append((r, c))
+    return pairs
+
+def tile_grid(frame_size, tile_size, overlap):
+    '''
+    Overlapping tiles covering a frame.
+
+    Parameters:
+        frame_size: (h, w) of the frame.
+        tile_size: (h, w) of one tile (clipped to the frame).
+        overlap: overlap between neighbouring tiles, in pixels.
+
+    Returns:
+        list: (x0, y0, x1, y1) per tile, row by row.
+    '''
+    def starts(length, tile):
+        tile = min(tile, length)
+        stride = max(tile - overlap, 1)
+        values = list(range(0, length - tile + 1, stride))
+        if values[-1] + tile < length:
+            values.append(length - tile)
+        return values, tile
+
+    h, w = frame_size
+    ys, th = starts(h, tile_size[0])
+    xs, tw = starts(w, tile_size[1])
+    return [(x, y, x + tw, y + th) for y in ys for x in xs]
+
+def tile_regions(roi, frame_size, tile):
+    '''
+    Normalized region config of the whole frame, re-normalized to one tile
+    (polygons may extend beyond [0, 1], which the region tests handle).
+    '''
+    h, w = frame_size
+    x0, y0, x1, y1 = tile
+    scale = np.array([w, h], dtype=np.float64)
+    origin = np.array([x0, y0], dtype=np.float64)
+    size = np.array([x1 - x0, y1 - y0], dtype=np.float64)
+    return {
+        key: ((np.asarray(polygon, dtype=np.float64).reshape(-1, 2) * scale - origin) / size).tolist()
+        for key, polygon in roi.items()
+    }
+
+class TiledTracker:
+    '''
+    Tracker for very large frames (8K, stitched panoramas): the frame is split
+    into overlapping tiles and every tile runs its own `norfairDevTracker` in
+    tile coordinates, the tiles being updated in parallel threads.
+
+    A detection is sent to every tile that contains its center, so an object
+    in an overlap is tracked by both tiles. Tile tracks are mapped to global
+    ids:
+    - a global id stays with its current tile as long as that tile tracks it;
+    - a tile track that appears near a track of another tile is linked to its
+      global id as a shadow (not reported), and takes over when the owner
+      loses the object, so objects crossing a border keep their id;
+    - a new tile track near a global id lost in the last `handoff_age` frames
+      takes that id over; otherwise it gets a new global id.
+
+    Overlaps should be wider than the distance objects travel while their
+    shadow track initializes (`initialization_delay` frames).
+
+    Unlike `norfairDevTracker.Results`, the merged results describe the state
+    after the current update.
+
+    Example:
+        tracker = TiledTracker(dict(distance_function='euclidean', distance_threshold=50),
+                               tile_size=(1080, 1920), overlap=192).set_tracker(roi=roi)
+        results = tracker.update_detections_batch(frame, boxes, scores)
+
+    Parameters:
+        tracker_kwargs: constructor arguments of the tile trackers; every tile
+            gets its own deep copy (filter factories and distances are not shared
+            between tiles, which run in parallel threads).
+        tile_size: (h, w) of a tile in pixels.
+        overlap: overlap between neighbouring tiles in pixels.
+        num_workers: threads updating the tiles (default: one per tile, at most the cpu count).
+        handoff_distance: max distance in pixels between the centers of two
+            tile tracks (or a track and a lost id) to hand the global id over.
+        handoff_age: frames a lost global id can still be taken over.
+        tracker_class: tile tracker class.
+    '''
+    def __init__(self,
+                 tracker_kwargs:dict,
+                 tile_size=(1080, 1920),
+                 overlap=128,
+                 num_workers=None,
+                 handoff_distance=32.0,
+                 handoff_age=3,
+                 tracker_class=norfairDevTracker):
+        if overlap >= min(tile_size):
+            raise ValueError("overlap must be smaller than the tile size")
+        self.tracker_kwargs = dict(tracker_kwargs)
+        self.tile_size = tuple(tile_size)
+        self.overlap = overlap
+        self.num_workers = num_workers
+        self.handoff_distance = handoff_distance
+        self.handoff_age = handoff_age
+        self.tracker_class = tracker_class
+
+        self.Results = norfairResults()
+        self._drawer = None
+        self.tiles = []     # (x0, y0, x1, y1) per tile
+        self.trackers = []  # one tracker per tile
+        self.frame_count = 0
+        self._frame_size = None
+        self._set_tracker_args = (norfairDevTrackedObject, None, {})
+        self._executor = None
+        self._reset_ids()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _reset_ids(self):
+        self._gid_of = {}     # (tile, local id) -> global id
+        self._owner = {}      # global id -> tile
+        self._last_seen = {}  # global id -> (center, frame)
+        self._next_id = 1
+
+    def set_tracker(self, custom_tracked_object=norfairDevTrackedObject, color_mapping_keys=None, **roi):
+        '''
+        Same as `norfairDevTracker.set_tracker`; the normalized region config
+        is converted to every tile (see `tile_regions`).
+        '''
+        self._set_tracker_args = (custom_tracked_object, color_mapping_keys, roi)
+        self.Results.roi = roi
+        if color_mapping_keys is not None and self._drawer is not None:
+            self._drawer.color_mapping_keys = color_mapping_keys
+        self._frame_size = None # tiles are rebuilt on the next frame
+        return self
+
+    @property
+    def Drawer(self):
+        '''
+        `norfairDrawer` for the merged results, created on first access.
+        '''
+        if self._drawer is None:
+            from .drawer import norfairDrawer
+            self._drawer = norfairDrawer(self.Results)
+            if self._set_tracker_args[1] is not None:
+                self._drawer.color_mapping_keys = self._set_tracker_args[1]
+        return self._drawer
+
+    def _build(self, frame_size):
+        '''
+        (Re)create the tiles and their trackers for a frame size; tracks restart.
+        '''
+        self.close()
+        custom_tracked_object, color_mapping_keys, roi = self._set_tracker_args
+        self.tiles = tile_grid(frame_size, self.tile_size, self.overlap)
+        self.trackers = []
+        for tile in self.tiles:
+            tracker = self.tracker_class(**copy.deepcopy(self.tracker_kwargs))
+            set_tracker_kwargs = tile_regions(roi, frame_size, tile) if roi else {}
+            if color_mapping_keys is not None:
+                tracker.set_tracker(custom_tracked_object, color_mapping_keys, **set_tracker_kwargs)
+            else:
+                tracker.set_tracker(custom_tracked_object, **set_tracker_kwargs)
+            self.trackers.append(tracker)
+        self._frame_size = frame_size
+        self._reset_ids()
+        self.Results.DISTANCE_THRESHOLD = self.trackers[0].distance_threshold
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def update_detections_batch(self, frame, boxes, scores=None, labels=None, embeddings=None, data=None, **update_params):
+        '''
+        Split one frame of detections over the tiles and update every tile tracker.
+
+        Parameters:
+            frame: the frame or its shape (h, w[, c]); required.
+            boxes: (N, 4) boxes or (N, 2) points in frame coordinates.
+            scores, labels, embeddings, data (optional): as in
+                `norfairDevTracker.update_detections_batch`. `data` is passed
+                through untouched (its coordinates are not converted to the tile),
+                so its `box_coords` stay in frame coordinates, also in the merged results.
+            **update_params: Extra parameters passed to the tile trackers' `update()`.
+
+        Returns:
+            norfairResults: merged results, in frame coordinates and global ids.
+        '''
+        if frame is None:
+            raise ValueError("frame (or its shape) is required to lay out the tiles")
+        frame_size = norfairDevTracker._frame_size(frame)
+        if frame_size != self._frame_size:
+            self._build(frame_size)
+
+        boxes = norfairDevTracker._as_array(boxes)
+        if boxes.ndim != 2 or boxes.shape[1] not in (2, 4):
+            raise ValueError(f"boxes must be a 2D array with shape (N, 2) or (N, 4), got {boxes.shape}")
+        scores = norfairDevTracker._as_array(scores)
+        labels = norfairDevTracker._as_array(labels)
+        embeddings = norfairDevTracker._as_array(embeddings)
+        centers = boxes.reshape(len(boxes), -1, 2).mean(axis=1)
+
+        def run(t):
+            x0, y0, x1, y1 = self.tiles[t]
+            inside = ((centers[:, 0] >= x0) & (centers[:, 0] < x1)
+                      & (centers[:, 1] >= y0) & (centers[:, 1] < y1))
+            offset = np.tile([x0, y0], boxes.shape[1] // 2)
+            take = norfairDevTracker._take
+            self.trackers[t].update_detections_batch(
+                (y1 - y0, x1 - x0),
+                boxes[inside] - offset,
+                scores=take(scores, inside),
+                labels=take(labels, inside),
+                embeddings=take(embeddings, inside),
+                data=take(data, inside),
+                **update_params,
+            )
+
+        tiles = range(len(self.tiles))
+        workers = min(self.num_workers or len(self.tiles), len(self.tiles))
+        if workers > 1:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(workers)
+            list(self._executor.map(run, tiles))
+        else:
+            for t in tiles:
+                run(t)
+
+        self._merge()
+        self.frame_count += 1
+        return self.Results
+
+    def _assign_ids(self, keys, centers):
+        '''
+        Global id per tile track (-1 for shadows that are not reported).
+        '''
+        n = len(keys)
+        gids = np.full(n, -1, dtype=np.int64)
+        claimed = {} # global id -> entry
+        gid_of, owner = self._gid_of, self._owner
+
+        # owners keep their ids, then linked shadows take over ids whose owner lost them
+        for owner_pass in (True, False):
+            for e, key in enumerate(keys):
+                g = gid_of.get(key)
+                if g is None or gids[e] >= 0 or g in claimed or (owner_pass and owner.get(g) != key[0]):
+                    continue
+                gids[e] = g
+                claimed[g] = e
+                owner[g] = key[0]
+
+        tiles = np.array([key[0] for key in keys], dtype=np.int64)
+        unmapped = np.array([key not in gid_of for key in keys], dtype=bool)
+        for t in np.unique(tiles[unmapped]).tolist():
+            entries = np.flatnonzero(unmapped & (tiles == t))
+
+            # same object tracked by another tile: link as a shadow
+            others = [e for e in claimed.values() if keys[e][0] != t]
+            if others:
+                dist = np.linalg.norm(centers[entries][:, None] - centers[others][None], axis=2)
+                for i, j in _greedy_pairs(dist, self.handoff_distance):
+                    gid_of[keys[entries[i]]] = int(gids[others[j]])
+                entries = np.array([e for e in entries if keys[e] not in gid_of], dtype=np.int64)
+
+            # recently lost ids
+            lost = [g for g, (_, seen) in self._last_seen.items()
+                    if g not in claimed and self.frame_count - seen <= self.handoff_age]
+            if len(entries) and lost:
+                last = np.array([self._last_seen[g][0] for g in lost])
+                dist = np.linalg.norm(centers[entries][:, None] - last[None], axis=2)
+                for i, j in _greedy_pairs(dist, self.handoff_distance):
+                    e, g = entries[i], lost[j]
+                    gid_of[keys[e]] = gids[e] = g
+                    claimed[g] = e
+                    owner[g] = t
+
+            for e in entries.tolist():
+                if gids[e] >= 0:
+                    continue
+                g = self._next_id
+                self._next_id += 1
+                gid_of[keys[e]] = gids[e] = g
+                claimed[g] = e
+                owner[g] = t
+        return gids
+
+    def _merge(self):
+        objects, keys, offsets = [], [], []
+        alive = set()
+        for t, tracker in enumerate(self.trackers):
+            x0, y0 = self.tiles[t][:2]
+            for obj in tracker.get_active_objects():
+                objects.append(obj)
+                keys.append((t, obj.id))
+                offsets.append((x0, y0))
+            alive.update((t, obj.id) for obj in tracker.tracked_objects if obj.id is not None)
+        offsets = np.array(offsets, dtype=np.float64).reshape(-1, 2)
+        estimates = [obj.estimate for obj in objects] # computed by the filter on every access
+        try:
+            centers = np.stack(estimates).mean(axis=1) if estimates else np.zeros((0, 2))
+        except ValueError: # objects with different point layouts
+            centers = np.array([e.mean(axis=0) for e in estimates]).reshape(-1, 2)
+        centers += offsets
+
+        gids = self._assign_ids(keys, centers)
+
+        # forget dead tile tracks and ids lost for good
+        for key in [key for key in self._gid_of if key not in alive]:
+            del self._gid_of[key]
+        for g, e in zip(gids.tolist(), range(len(objects))):
+            if g >= 0:
+                self._last_seen[g] = (centers[e], self.frame_count)
+        for g in [g for g, (_, seen) in self._last_seen.items() if self.frame_count - seen > self.handoff_age]:
+            del self._last_seen[g]
+            self._owner.pop(g, None)
+
+        rows = np.flatnonzero(gids >= 0)
+        self._fill_results([objects[e] for e in rows], [estimates[e] for e in rows], gids[rows], offsets[rows])
+
+    def _fill_results(self, objects, object_estimates, ids, offsets):
+        # same columns as a single tracker, shifted from tile to frame coordinates
+        columns, result_dict = _result_columns(objects, self.Results, ids=ids, offsets=offsets,
+                                               estimates=object_estimates, get_box=self.tracker_class._get_box)
+        for k, v in {**columns, **result_dict}.items():
+            setattr(self.Results, k, v)
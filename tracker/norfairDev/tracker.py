@@ -2,32 +2,43 @@ from norfair.tracker import (TrackedObject,
                              Tracker, 
                              _TrackedObjectFactory, 
                              Detection)
-from norfair.filter import OptimizedKalmanFilterFactory
+from norfair.filter import OptimizedKalmanFilterFactory, FilterPyKalmanFilterFactory, NoFilterFactory
+import copy
 import numpy as np
-import sys
-import os
-import warnings
-from shapely.geometry import Polygon, Point
+import threading
+import time
 from pathlib import Path
-import yaml
-from datetime import datetime
-
-try:
-    from ...base.Results import BaseResultsTracker
-    from ...base.Drawer import BaseDrawer
-except:
-    warnings.warn("Relative imports failed. Falling back to absolute imports.")
-    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))  # Add parent directory to path
-    from base.Results import BaseResultsTracker
-    from base.Drawer import BaseDrawer
-
-from .drawer import norfairDrawer
+from typing import TYPE_CHECKING
+
+from ...base.Regions import CompiledRegions
+from ...utils.utils import ColumnarData
 from .results import norfairResults
+from .filter import BankedKalmanFilter, KalmanFilterBankFactory
+from .gating import GatedDistance
+from .metrics import MetricsSink
+from .zones import ZoneAnalytics
+from .trajectory import TrajectoryStore
+from .tracklog import TrackLogWriter
+from .reid import EmbeddingGallery, GalleryReidDistance
+from .prefilter import DetectionPrefilter
+from . import checkpoint
 from dataclasses import dataclass
 
+if TYPE_CHECKING:
+    from .drawer import norfairDrawer
+
 @dataclass
 class TrackerCallback:
+    '''
+    Hooks on the results rebuild.
+
+    - update_tracker_results_batch(results): once per frame with the
+      columnar `norfairResults` (ids_array, boxes_array, index, ...).
+    - _update_tracker_results(obj, result_dict): per-object compatibility
+      mode, one call per active object.
+    '''
     _update_tracker_results = None
+    update_tracker_results_batch = None
 
 class norfairDevTrackedObject(TrackedObject):
     def __init__(self, 
@@ -54,6 +65,49 @@ class norfairDevTrackedObject(TrackedObject):
                          reid_hit_counter_max, 
                          coord_transformations)
 
+    def hit(self, detection, period=1):
+        if not isinstance(self.filter, BankedKalmanFilter):
+            return super().hit(detection, period)
+
+        # same bookkeeping as TrackedObject.hit, but the filter update is queued
+        # in the bank and applied in one batch for all objects
+        self._conditionally_add_to_past_detections(detection)
+
+        self.last_detection = detection
+        self.hit_counter = min(self.hit_counter + 2 * period, self.hit_counter_max)
+
+        if self.is_initializing and self.hit_counter > self.initialization_delay:
+            self.is_initializing = False
+            self._acquire_ids()
+
+        if detection.scores is not None:
+            points_over_threshold_mask = np.asarray(detection.scores) > self.detection_threshold
+            self.point_hit_counter[points_over_threshold_mask] += 2 * period
+        else:
+            points_over_threshold_mask = np.ones(self.num_points, dtype=bool)
+            self.point_hit_counter += 2 * period
+        np.clip(self.point_hit_counter, 0, self.pointwise_hit_counter_max, out=self.point_hit_counter)
+
+        points = detection.absolute_points.reshape(-1)
+        self.filter.update_masked(points, np.repeat(points_over_threshold_mask, self.dim_points))
+
+        if not self.detected_at_least_once_points.all():
+            # points detected for the first time: snap position, zero velocity (see TrackedObject.hit)
+            detected_at_least_once_mask = np.repeat(self.detected_at_least_once_points, self.dim_points)
+            now_detected_mask = np.tile(points_over_threshold_mask, self.dim_points)
+            first_detection_mask = now_detected_mask & ~detected_at_least_once_mask
+            x = self.filter.x
+            x[: self.dim_z][first_detection_mask, 0] = points[first_detection_mask]
+            x[self.dim_z :][~detected_at_least_once_mask] = 0
+            self.detected_at_least_once_points = self.detected_at_least_once_points | points_over_threshold_mask
+
+_FILTER_FACTORIES = {
+    'OptimizedKalmanFilterFactory': OptimizedKalmanFilterFactory,
+    'FilterPyKalmanFilterFactory': FilterPyKalmanFilterFactory,
+    'NoFilterFactory': NoFilterFactory,
+    'KalmanFilterBankFactory': KalmanFilterBankFactory,
+}
+
 class norfairDevTracker(Tracker):
     def __init__(self,
                  distance_function, 
@@ -66,13 +120,24 @@ class norfairDevTracker(Tracker):
                  past_detections_length = 4, 
                  reid_distance_function = None, 
                  reid_distance_threshold = 0, 
-                 reid_hit_counter_max = None):
+                 reid_hit_counter_max = None,
+                 gate_radius = None):
+        '''
+        Parameters:
+            gate_radius (float, optional): enable spatially-gated matching: only
+                detection/object pairs whose centers are within this radius
+                (usually `distance_threshold`) are evaluated. See `GatedDistance`.
+        '''
         
         if filter_factory is None:
             filter_factory = OptimizedKalmanFilterFactory()
+        elif isinstance(filter_factory, KalmanFilterBankFactory):
+            filter_factory = filter_factory.bind(self) # banks are per tracker
 
         self.Results = norfairResults()
-        self.Drawer = norfairDrawer(self.Results)
+        self._drawer = None # created on first access of `Drawer` (imports the drawing stack)
+        self._color_mapping_keys = None
+        self._regions = CompiledRegions()
 
         self._config = {
             'distance_function':distance_function if isinstance(distance_function, str) else distance_function.__class__.__name__,
@@ -86,9 +151,25 @@ class norfairDevTracker(Tracker):
             'reid_distance_function':reid_distance_function.__class__.__name__ if reid_distance_function is not None else None,
             'reid_distance_threshold':reid_distance_threshold,
             'reid_hit_counter_max':reid_hit_counter_max,
+            'gate_radius':gate_radius,
         }
 
         self.callback = TrackerCallback()
+        self.metrics:MetricsSink = None
+        self.zones:ZoneAnalytics = None
+        self.trajectories:TrajectoryStore = None
+        self.track_log:TrackLogWriter = None
+        self._track_log_frame = -1 # last frame appended to track_log
+        self.gallery:EmbeddingGallery = None
+        self.prefilter:DetectionPrefilter = None
+        self.partition_labels = False # match every label on its own (set_prefilter)
+        self.frame_count = 0 # number of update() calls
+        self._checkpoint = None # (path, every, background)
+        self._checkpoint_thread = None
+        self._predict_only = False # the next update() is a prediction-only step
+        self._last_predicted = False
+        self._frame_shape = None
+        self._matched_pairs = 0
 
         super().__init__(distance_function, 
                          distance_threshold, 
@@ -102,6 +183,9 @@ class norfairDevTracker(Tracker):
                          reid_distance_threshold, 
                          reid_hit_counter_max)
 
+        if gate_radius is not None:
+            self.distance_function = GatedDistance(self.distance_function, gate_radius)
+
     def set_tracker(self, 
                     custom_tracked_object = norfairDevTrackedObject, 
                     color_mapping_keys={
@@ -118,15 +202,281 @@ class norfairDevTracker(Tracker):
 
         Notes:
             - "roi" = Region Of Interest
-            - "roni" = Region Of No Interest
+            - "roni" = Region Of No Interest (detections inside are dropped)
         '''
         setattr(self, '_obj_factory', _norfairDevTrackedObjectAutoFactory(custom_tracked_object))
         self.Results.roi = roi 
+        self._regions = CompiledRegions(roi)
         self.Results.DISTANCE_THRESHOLD = self.distance_threshold
-        self.Drawer.color_mapping_keys = color_mapping_keys
+        self._color_mapping_keys = color_mapping_keys
+        if self._drawer is not None:
+            self._drawer.color_mapping_keys = color_mapping_keys # also drops the cached roi overlay
+        return self
+
+    def set_zones(self, zones=None, fps=None, min_move=0.5):
+        '''
+        Enable zone analytics (occupancy, entry/exit events, dwell) on the
+        regions given to `set_tracker`. Results are exposed as the `zone_*`
+        fields of `norfairResults`; cumulative totals via `self.zones.totals()`.
+
+        Parameters:
+            zones (optional): region keys to analyse (default: every region).
+            fps (optional): report dwell in seconds at this frame rate.
+            min_move: center displacement (pixels) below which membership is reused.
+        '''
+        self.zones = ZoneAnalytics(zones, fps, min_move)
         return self
+
+    def set_trajectories(self, length=32, capacity=256):
+        '''
+        Keep the last `length` estimate centers of every tracked object in a
+        pooled `TrajectoryStore` (`self.trajectories`, also on
+        `norfairResults.trajectories`). Slots are reclaimed when objects
+        leave the tracker.
+        '''
+        self.trajectories = TrajectoryStore(length, capacity)
+        self.Results.trajectories = self.trajectories
+        return self
+
+    def set_reid_gallery(self, per_track=4, capacity=256, max_age=None, reid_distance_threshold=None):
+        '''
+        Keep the recent detection embeddings of every object in an
+        `EmbeddingGallery` (`self.gallery`) and use it for re-identification
+        (`GalleryReidDistance`, cosine distance), replacing
+        `reid_distance_function`. Candidates are scored against all objects
+        with one matrix multiply instead of pairwise over `past_detections`.
+
+        Embeddings of a frame enter the gallery after its update, so they are
+        used for Re-ID from the next frame on. Objects only survive their
+        hit counter for Re-ID if `reid_hit_counter_max` is set.
+
+        Parameters:
+            per_track: embeddings kept per object.
+            capacity: objects held (least recently updated are evicted first).
+            max_age (optional): frames without a new embedding before an object is dropped.
+            reid_distance_threshold (optional): cosine distance threshold, replaces
+                the constructor value.
+        '''
+        self.gallery = EmbeddingGallery(per_track, capacity, max_age)
+        self.reid_distance_function = GalleryReidDistance(self.gallery)
+        if reid_distance_threshold is not None:
+            self.reid_distance_threshold = reid_distance_threshold
+            self._config['reid_distance_threshold'] = reid_distance_threshold
+        self._config['reid_distance_function'] = None
+        self._config['reid_gallery'] = {'per_track': per_track, 'capacity': capacity, 'max_age': max_age}
+        return self
+
+    def set_prefilter(self,
+                      score_thresholds=None,
+                      min_score=None,
+                      iou_threshold=None,
+                      max_per_label=None,
+                      partition_labels=True):
+        '''
+        Clean up detections before matching with a `DetectionPrefilter`
+        (`self.prefilter`): per-label score thresholds, IoU duplicate
+        suppression and per-label caps, applied after the roi filter. The
+        counts dropped by each step are on `norfairResults.detections_dropped`.
+
+        Parameters:
+            score_thresholds (optional): {label: min score}.
+            min_score (optional): threshold of the other labels.
+            iou_threshold (optional): IoU above which a box duplicates a higher-scoring one.
+            max_per_label (optional): int, or {label: max detections}.
+            partition_labels: match every label on its own, so each class builds
+                its own, smaller distance matrix (same matches: pairs of
+                different labels never match).
+        '''
+        self.prefilter = DetectionPrefilter(score_thresholds, min_score, iou_threshold, max_per_label)
+        self.partition_labels = partition_labels
+        self._config['prefilter'] = {
+            'score_thresholds': score_thresholds,
+            'min_score': min_score,
+            'iou_threshold': iou_threshold,
+            'max_per_label': max_per_label,
+            'partition_labels': partition_labels,
+        }
+        return self
+
+    def set_track_log(self, path=None, writer:TrackLogWriter=None, **writer_kwargs):
+        '''
+        Stream every frame's results to a chunked column log (`TrackLogWriter`),
+        read back with `TrackLogReader`. Pass a directory `path` (and writer
+        options such as `chunk_rows`, `background`) or a ready `writer`; call
+        `close_track_log()` when done. `None` for both detaches the log.
+
+        Notes:
+            - Results are rebuilt at the start of an update, so a frame is
+              logged by the next update; `flush_track_log`/`close_track_log`
+              log the last frame, which no update follows.
+        '''
+        if writer is None and path is not None:
+            writer = TrackLogWriter(path, **writer_kwargs)
+        self.track_log = writer
+        # the next update logs the state after the last one, as without a log attached earlier
+        self._track_log_frame = max(self.frame_count - 2, -1)
+        return self
+
+    def flush_track_log(self):
+        '''
+        Append the state after the last update (not logged by any update yet)
+        and write the buffered rows. Tracking may go on afterwards.
+        '''
+        if self.track_log is None:
+            return
+        frame = self.frame_count - 1
+        if frame > self._track_log_frame:
+            # rebuild the results for the current state on a copy, so the
+            # next update's results (and callbacks) are not affected
+            results, callback = self.Results, self.callback
+            self.Results, self.callback = copy.copy(results), TrackerCallback()
+            try:
+                self._update_tracker_results()
+                self.track_log.append(frame, self.Results)
+            finally:
+                self.Results, self.callback = results, callback
+            self._track_log_frame = frame
+        self.track_log.flush()
+
+    def close_track_log(self):
+        '''
+        `flush_track_log`, then close and detach the writer.
+        '''
+        if self.track_log is None:
+            return
+        try:
+            self.flush_track_log()
+        finally:
+            self.track_log.close()
+            self.track_log = None
+
+    def save_checkpoint(self, path, background=False):
+        '''
+        Write the full tracker state (tracked objects, filter states, hit and
+        id counters, roi config, Re-ID gallery) to `path` as one binary snapshot.
+
+        The state is copied synchronously (cheap); with `background` the
+        serialization and write run in a thread. A pending background write
+        is waited for before the next one starts.
+        '''
+        if self._checkpoint_thread is not None:
+            self._checkpoint_thread.join()
+            self._checkpoint_thread = None
+        state = checkpoint.snapshot(self)
+        if background:
+            self._checkpoint_thread = checkpoint.write_snapshot_async(state, path)
+        else:
+            checkpoint.write_snapshot(state, path)
+        return self
+
+    def load_checkpoint(self, path):
+        '''
+        Restore a `save_checkpoint` snapshot into this tracker. Build the
+        tracker with the same distance functions; the tracked object class,
+        roi config and counters come from the snapshot. Filter states are
+        converted if the filter factory differs (per-object vs banked Kalman).
+        '''
+        checkpoint.restore(self, checkpoint.read_snapshot(path))
+        return self
+
+    def set_checkpoint(self, path=None, every=300, background=True):
+        '''
+        Save a checkpoint to `path` every `every` frames (None disables).
+        '''
+        self._checkpoint = (path, every, background) if path is not None else None
+        return self
+
+    def set_metrics(self, sink:MetricsSink=None):
+        '''
+        Attach a metrics sink (`HistogramSink`, `PrometheusTextSink`,
+        `CallbackSink`, ...) to the tracker and its drawer. `None` disables
+        instrumentation; the disabled cost is one attribute check per stage.
+        '''
+        self.metrics = sink
+        if self._drawer is not None:
+            self._drawer.metrics = sink
+        return self
+
+    @property
+    def Drawer(self) -> 'norfairDrawer':
+        '''
+        `norfairDrawer` bound to `self.Results`. Created on first access, so
+        headless workers never import cv2 / the drawing code.
+        '''
+        if self._drawer is None:
+            from .drawer import norfairDrawer
+            self._drawer = norfairDrawer(self.Results)
+            if self._color_mapping_keys is not None:
+                self._drawer.color_mapping_keys = self._color_mapping_keys
+            self._drawer.metrics = self.metrics
+        return self._drawer
+
+    @Drawer.setter
+    def Drawer(self, drawer):
+        self._drawer = drawer
+
+    @property
+    def color_mapping_keys(self):
+        '''
+        Region colors of the drawer (without creating it).
+        '''
+        if self._drawer is not None:
+            return self._drawer.color_mapping_keys
+        return self._color_mapping_keys if self._color_mapping_keys is not None else {'roi':(0,255,0), 'roni':(0,0,255)}
     
+    @classmethod
+    def from_config(cls, config, **overrides):
+        '''
+        Build a tracker from the dict written by `save_config` (or the path of
+        that yaml file).
+
+        Parameters:
+            config (dict or path): tracker config.
+            **overrides: replace config entries, e.g. for parameter sweeps.
+
+        Notes:
+            - `filter_factory` is a factory class name, or a dict
+              `{'name': ..., **factory_kwargs}` (e.g. R, Q), or an instance.
+            - `distance_function` / `reid_distance_function` must be distance
+              names or callables; class names of custom objects (as written
+              by `save_config`) cannot be rebuilt and must be overridden.
+            - `reid_gallery` (written by `set_reid_gallery`) re-attaches the gallery,
+              `prefilter` (written by `set_prefilter`) the detection pre-filter.
+
+        Raises:
+            ValueError: unknown filter factory, or a distance that cannot be rebuilt.
+        '''
+        if not isinstance(config, dict):
+            import yaml
+            with open(config) as f:
+                config = yaml.safe_load(f)
+        config = {**config, **overrides}
+        gallery = config.pop('reid_gallery', None)
+        prefilter = config.pop('prefilter', None)
+
+        filter_factory = config.get('filter_factory')
+        if isinstance(filter_factory, (str, dict)):
+            params = dict(filter_factory) if isinstance(filter_factory, dict) else {'name': filter_factory}
+            name = params.pop('name')
+            if name not in _FILTER_FACTORIES:
+                raise ValueError(f"unknown filter factory {name!r}, expected one of {list(_FILTER_FACTORIES)}")
+            config['filter_factory'] = _FILTER_FACTORIES[name](**params)
+
+        if isinstance(config.get('reid_distance_function'), str):
+            raise ValueError("reid_distance_function was saved by class name; pass it as an override")
+        distance_function = config.get('distance_function')
+        if isinstance(distance_function, str) and distance_function[:1].isupper():
+            raise ValueError(f"distance_function {distance_function!r} was saved by class name; pass it as an override")
+        tracker = cls(**config)
+        if gallery is not None:
+            tracker.set_reid_gallery(**gallery)
+        if prefilter is not None:
+            tracker.set_prefilter(**prefilter)
+        return tracker
+
     def save_config(self, dst='.'):
+        import yaml
+        from datetime import datetime
         dt = datetime.now().strftime("%d-%m-%Y-%H%M%S")
         dst = Path(dst) / f'tracker_config/{self.__class__.__name__} {dt}.yaml'
         dst.parent.mkdir(parents=True, exist_ok=True)
@@ -135,56 +485,47 @@ class norfairDevTracker(Tracker):
         return self
     
     def _preprocess_update_input(self, frame, points, scores, data, label, embedding):
-        if self.Results.roi is None:
+        if self.Results.roi is None or len(points) == 0:
             return points, scores, data, label, embedding
 
-        if all(not 'roi' in key for key in self.Results.roi):
+        if self._regions.source is not self.Results.roi: # roi replaced outside set_tracker
+            self._regions = CompiledRegions(self.Results.roi)
+
+        if not self._regions.has_filter:
             return points, scores, data, label, embedding
         
-        h, w = frame.shape[:2]
-
-        new_points = []
-        new_scores = [] if scores is not None else None
-        new_data = [] if data is not None else None
-        new_label = [] if label is not None else None
-        new_embedding = [] if embedding is not None else None
-
-        for i in range(len(points)):
-            point = points[i]
-            center = None
-            if len(point) == 4:
-                p1, p2 = np.array(point).reshape(2, 2)
-                center = Point(((p2 - p1) / 2) + p1)
-            elif len(point) == 2:
-                center = Point(np.array(point))
-            else:
-                raise ValueError(f"Unexpected point format at index {i}: {point}")
-            
-            for key, val in self.Results.roi.items():
-                if 'roi' in key:
-                    arr = np.array(val) * [w, h]
-                    arr = np.vstack([arr, arr[0]])
-                    roi = Polygon(arr)
-                    if center.within(roi):
-                        new_points.append(points[i])
-                        if new_scores is not None:
-                            new_scores.append(scores[i])
-                        if new_label is not None:
-                            new_label.append(label[i])
-                        if new_embedding is not None:
-                            new_embedding.append(embedding[i])
-                        if new_data is not None:
-                            new_data.append(data[i])
-                        break
-        return (np.array(new_points),
-                new_scores,
-                new_data,
-                new_label,
-                new_embedding,)
+        if frame is None:
+            raise ValueError("frame (or its shape) is required to scale the roi config")
+        h, w = self._frame_size(frame)
+        keep = self._regions.filter_mask(CompiledRegions.centers(points), w, h)
+        if keep.all():
+            return points, scores, data, label, embedding
+
+        return (np.asarray(points)[keep],
+                self._take(scores, keep),
+                self._take(data, keep),
+                self._take(label, keep),
+                self._take(embedding, keep),)
+
+    @staticmethod
+    def _frame_size(frame):
+        '''
+        (h, w) of a frame, or of a frame shape tuple such as (h, w) / (h, w, c).
+        '''
+        shape = frame.shape if hasattr(frame, 'shape') else frame
+        return int(shape[0]), int(shape[1])
+
+    @staticmethod
+    def _take(values, keep):
+        if values is None:
+            return None
+        if isinstance(values, (np.ndarray, ColumnarData)):
+            return values[keep]
+        return [values[i] for i in np.flatnonzero(keep)]
 
     def update_detections(
         self,
-        frame:np.ndarray,
+        frame:np.ndarray|tuple,
         points:np.ndarray|list,
         scores:np.ndarray|list=None,
         data:np.ndarray|list=None,
@@ -197,11 +538,15 @@ class norfairDevTracker(Tracker):
         and update the tracker.
 
         Parameters:
+            frame (np.ndarray or tuple): The frame, or only its shape (h, w[, c]);
+                only the size is used, to scale the roi config. May be None
+                when no roi/roni is set.
             points (np.ndarray): An (N, 2) or (N, 4) array of detection points.
                 - (x, y) for keypoints or center points
                 - (x1, y1, x2, y2) for bounding boxes
             scores (list or array, optional): Confidence scores per detection.
-            data (list, optional): Additional data for each detection.
+            data (list or ColumnarData, optional): Additional data for each detection.
+                `ColumnarData(box_coords=boxes, ...)` avoids building one dict per row.
             label (list, optional): Class labels per detection.
             embedding (list, optional): Feature vectors for Re-ID (Re-identification).
             **update_params: Extra parameters passed to the underlying `update()`.
@@ -214,11 +559,10 @@ class norfairDevTracker(Tracker):
             ValueError: If shape of `points` is invalid or if any extra param
                         (scores, data, label, embedding) has mismatched length.
         '''
-        if not isinstance(points, np.ndarray):
-            try:
-                points = np.array(points)
-            except Exception as e:
-                raise TypeError("points must be convertible to a numpy.ndarray") from e
+        try:
+            points = self._as_array(points)
+        except TypeError as e:
+            raise TypeError("points must be convertible to a numpy.ndarray") from e
 
         # if points.ndim != 2 or points.shape[1] not in (2, 4):
         #     raise ValueError("points must be a 2D array with shape (N, 2) or (N, 4)")
@@ -234,6 +578,65 @@ class norfairDevTracker(Tracker):
             if param is not None and len(param) != len(points):
                 raise ValueError(f"Length mismatch: {name} has length {len(param)} but points has length {len(points)}")
             
+        return self._ingest(frame, points, scores, data, label, embedding, update_params)
+
+    def update_detections_batch(
+        self,
+        frame:np.ndarray|tuple,
+        boxes,
+        scores=None,
+        labels=None,
+        embeddings=None,
+        data=None,
+        **update_params
+    ):
+        '''
+        Batched variant of `update_detections` for detector outputs that are
+        already contiguous arrays. NumPy arrays and CPU tensors (torch etc.,
+        through `__array__`/DLPack) are used without copying when possible.
+
+        Parameters:
+            frame: The frame or only its shape (h, w[, c]), see `update_detections`.
+            boxes: (N, 4) boxes (x1, y1, x2, y2) or (N, 2) points.
+            scores (optional): (N,) score per detection or (N, P) score per point.
+            labels (optional): (N,) class labels.
+            embeddings (optional): (N, D) feature vectors for Re-ID.
+            data (optional): per-detection extra data, e.g. `ColumnarData(box_coords=boxes)`.
+            **update_params: Extra parameters passed to the underlying `update()`.
+
+        Returns:
+            norfairResults: the tracker results.
+
+        Raises:
+            TypeError: If an input is not convertible to a numpy array.
+            ValueError: If `boxes` is not (N, 2) / (N, 4) or a row count mismatches.
+        '''
+        boxes = self._as_array(boxes)
+        if boxes.ndim != 2 or boxes.shape[1] not in (2, 4):
+            raise ValueError(f"boxes must be a 2D array with shape (N, 2) or (N, 4), got {boxes.shape}")
+
+        scores = self._as_array(scores)
+        labels = self._as_array(labels)
+        embeddings = self._as_array(embeddings)
+        for name, param in (('scores', scores), ('labels', labels), ('embeddings', embeddings), ('data', data)):
+            if param is not None and len(param) != len(boxes):
+                raise ValueError(f"Length mismatch: {name} has length {len(param)} but boxes has length {len(boxes)}")
+
+        return self._ingest(frame, boxes, scores, data, labels, embeddings, update_params)
+
+    def _ingest(self, frame, points, scores, data, label, embedding, update_params):
+        '''
+        Shared tail of `update_detections` / `update_detections_batch`:
+        roi filter, pre-filter, Detection construction, tracker update.
+        '''
+        if frame is not None:
+            self._frame_shape = self._frame_size(frame)
+
+        metrics = self.metrics
+        if metrics is not None:
+            t0 = time.perf_counter()
+            num_in = len(points)
+
         (
             points, scores, data, label, embedding
         ) = self._preprocess_update_input(
@@ -245,74 +648,425 @@ class norfairDevTracker(Tracker):
             embedding=embedding, 
         )
 
-        detections = []
-        for i in range(len(points)):
-            point = points[i]
-            if len(point) == 4:
-                point = point.reshape(2, 2)
-            detections.append(
-                Detection(
-                    points=point,
-                    scores=scores[i] if scores is not None else None,
-                    data=data[i] if data is not None else None,
-                    label=label[i] if label is not None else None,
-                    embedding=embedding[i] if embedding is not None else None
-                )
-            )
+        if metrics is not None:
+            t1 = time.perf_counter()
+            metrics.observe('preprocess', t1 - t0)
+            metrics.count('detections_in', num_in)
+            metrics.count('detections_roi_out', num_in - len(points))
+
+        if self.prefilter is not None:
+            keep, dropped = self.prefilter.filter(points, scores, label)
+            if not keep.all():
+                points = np.asarray(points)[keep]
+                scores, data, label, embedding = (self._take(v, keep) for v in (scores, data, label, embedding))
+            self.Results.detections_dropped = dropped
+            if metrics is not None:
+                t2 = time.perf_counter()
+                metrics.observe('prefilter', t2 - t1)
+                metrics.count('detections_prefilter_out', len(keep) - int(keep.sum()))
+                t1 = t2
+
+        detections = self._make_detections(points, scores, data, label, embedding)
+
+        if metrics is not None:
+            metrics.observe('make_detections', time.perf_counter() - t1)
+
         self.update(detections=detections, bounding_boxes_input=points, **update_params)
         return self.Results
+
+    @staticmethod
+    def _as_array(values, dtype=None):
+        '''
+        Convert array-likes (lists, NumPy arrays, CPU tensors) to np.ndarray,
+        without copying when the memory layout and dtype already fit.
+        '''
+        if values is None:
+            return None
+        if isinstance(values, np.ndarray) and (dtype is None or values.dtype == dtype):
+            return values
+        try:
+            if not hasattr(values, '__array__') and hasattr(values, '__dlpack__'):
+                values = np.from_dlpack(values)
+            return np.asarray(values, dtype=dtype)
+        except (TypeError, ValueError, RuntimeError, BufferError) as e:
+            raise TypeError(f"{type(values).__name__} is not convertible to a numpy.ndarray") from e
+
+    @staticmethod
+    def _make_detections(points, scores, data, label, embedding):
+        '''
+        Build norfair `Detection` records for all rows in bulk.
+
+        Points are reshaped once to (N, P, 2) and every detection gets a row
+        view, instead of validating and copying each row separately.
+        '''
+        n = len(points)
+        if n == 0:
+            return []
+        points = np.asarray(points).reshape(n, -1, 2)
+        absolute_points = points.copy() # one copy for all rows, coord transforms replace it per detection
+
+        if scores is not None:
+            scores = np.asarray(scores)
+            if scores.ndim == 1: # one score per detection -> one per point
+                scores = np.broadcast_to(scores[:, None], points.shape[:2])
+            scores = list(scores)
+        if isinstance(data, ColumnarData): # lazy row views over the shared columns
+            data = data.rows()
+        if isinstance(label, np.ndarray):
+            label = label.tolist()
+        if embedding is not None and not isinstance(embedding, list):
+            embedding = list(embedding)
+
+        detections = []
+        new_detection = Detection.__new__
+        for i in range(n):
+            det = new_detection(Detection)
+            det.points = points[i]
+            det.absolute_points = absolute_points[i]
+            det.scores = scores[i] if scores is not None else None
+            det.data = data[i] if data is not None else None
+            det.label = label[i] if label is not None else None
+            det.embedding = embedding[i] if embedding is not None else None
+            det.age = None
+            detections.append(det)
+        return detections
     
+    def predict(self, **update_params):
+        '''
+        Prediction-only step for a frame on which the detector did not run
+        (see `DetectionScheduler`): objects are advanced by their filters and
+        the results are flagged `is_predicted`. Pass `period` on the next
+        detection update to compensate the skipped frames.
+
+        Returns:
+            norfairResults: the tracker results.
+        '''
+        self._predict_only = True
+        if self.prefilter is not None:
+            self.Results.detections_dropped = {}
+        self.update(detections=None, **update_params)
+        return self.Results
+
     def update(self, detections = None, bounding_boxes_input = None, period = 1, coord_transformations = None):
+        metrics = self.metrics
+        if metrics is not None:
+            t0 = time.perf_counter()
+            # pruned by this update; with Re-ID, objects past their hit counter wait in
+            # tracked_objects until their reid hit counter runs out (or they are merged back)
+            if self.reid_hit_counter_max is None:
+                dead = sum(1 for obj in self.tracked_objects if not obj.hit_counter_is_positive)
+            else:
+                dead = sum(1 for obj in self.tracked_objects if not obj.reid_hit_counter_is_positive)
+
         self.Results.bounding_boxes_input = bounding_boxes_input # subscribe bounding boxes input
         self._update_tracker_results()
-        return super().update(detections, period, coord_transformations)
-    
-    def _update_tracker_results(self):
-        result_dict = {
-            'ids': [],
-            'ages': [],
-            'labels': [],
-            'last_det_data': [],
-            'last_det_points': [],
-            'last_det_bounding_boxes': [],
-            'estimate': [],
-            'hit_counter': [],
-            'is_update_detections': [],
-        }
+        # results describe the state after the previous step
+        self.Results.is_predicted = self._last_predicted
+        self._last_predicted, self._predict_only = self._predict_only, False
+        if self.zones is not None or self.trajectories is not None:
+            centers = self._results_centers()
+            if self.zones is not None:
+                self._update_zones(centers)
+            if self.trajectories is not None:
+                alive = [obj.id for obj in self.tracked_objects if obj.id is not None]
+                self.trajectories.update(self.Results.ids_array, centers, alive)
+        if self.track_log is not None and self.frame_count - 1 > self._track_log_frame:
+            # results are rebuilt before this update, i.e. they describe the previous frame
+            self.track_log.append(self.frame_count - 1, self.Results)
+            self._track_log_frame = self.frame_count - 1
 
-        for obj in self.get_active_objects():
-            result_dict['ids'].append(obj.id)
-            result_dict['ages'].append(obj.age)
-            result_dict['labels'].append(obj.label)
-            result_dict['last_det_data'].append(obj.last_detection.data)
-            result_dict['last_det_points'].append(obj.last_detection.points)
-            result_dict['last_det_bounding_boxes'].append(
-                obj.last_detection.data.get('box_coords')
-            )
-            result_dict['estimate'].append(obj.estimate)
-
-            if obj.id in self.Results.ids:
-                index = self.Results.ids.index(obj.id)
-                hit = self.Results.hit_counter[index]
-                result_dict['is_update_detections'].append(obj.hit_counter >= hit)
-            else:
-                result_dict['is_update_detections'].append(True)
+        if metrics is not None:
+            t1 = time.perf_counter()
+            metrics.observe('results', t1 - t0)
+        self._matched_pairs = 0
+
+        gated = isinstance(self.distance_function, GatedDistance)
+        if gated:
+            self.distance_function.reset_stats()
+
+        if not isinstance(self.filter_factory, KalmanFilterBankFactory):
+            objects = super().update(detections, period, coord_transformations)
+        else:
+            self.filter_factory.begin_step() # predict all objects at once
+            try:
+                objects = super().update(detections, period, coord_transformations)
+            finally:
+                self.filter_factory.end_step() # apply all queued measurement updates
+
+        if self.gallery is not None:
+            self._update_gallery(detections)
+
+        if gated:
+            self.Results.gating_pairs_evaluated = self.distance_function.pairs_evaluated
+            self.Results.gating_pairs_pruned = self.distance_function.pairs_pruned
+
+        self.frame_count += 1
+        if self._checkpoint is not None and self.frame_count % self._checkpoint[1] == 0:
+            self.save_checkpoint(self._checkpoint[0], self._checkpoint[2])
+
+        if metrics is not None:
+            t2 = time.perf_counter()
+            metrics.observe('norfair_update', t2 - t1)
+            metrics.observe('update', t2 - t0)
+            # as get_active_objects: objects past their hit counter are not active; with
+            # Re-ID they wait in the pool, otherwise they are pruned by the next update
+            active = initializing = expired = 0
+            for obj in self.tracked_objects:
+                if not obj.hit_counter_is_positive:
+                    expired += 1
+                elif obj.is_initializing:
+                    initializing += 1
+                else:
+                    active += 1
+            metrics.count('frames')
+            metrics.count('matched_pairs', self._matched_pairs)
+            metrics.gauge('objects_active', active)
+            metrics.gauge('objects_initializing', initializing)
+            metrics.gauge('objects_reid_pool', expired if self.reid_hit_counter_max is not None else 0)
+            metrics.gauge('objects_dead', dead)
+            metrics.frame_end()
+        return objects
+
+    def _update_objects_in_place(self, distance_function, distance_threshold, objects, candidates, period):
+        '''
+        With `partition_labels`, every label builds its own, smaller distance
+        matrix instead of one matrix over all labels. Pairs of different labels
+        never match anyway, so after matching each label the pairs are applied
+        in the same global order (by distance) as norfair's greedy matching:
+        hits, merges, id assignment and the returned lists are unchanged.
+        '''
+        if not self.partition_labels or not candidates or not objects:
+            return super()._update_objects_in_place(distance_function, distance_threshold, objects, candidates, period)
+
+        cand_groups, obj_groups = {}, {}
+        for i, c in enumerate(candidates):
+            cand_groups.setdefault(str(c.label), []).append(i)
+        for i, o in enumerate(objects):
+            obj_groups.setdefault(str(o.label), []).append(i)
+        if len(cand_groups) == 1 and cand_groups.keys() == obj_groups.keys():
+            return super()._update_objects_in_place(distance_function, distance_threshold, objects, candidates, period)
+
+        pairs = [] # (distance, candidate row, object row) over all labels
+        for key, obj_rows in obj_groups.items():
+            cand_rows = cand_groups.get(key)
+            if cand_rows is None: # nothing of this label to match
+                for i in obj_rows:
+                    objects[i].current_min_distance = None
+                continue
+            distance_matrix = distance_function.get_distances([objects[i] for i in obj_rows],
+                                                              [candidates[i] for i in cand_rows])
+            if np.isnan(distance_matrix).any():
+                raise ValueError("Received nan values from distance function, please check your distance function for errors!")
+            if distance_matrix.any(): # as in Tracker._update_objects_in_place
+                for i, minimum in zip(obj_rows, distance_matrix.min(axis=0)):
+                    objects[i].current_min_distance = minimum if minimum < distance_threshold else None
+            for c, o in zip(*self.match_dets_and_objs(distance_matrix, distance_threshold)):
+                pairs.append((distance_matrix[c, o], cand_rows[c], obj_rows[o]))
+
+        pairs.sort()
+        cand_matched = np.zeros(len(candidates), dtype=bool)
+        obj_matched = np.zeros(len(objects), dtype=bool)
+        matched_objects = []
+        for distance, c, o in pairs:
+            cand_matched[c] = obj_matched[o] = True
+            candidate, obj = candidates[c], objects[o]
+            if isinstance(candidate, Detection):
+                obj.hit(candidate, period=period)
+                obj.last_distance = distance
+                matched_objects.append(obj)
+            else: # Re-ID: merge the new object into the old one
+                obj.merge(candidate)
+                self.tracked_objects.remove(candidate)
+
+        unmatched_candidates = [c for c, matched in zip(candidates, cand_matched) if not matched]
+        unmatched_objects = [o for o, matched in zip(objects, obj_matched) if not matched]
+        return unmatched_candidates, matched_objects, unmatched_objects
+
+    def match_dets_and_objs(self, distance_matrix: np.ndarray, distance_threshold):
+        '''
+        Greedy matching by increasing distance, same result as `Tracker.match_dets_and_objs`.
+
+        Only the pairs below `distance_threshold` are sorted once, instead of
+        searching the whole matrix for its minimum after every match.
+        '''
+        if distance_matrix.size == 0:
+            return [], []
+        det_candidates, obj_candidates = np.nonzero(distance_matrix < distance_threshold)
+        order = np.argsort(distance_matrix[det_candidates, obj_candidates], kind='stable')
 
-            result_dict['hit_counter'].append(obj.hit_counter)
+        det_used = np.zeros(distance_matrix.shape[0], dtype=bool)
+        obj_used = np.zeros(distance_matrix.shape[1], dtype=bool)
+        det_idxs, obj_idxs = [], []
+        for det_idx, obj_idx in zip(det_candidates[order].tolist(), obj_candidates[order].tolist()):
+            if det_used[det_idx] or obj_used[obj_idx]:
+                continue
+            det_used[det_idx] = obj_used[obj_idx] = True
+            det_idxs.append(det_idx)
+            obj_idxs.append(obj_idx)
+        self._matched_pairs += len(det_idxs)
+        return det_idxs, obj_idxs
+    
+    def _update_tracker_results(self):
+        objects = self.get_active_objects()
+        columns, result_dict = _result_columns(objects, self.Results, get_box=self._get_box)
+        for k, v in columns.items():
+            setattr(self.Results, k, v)
 
-            if callable(self.callback._update_tracker_results):
+        if callable(self.callback._update_tracker_results):
+            # per-object compatibility mode: callbacks see the complete lists
+            for obj in objects:
                 self.callback._update_tracker_results(obj, result_dict)
 
         # assign values back to self.Results
         for k, v in result_dict.items():
             setattr(self.Results, k, v)
+
+        if callable(self.callback.update_tracker_results_batch):
+            self.callback.update_tracker_results_batch(self.Results)
+
+    def _update_gallery(self, detections):
+        '''
+        Add the embeddings of this frame's matched detections to the gallery
+        and drop the objects that left the tracker.
+        '''
+        gallery = self.gallery
+        fresh = {id(det) for det in detections} if detections else ()
+        keys, embeddings = [], []
+        for obj in self.tracked_objects:
+            det = obj.last_detection
+            if id(det) in fresh and det.embedding is not None:
+                keys.append(obj.initializing_id)
+                embeddings.append(np.asarray(det.embedding).reshape(-1))
+        if keys:
+            gallery.add(keys, np.stack(embeddings))
+        gallery.prune({obj.initializing_id for obj in self.tracked_objects})
+        gallery.step()
+
+    def _results_centers(self):
+        '''
+        (N, 2) estimate centers of the objects in `self.Results`.
+        '''
+        results = self.Results
+        if results.estimate_array is not None:
+            return results.estimate_array.mean(axis=1)
+        return np.array([np.asarray(e).reshape(-1, 2).mean(axis=0) for e in results.estimate]).reshape(-1, 2)
+
+    def _update_zones(self, centers):
+        results = self.Results
+        ids = results.ids_array
+        if len(ids) and self._frame_shape is None and self._regions.keys:
+            raise ValueError("frame (or its shape) is required for zone analytics")
+
+        membership, dwell, events = self.zones.update(ids, centers, self._regions, self._frame_shape)
+        results.zone_keys = self.zones.keys
+        results.zone_membership = membership
+        results.zone_dwell = dwell
+        results.zone_occupancy = dict(zip(self.zones.keys, membership.sum(axis=0).tolist()))
+        results.zone_events = events
+
+    @staticmethod
+    def _get_box(detection):
+        data = detection.data
+        box = data.get('box_coords') if hasattr(data, 'get') else None
+        if box is None and np.size(detection.points) == 4:
+            box = detection.points
+        return box
         
+def _result_columns(objects, prev, ids=None, offsets=None, estimates=None, get_box=None):
+    '''
+    Build the `norfairResults` fields of `objects`, in one pass.
+
+    Parameters:
+        objects: tracked objects, one row each.
+        prev: results of the previous frame (for `is_update_detections`).
+        ids (optional): (N,) ids to report (default: `obj.id`).
+        offsets (optional): (N, 2) per-object offset added to the points, the
+            estimates and the boxes taken from the points (e.g. tile origins).
+            `data` and its `box_coords` are reported as given.
+        estimates (optional): `obj.estimate` per object, if already computed
+            (the filter recomputes it on every access).
+        get_box (optional): detection -> box (default: `norfairDevTracker._get_box`).
+
+    Returns:
+        tuple: (columns, result_dict) with the columnar arrays and the
+        list-compatible views of the same rows.
+    '''
+    n = len(objects)
+    get_box = get_box or norfairDevTracker._get_box
+    ids = np.array([obj.id for obj in objects], dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+    ages = np.empty(n, dtype=np.int64)
+    hits = np.empty(n, dtype=np.int64)
+    boxes = np.full((n, 4), np.nan, dtype=np.float64)
+    labels, last_det_data, last_det_points, last_det_boxes, object_estimates = [], [], [], [], []
+
+    for i, obj in enumerate(objects): # single pass over objects
+        det = obj.last_detection
+        ages[i] = obj.age
+        hits[i] = obj.hit_counter
+        labels.append(obj.label)
+        last_det_data.append(det.data)
+        estimate = obj.estimate if estimates is None else estimates[i]
+        points = det.points
+        box = get_box(det)
+        if offsets is not None:
+            offset = offsets[i]
+            from_points = box is det.points
+            points = np.asarray(points, dtype=np.float64)
+            points = (points.reshape(-1, 2) + offset).reshape(points.shape)
+            estimate = estimate + offset
+            if from_points:
+                box = points
+        if box is not None:
+            boxes[i] = np.asarray(box, dtype=np.float64).reshape(-1)[:4]
+        last_det_points.append(points)
+        last_det_boxes.append(box)
+        object_estimates.append(estimate)
+
+    try:
+        estimate = np.stack(object_estimates) if n else np.zeros((0, 1, 2))
+    except ValueError: # objects with different point layouts
+        estimate = None
+
+    # object is updated by a detection unless its hit counter went down since last frame
+    is_update = np.ones(n, dtype=bool)
+    if n and prev.ids_array is not None and len(prev.ids_array):
+        order = np.argsort(prev.ids_array, kind='stable')
+        pos = np.searchsorted(prev.ids_array, ids, sorter=order)
+        pos = order[np.minimum(pos, len(order) - 1)]
+        found = prev.ids_array[pos] == ids
+        is_update[found] = hits[found] >= prev.hit_counter_array[pos[found]]
+
+    columns = {
+        'ids_array': ids,
+        'ages_array': ages,
+        'hit_counter_array': hits,
+        'estimate_array': estimate,
+        'boxes_array': boxes,
+        'is_update_detections_array': is_update,
+        'index': dict(zip(ids.tolist(), range(n))),
+    }
+    result_dict = {
+        'ids': ids.tolist(),
+        'ages': ages.tolist(),
+        'labels': labels,
+        'last_det_data': last_det_data,
+        'last_det_points': last_det_points,
+        'last_det_bounding_boxes': last_det_boxes,
+        'estimate': list(estimate) if estimate is not None else object_estimates,
+        'hit_counter': hits.tolist(),
+        'is_update_detections': is_update.tolist(),
+    }
+    return columns, result_dict
+
+_GLOBAL_ID_LOCK = threading.Lock()
+
 class _norfairDevTrackedObjectAutoFactory(_TrackedObjectFactory):
     def __init__(self, object_class: type):
         super().__init__()
         if not issubclass(object_class, norfairDevTrackedObject):
             raise TypeError("object_class must be a subclass of TrackedObject")
         self.object_class = object_class
+        self.arena = None # hot fields of CompactTrackedObject instances, created on first use
 
     def create(
         self,
@@ -339,4 +1093,10 @@ class _norfairDevTrackedObjectAutoFactory(_TrackedObjectFactory):
             past_detections_length=past_detections_length,
             reid_hit_counter_max=reid_hit_counter_max,
             coord_transformations=coord_transformations,
-        )
\ No newline at end of file
+        )
+
+    def get_ids(self):
+        # the global counter is a class attribute shared by all trackers,
+        # which may run in parallel threads (TiledTracker)
+        with _GLOBAL_ID_LOCK:
+            return super().get_ids()
\ No newline at end of file
@@ -0,0 +1,236 @@
+import json
+import os
+import queue
+import threading
+from pathlib import Path
+import numpy as np
+
+COLUMNS = ('frame', 'id', 'age', 'hit_counter', 'label', 'box', 'estimate')
+
+class TrackLogWriter:
+    '''
+    Streams per-frame tracker results to a directory of column chunks:
+
+        <path>/index.json
+        <path>/chunk_00000/{frame,id,age,hit_counter,label,box,estimate}.npy
+        ...
+
+    Rows are buffered in memory and written every `chunk_rows` rows, so
+    memory stays bounded for arbitrarily long recordings. `index.json` is
+    rewritten (atomically) after every chunk, so a log is readable while it
+    is still being written. `TrackLogReader` memory-maps the chunks.
+
+    Parameters:
+        path: output directory (created).
+        chunk_rows: rows (object observations) per chunk.
+        background: write chunks from a background thread.
+        max_pending: chunks queued for the background thread before `append` blocks.
+    '''
+    def __init__(self, path, chunk_rows=65536, background=False, max_pending=2):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.chunk_rows = chunk_rows
+        self._buffers = {name: [] for name in COLUMNS}
+        self._rows = 0
+        self._chunks = []
+        self._closed = False
+        self._error = None
+        self._queue = None
+        self._thread = None
+        if background:
+            self._queue = queue.Queue(max_pending)
+            self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, frame_index, results):
+        '''
+        Buffer the objects of one `norfairResults`.
+        '''
+        ids = results.ids_array
+        n = 0 if ids is None else len(ids)
+        if n == 0:
+            return
+        if results.estimate_array is not None:
+            estimate = results.estimate_array
+        else:
+            estimate = np.array([np.asarray(e).reshape(-1, 2).mean(axis=0) for e in results.estimate]).reshape(n, 1, 2)
+
+        buffers = self._buffers
+        buffers['frame'].append(np.full(n, frame_index, dtype=np.int64))
+        buffers['id'].append(ids)
+        buffers['age'].append(results.ages_array)
+        buffers['hit_counter'].append(results.hit_counter_array)
+        buffers['label'].append(np.array([str(label) for label in results.labels]))
+        buffers['box'].append(results.boxes_array)
+        buffers['estimate'].append(estimate)
+        self._rows += n
+        if self._rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        '''
+        Write the buffered rows as one chunk (or hand them to the background thread).
+        '''
+        if self._error is not None:
+            raise RuntimeError("track log writer failed") from self._error
+        if not self._rows:
+            return
+        try:
+            columns = {name: np.concatenate(parts) for name, parts in self._buffers.items()}
+        except ValueError: # estimate layout changed within the chunk: keep centers only
+            self._buffers['estimate'] = [e.mean(axis=1, keepdims=True) for e in self._buffers['estimate']]
+            columns = {name: np.concatenate(parts) for name, parts in self._buffers.items()}
+        self._buffers = {name: [] for name in COLUMNS}
+        self._rows = 0
+        if self._queue is not None:
+            self._queue.put(columns)
+        else:
+            self._write_chunk(columns)
+
+    def _writer_loop(self):
+        while True:
+            columns = self._queue.get()
+            if columns is None:
+                break
+            try:
+                self._write_chunk(columns)
+            except Exception as e:
+                self._error = e
+
+    def _write_chunk(self, columns):
+        name = f'chunk_{len(self._chunks):05d}'
+        chunk_dir = self.path / name
+        chunk_dir.mkdir(exist_ok=True)
+        for column, values in columns.items():
+            np.save(chunk_dir / f'{column}.npy', values)
+        frames, ids = columns['frame'], columns['id']
+        self._chunks.append({
+            'name': name,
+            'rows': int(len(frames)),
+            'frame_min': int(frames.min()),
+            'frame_max': int(frames.max()),
+            'id_min': int(ids.min()),
+            'id_max': int(ids.max()),
+        })
+        self._write_index()
+
+    def _write_index(self):
+        tmp = self.path / 'index.json.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'columns': list(COLUMNS), 'chunks': self._chunks}, f, indent=1)
+        os.replace(tmp, self.path / 'index.json')
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+        if not self._chunks:
+            self._write_index()
+        if self._error is not None:
+            raise RuntimeError("track log writer failed") from self._error
+
+class TrackLogReader:
+    '''
+    Random access to a `TrackLogWriter` directory. Chunks are memory-mapped
+    and only the chunks overlapping a query are touched.
+
+    Example:
+        log = TrackLogReader('logs/cam0')
+        rows = log.frames(1000, 2000)     # dict of columns
+        rows = log.track(42)
+    '''
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / 'index.json') as f:
+            index = json.load(f)
+        self.columns = index['columns']
+        self.chunks = index['chunks']
+        self._cache = {}
+
+    def __len__(self):
+        return sum(chunk['rows'] for chunk in self.chunks)
+
+    def _load(self, chunk, column):
+        key = (chunk['name'], column)
+        values = self._cache.get(key)
+        if values is None:
+            values = self._cache[key] = np.load(self.path / chunk['name'] / f'{column}.npy', mmap_mode='r')
+        return values
+
+    def _gather(self, parts, columns):
+        columns = columns or self.columns
+        if not parts:
+            if not self.chunks:
+                return {column: np.zeros(0) for column in columns}
+            parts = [(self.chunks[0], slice(0, 0))] # empty, with the stored dtypes and shapes
+        return {
+            column: np.concatenate([self._load(chunk, column)[rows] for chunk, rows in parts])
+            for column in columns
+        }
+
+    def frames(self, start, stop=None, columns=None):
+        '''
+        Rows with `start <= frame < stop` (a single frame if `stop` is None).
+        '''
+        stop = start + 1 if stop is None else stop
+        parts = []
+        for chunk in self.chunks:
+            if chunk['frame_max'] < start or chunk['frame_min'] >= stop:
+                continue
+            frame = self._load(chunk, 'frame') # ascending within a chunk
+            lo, hi = np.searchsorted(frame, [start, stop])
+            parts.append((chunk, slice(lo, hi)))
+        return self._gather(parts, columns)
+
+    def track(self, idx, columns=None):
+        '''
+        Every row of track `idx`, in frame order.
+        '''
+        parts = []
+        for chunk in self.chunks:
+            if not chunk['id_min'] <= idx <= chunk['id_max']:
+                continue
+            rows = np.flatnonzero(self._load(chunk, 'id') == idx)
+            if len(rows):
+                parts.append((chunk, rows))
+        return self._gather(parts, columns)
+
+    def to_parquet(self, dst):
+        '''
+        Export to a Parquet file (requires pyarrow). Box and estimate are
+        stored as fixed-size list columns.
+        '''
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("to_parquet requires pyarrow (pip install pyarrow)") from e
+
+        writer = None
+        try:
+            for chunk in self.chunks:
+                data = {column: np.asarray(self._load(chunk, column)) for column in self.columns}
+                arrays = {}
+                for column, values in data.items():
+                    if values.ndim > 1:
+                        flat = pa.array(values.reshape(len(values), -1).ravel())
+                        arrays[column] = pa.FixedSizeListArray.from_arrays(flat, int(np.prod(values.shape[1:])))
+                    else:
+                        arrays[column] = pa.array(values)
+                table = pa.table(arrays)
+                if writer is None:
+                    writer = pq.ParquetWriter(str(dst), table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
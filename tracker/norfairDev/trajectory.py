@@ -0,0 +1,134 @@
+import numpy as np
+
+class TrajectoryStore:
+    '''
+    Fixed-length position history for every tracked object, kept in one
+    pooled arena: `positions[slot]` is a ring buffer of the last `length`
+    centers of one object.
+
+    Slots are handed out from a free list and reclaimed as soon as the id
+    is no longer in the tracker, so memory stays bounded by the number of
+    live objects (the arena doubles when it runs out of slots).
+
+    Parameters:
+        length: positions kept per object.
+        capacity: initial number of slots.
+    '''
+    def __init__(self, length=32, capacity=256):
+        self.length = length
+        self.positions = np.full((0, length, 2), np.nan)
+        self.head = np.zeros(0, dtype=np.int64)   # next write index per slot
+        self.count = np.zeros(0, dtype=np.int64)  # valid positions per slot
+        self.slot_of = {}
+        self._free = []
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._slots = np.zeros(0, dtype=np.int64)
+        self._grow(capacity)
+
+    def __len__(self):
+        return len(self.slot_of)
+
+    def _grow(self, capacity):
+        old = len(self.head)
+        if capacity <= old:
+            return
+        extra = capacity - old
+        self.positions = np.concatenate([self.positions, np.full((extra, self.length, 2), np.nan)])
+        self.head = np.concatenate([self.head, np.zeros(extra, dtype=np.int64)])
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self._free.extend(range(capacity - 1, old - 1, -1))
+
+    def _allocate(self, idx):
+        if not self._free:
+            self._grow(max(2 * len(self.head), 1))
+        slot = self._free.pop()
+        self.head[slot] = 0
+        self.count[slot] = 0
+        self.slot_of[idx] = slot
+        return slot
+
+    def release(self, idx):
+        slot = self.slot_of.pop(idx, None)
+        if slot is not None:
+            self._free.append(slot)
+
+    def update(self, ids, centers, alive_ids=None):
+        '''
+        Append one position per object and reclaim the slots of dead ids.
+
+        Parameters:
+            ids: (N,) ids of the objects to record.
+            centers: (N, 2) their centers.
+            alive_ids (optional): every id still in the tracker (default: `ids`);
+                the history of any other id is dropped.
+        '''
+        ids = np.asarray(ids, dtype=np.int64)
+        alive = set(ids.tolist() if alive_ids is None else alive_ids)
+        for idx in [i for i in self.slot_of if i not in alive]:
+            self.release(idx)
+
+        slot_of = self.slot_of
+        slots = np.array([slot_of[i] if i in slot_of else self._allocate(i) for i in ids.tolist()], dtype=np.int64)
+        if len(slots):
+            self.positions[slots, self.head[slots]] = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+            self.head[slots] = (self.head[slots] + 1) % self.length
+            self.count[slots] = np.minimum(self.count[slots] + 1, self.length)
+        self._ids, self._slots = ids, slots
+
+    def _slots_for(self, ids):
+        if ids is None:
+            return self._ids, self._slots
+        ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        return ids, np.array([self.slot_of.get(i, -1) for i in ids.tolist()], dtype=np.int64)
+
+    def last(self, ids=None, k=None):
+        '''
+        Last `k` positions (oldest first) of each object.
+
+        Parameters:
+            ids (optional): object ids (default: the ids of the last update, in order).
+            k (optional): window length, at most `length` (default: `length`).
+
+        Returns:
+            np.ndarray: (N, k, 2); missing positions (short or unknown tracks) are NaN.
+        '''
+        k = self.length if k is None else min(k, self.length)
+        ids, slots = self._slots_for(ids)
+        out = np.full((len(slots), k, 2), np.nan)
+        known = slots >= 0
+        if known.any():
+            s = slots[known]
+            steps = np.arange(k)
+            idx = (self.head[s][:, None] - k + steps) % self.length
+            window = self.positions[s[:, None], idx]
+            window[steps[None, :] < (k - self.count[s])[:, None]] = np.nan
+            out[known] = window
+        return out
+
+    def velocity(self, ids=None, window=5):
+        '''
+        Mean displacement per frame over the last `window` positions, (N, 2).
+        NaN for tracks with fewer than two positions.
+        '''
+        points = self.last(ids, window)
+        valid = ~np.isnan(points[..., 0])
+        n = valid.sum(axis=1)
+        first = np.argmax(valid, axis=1)
+        rows = np.arange(len(points))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            v = (points[rows, -1] - points[rows, first]) / (n - 1)[:, None]
+        v[n < 2] = np.nan
+        return v
+
+    def speed(self, ids=None, window=5):
+        '''
+        Speed in pixels per frame, (N,).
+        '''
+        return np.linalg.norm(self.velocity(ids, window), axis=1)
+
+    def heading(self, ids=None, window=5):
+        '''
+        Direction of motion in radians (image coordinates, atan2(dy, dx)), (N,).
+        '''
+        v = self.velocity(ids, window)
+        return np.arctan2(v[:, 1], v[:, 0])
@@ -0,0 +1,134 @@
+from ...base.Regions import CompiledRegions
+import numpy as np
+
+class ZoneAnalytics:
+    '''
+    Incremental per-zone occupancy, entry/exit events and dwell, computed on
+    the object estimates from the tracker's compiled regions.
+
+    State is kept only for the objects of the current frame (rows aligned
+    with `ids_array`), so the per-frame cost depends on the number of active
+    objects, not on the stream length. Zone membership is re-tested
+    (vectorized, all zones at once) only for objects whose center moved more
+    than `min_move` pixels since it was last tested.
+
+    Events, per frame: `(id, zone, kind, dwell)` with kind 'enter', 'exit'
+    or 'lost' (the object left the tracker while inside the zone); dwell is
+    the length of the visit that ended.
+
+    Parameters:
+        zones (optional): region keys to analyse (default: every region).
+        fps (optional): dwell in seconds at this frame rate; frames otherwise.
+        min_move: center displacement (pixels) that triggers a re-test.
+    '''
+    def __init__(self, zones=None, fps=None, min_move=0.5):
+        self.zones = list(zones) if zones is not None else None
+        self.fps = fps
+        self.min_move = min_move
+        self._regions = None
+        self.keys = []
+        self._columns = np.zeros(0, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        '''
+        Drop all per-object state and the cumulative totals.
+        '''
+        R = len(self.keys)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._centers = np.zeros((0, 2))
+        self._membership = np.zeros((0, R), dtype=bool)
+        self._dwell = np.zeros((0, R))
+        self.entries_total = np.zeros(R, dtype=np.int64)
+        self.exits_total = np.zeros(R, dtype=np.int64)
+        self.dwell_total = np.zeros(R)
+
+    def _bind(self, regions:CompiledRegions):
+        keys = list(regions.keys) if self.zones is None else self.zones
+        missing = [k for k in keys if k not in regions.keys]
+        if missing:
+            raise ValueError(f"unknown zones {missing}, regions are {regions.keys}")
+        self._regions = regions
+        self.keys = keys
+        self._columns = np.array([regions.keys.index(k) for k in keys], dtype=np.int64)
+        self.reset()
+
+    def totals(self):
+        '''
+        Cumulative entries, exits and dwell per zone since the last reset.
+        '''
+        return {
+            key: {
+                'entries': int(self.entries_total[r]),
+                'exits': int(self.exits_total[r]),
+                'dwell': float(self.dwell_total[r]),
+            }
+            for r, key in enumerate(self.keys)
+        }
+
+    def update(self, ids, centers, regions:CompiledRegions, frame_size):
+        '''
+        Advance one frame.
+
+        Parameters:
+            ids: (N,) object ids of this frame.
+            centers: (N, 2) object centers in pixels.
+            regions: the tracker's `CompiledRegions`; state is reset when it changes.
+            frame_size: (h, w) used to scale the regions.
+
+        Returns:
+            tuple: membership (N, Z) bool, current dwell (N, Z), events list.
+        '''
+        if regions is not self._regions:
+            self._bind(regions)
+
+        ids = np.asarray(ids, dtype=np.int64)
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+        n, R = len(ids), len(self.keys)
+        membership = np.zeros((n, R), dtype=bool)
+        dwell = np.zeros((n, R))
+        ref_centers = centers.copy()
+        moved = np.ones(n, dtype=bool)
+        kept = np.zeros(len(self._ids), dtype=bool)
+
+        if n and len(self._ids):
+            order = np.argsort(self._ids, kind='stable')
+            pos = np.searchsorted(self._ids, ids, sorter=order)
+            pos = order[np.minimum(pos, len(order) - 1)]
+            found = self._ids[pos] == ids
+            prev_rows = pos[found]
+            kept[prev_rows] = True
+            membership[found] = self._membership[prev_rows]
+            dwell[found] = self._dwell[prev_rows]
+            ref_centers[found] = self._centers[prev_rows]
+            moved[found] = np.abs(centers[found] - ref_centers[found]).max(axis=1) > self.min_move
+
+        before = membership.copy()
+        if R and moved.any():
+            h, w = frame_size
+            membership[moved] = regions.membership(centers[moved], w, h)[:, self._columns]
+            ref_centers[moved] = centers[moved]
+
+        entered = membership & ~before
+        exited = before & ~membership
+        lost = self._membership[~kept]
+
+        events = []
+        for row, r in zip(*np.nonzero(entered)):
+            events.append((int(ids[row]), self.keys[r], 'enter', 0.0))
+        for row, r in zip(*np.nonzero(exited)):
+            events.append((int(ids[row]), self.keys[r], 'exit', float(dwell[row, r])))
+        lost_ids, lost_dwell = self._ids[~kept], self._dwell[~kept]
+        for row, r in zip(*np.nonzero(lost)):
+            events.append((int(lost_ids[row]), self.keys[r], 'lost', float(lost_dwell[row, r])))
+
+        dt = 1 / self.fps if self.fps else 1
+        dwell[~membership] = 0
+        dwell[membership] += dt
+
+        self.entries_total += entered.sum(axis=0)
+        self.exits_total += exited.sum(axis=0) + lost.sum(axis=0)
+        self.dwell_total += membership.sum(axis=0) * dt
+
+        self._ids, self._centers, self._membership, self._dwell = ids, ref_centers, membership, dwell
+        return membership, dwell, events
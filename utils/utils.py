@@ -1,3 +1,5 @@
+import numpy as np
+
 def conv2dataDict(**data):
         '''
         Convert column-based keyword arguments (dict of lists) to a list of row-based dicts.
@@ -12,6 +14,9 @@ def conv2dataDict(**data):
         Returns:
             List[dict]: List of dictionaries representing each row.
 
+        See also:
+            ColumnarData: keeps the columns and hands out lazy row views instead.
+
         Raises:
             ValueError: If input lists are not all the same length.
         '''
@@ -28,4 +33,120 @@ def conv2dataDict(**data):
             row = {k : data[k][i] for k in keys}
             data_list.append(row)
         
-        return data_list
\ No newline at end of file
+        return data_list
+
+class DataRow:
+    '''
+    Lightweight view of one row of a `ColumnarData`.
+
+    Values are read from the shared column arrays only when accessed.
+    Supports the dict-style access used on `Detection.data` (`.get()`,
+    `[key]`, `in`, `keys()`, `items()`).
+    '''
+    __slots__ = ('_columns', '_index')
+
+    def __init__(self, columns, index):
+        self._columns = columns
+        self._index = index
+
+    def get(self, key, default=None):
+        column = self._columns.get(key)
+        if column is None:
+            return default
+        return column[self._index]
+
+    def __getitem__(self, key):
+        return self._columns[key][self._index]
+
+    def __contains__(self, key):
+        return key in self._columns
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def keys(self):
+        return self._columns.keys()
+
+    def values(self):
+        return [column[self._index] for column in self._columns.values()]
+
+    def items(self):
+        return [(k, column[self._index]) for k, column in self._columns.items()]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f'DataRow({self.to_dict()!r})'
+
+
+class ColumnarData:
+    '''
+    Column-based replacement for `conv2dataDict` that keeps the original arrays.
+
+    Example:
+        data = ColumnarData(box_coords=boxes, conf=conf)
+        data[0].get('box_coords')  # => boxes[0], read on access
+
+    Parameters:
+        **columns: Keyword arguments where each value is an array or list of
+            the same length. Array-likes (e.g. CPU tensors) are converted with
+            `np.asarray` without copying.
+
+    Raises:
+        ValueError: If columns are not all the same length.
+    '''
+    __slots__ = ('columns', '_length')
+
+    def __init__(self, **columns):
+        self.columns = {
+            k: v if isinstance(v, (list, tuple, np.ndarray)) else np.asarray(v)
+            for k, v in columns.items()
+        }
+        lengths = {len(v) for v in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("All values must have the same length")
+        self._length = lengths.pop() if lengths else 0
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += self._length
+            if not 0 <= index < self._length:
+                raise IndexError(f"row {index} out of range for {self._length} rows")
+            return DataRow(self.columns, index)
+        return self.take(index)
+
+    def __iter__(self):
+        return iter(self.rows())
+
+    def rows(self):
+        '''
+        Row views for all rows.
+        '''
+        columns = self.columns
+        return [DataRow(columns, i) for i in range(self._length)]
+
+    def take(self, index):
+        '''
+        New `ColumnarData` with the rows selected by a slice, boolean mask or index array.
+        '''
+        if not isinstance(index, slice):
+            index = np.asarray(index)
+            if index.dtype == bool:
+                index = np.flatnonzero(index)
+        out = {}
+        for k, v in self.columns.items():
+            if isinstance(v, np.ndarray):
+                out[k] = v[index]
+            elif isinstance(index, slice):
+                out[k] = v[index]
+            else:
+                out[k] = [v[i] for i in index]
+        return ColumnarData(**out)